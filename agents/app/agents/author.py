@@ -1,9 +1,12 @@
-from langchain_openai import ChatOpenAI
+import re
+
 from langchain_core.messages import SystemMessage, HumanMessage
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import settings
-from ..tools.knowledge_reader import get_recent_posts
+from ..llm import complete, get_chat_model
+from ..metrics import instrument
+from ..prompt_budget import count_tokens, pack_prompt
+from ..tools.post_index import PostIndex
 
 AUTHOR_SYSTEM_PROMPT = """You are an expert social media content author specializing in creating engaging tweets for business lead generation.
 
@@ -17,7 +20,6 @@ Your task is to draft tweet content based on the provided knowledge base. Follow
 6. Focus on value and insight, not direct selling
 7. If a specific language is requested, write in that language
 8. If knowledge base content is in a non-English language, match that language unless instructed otherwise
-9. Avoid repeating topics from recent posts
 
 Output ONLY the tweet text. No explanations, no quotes, no labels."""
 
@@ -33,82 +35,117 @@ Rules for each tweet:
 
 Output each tweet on a separate line. Number them 1., 2., 3. No other text."""
 
+NUMBERING_RE = re.compile(r"^\d+\.\s*")
+
 
+@instrument("author")
 async def run_author(
-    session: AsyncSession,
-    user_id: str,
     knowledge_context: str,
     prompt: str | None,
     language: str | None,
     multiple: bool = False,
     count: int = 3,
+    post_index: PostIndex | None = None,
 ) -> dict:
-    """Author agent: drafts tweet content based on knowledge context."""
-    llm = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.9 if multiple else 0.8,
-        max_tokens=500 if multiple else 150,
-        api_key=settings.openai_api_key,
-    )
-
-    # Get recent posts to avoid repetition
-    recent_posts = await get_recent_posts(session, user_id)
-    recent_context = ""
-    if recent_posts:
-        recent_context = "\n\nRECENT POSTS TO AVOID REPEATING:\n" + "\n".join(
-            f"- {p[:100]}" for p in recent_posts[:10]
-        )
+    """
+    Author agent: drafts tweet content based on knowledge context.
+
+    The prompt is packed into ``author_prompt_tokens``: instructions are
+    always kept and the knowledge base is trimmed when it does not fit.
+    With ``post_index``, drafts that nearly duplicate one of the user's
+    earlier posts are dropped and redrafted (up to ``dedup_max_redrafts``
+    times, showing the model what it repeated). If every redraft still
+    repeats, the last drafts are returned with ``duplicate_of`` set.
+    """
+    llm = get_chat_model("gpt-4o", temperature=0.9 if multiple else 0.8, max_tokens=500 if multiple else 150)
 
     language_instruction = ""
     if language and language != "auto":
         language_instruction = f"\n\nIMPORTANT: Write the tweet in {language}."
-
-    user_prompt_parts = [f"KNOWLEDGE BASE:\n{knowledge_context}"]
-    if recent_context:
-        user_prompt_parts.append(recent_context)
-    if language_instruction:
-        user_prompt_parts.append(language_instruction)
-    if prompt:
-        user_prompt_parts.append(f"\nUSER TOPIC/DIRECTION: {prompt}")
-
-    user_content = "\n".join(user_prompt_parts)
+    topic = f"\nUSER TOPIC/DIRECTION: {prompt}" if prompt else ""
+
+    system = MULTIPLE_SYSTEM_PROMPT.format(count=count) if multiple else AUTHOR_SYSTEM_PROMPT
+    system_tokens = count_tokens(system)
+    budget = settings.author_prompt_tokens - system_tokens
+
+    rejected: list[str] = []
+    duplicate_of: str | None = None
+    redrafts = settings.dedup_max_redrafts if post_index is not None else 0
+    for _ in range(redrafts + 1):
+        repeated = ""
+        if rejected:
+            repeated = "\n\nTHESE DRAFTS REPEAT EARLIER POSTS, TAKE A DIFFERENT ANGLE:\n" + "\n".join(
+                f"- {draft}" for draft in rejected
+            )
+        # Instructions always fit; knowledge gives way first
+        packed = pack_prompt(
+            [
+                ("knowledge", f"KNOWLEDGE BASE:\n{knowledge_context}", 2),
+                ("language", language_instruction, 0),
+                ("topic", topic, 0),
+                ("repeated", repeated, 1),
+            ],
+            budget=budget,
+            stage="author",
+        )
+        response = await complete(
+            llm,
+            [SystemMessage(content=system), HumanMessage(content=packed["text"])],
+            stage="author",
+        )
+        drafts = _parse_suggestions(response, count) if multiple else [_truncate(response.strip())]
+        if post_index is None:
+            break
+
+        matches = [post_index.find_text(draft) for draft in drafts]
+        duplicate_of = next((match for match in matches if match is not None), None)
+        if duplicate_of is None:
+            break
+        rejected.extend(draft for draft, match in zip(drafts, matches) if match is not None)
+        unique = [draft for draft, match in zip(drafts, matches) if match is None]
+        if multiple and unique:
+            # Enough distinct suggestions left; drop the repeats
+            drafts, duplicate_of = unique, None
+            break
+
+    log_suffix = f", {packed['tokens'] + system_tokens} prompt tokens"
+    trimmed = packed["truncated"] + packed["dropped"]
+    if trimmed:
+        log_suffix += f", trimmed {'/'.join(trimmed)} to fit"
+    if rejected:
+        log_suffix += f", rejected {len(rejected)} near-duplicate draft(s)"
+        if duplicate_of:
+            log_suffix += f"; still similar to post {duplicate_of}"
 
     if multiple:
-        system = MULTIPLE_SYSTEM_PROMPT.format(count=count)
-        response = await llm.ainvoke([
-            SystemMessage(content=system),
-            HumanMessage(content=user_content),
-        ])
-        # Parse numbered suggestions
-        lines = response.content.strip().split("\n")
-        suggestions = []
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            # Remove numbering like "1. ", "2. ", etc.
-            import re
-            cleaned = re.sub(r"^\d+\.\s*", "", line)
-            if cleaned and len(cleaned) <= 280:
-                suggestions.append(cleaned)
-
-        return {
-            "suggestions": suggestions[:count],
-            "draft_content": suggestions[0] if suggestions else "",
-            "log": f"Generated {len(suggestions)} suggestions",
-        }
-    else:
-        response = await llm.ainvoke([
-            SystemMessage(content=AUTHOR_SYSTEM_PROMPT),
-            HumanMessage(content=user_content),
-        ])
-        draft = response.content.strip()
-        # Truncate if over 280
-        if len(draft) > 280:
-            draft = draft[:277] + "..."
-
         return {
-            "draft_content": draft,
-            "suggestions": [],
-            "log": f"Drafted tweet ({len(draft)} chars)",
+            "suggestions": drafts[:count],
+            "draft_content": drafts[0] if drafts else "",
+            "duplicate_of": duplicate_of,
+            "log": f"Generated {len(drafts)} suggestions{log_suffix}",
         }
+    return {
+        "draft_content": drafts[0],
+        "suggestions": [],
+        "duplicate_of": duplicate_of,
+        "log": f"Drafted tweet ({len(drafts[0])} chars){log_suffix}",
+    }
+
+
+def _truncate(draft: str) -> str:
+    if len(draft) > 280:
+        draft = draft[:277] + "..."
+    return draft
+
+
+def _parse_suggestions(response: str, count: int) -> list[str]:
+    suggestions = []
+    for line in response.strip().split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        # Remove numbering like "1. ", "2. ", etc.
+        cleaned = NUMBERING_RE.sub("", line)
+        if cleaned and len(cleaned) <= 280:
+            suggestions.append(cleaned)
+    return suggestions[:count]
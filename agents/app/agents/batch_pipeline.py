@@ -0,0 +1,152 @@
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from ..config import settings
+from ..database import async_session
+from ..ids import generate_cuid
+from ..models import Post
+from ..rate_governor import llm_lane
+from ..tools.knowledge_reader import UserSources
+from ..tools.post_index import PostIndex, get_post_index, simhash
+from .author import run_author
+from .database_manager import run_database_manager
+from .editor import run_editor
+
+
+def parse_schedule_times(schedule_times: list[str], count: int) -> list[datetime | None]:
+    """
+    Scheduled time for each of ``count`` posts (None past the end of the
+    list). Raises ValueError on a malformed timestamp, so callers can reject
+    a batch before any post is generated.
+    """
+    parsed: list[datetime | None] = []
+    for i in range(count):
+        if i >= len(schedule_times):
+            parsed.append(None)
+            continue
+        try:
+            parsed.append(datetime.fromisoformat(schedule_times[i].replace("Z", "+00:00")))
+        except ValueError:
+            raise ValueError(f"Invalid schedule time #{i + 1}: {schedule_times[i]!r}") from None
+    return parsed
+
+
+async def prepare_batch(user_id: str, sources: UserSources | None = None) -> dict:
+    """
+    Shared stage of a batch: run the Database Manager once and load the
+    user's near-duplicate index. ``knowledge_context`` is empty when the
+    user has no sources. Posts accepted during the batch go into a separate
+    ``siblings`` index, since the loaded one is shared through the cache
+    and those posts are not written yet. ``sources`` are the user's already-loaded sources,
+    if the caller has them.
+    """
+    async with async_session() as session:
+        db_result = await run_database_manager(session, user_id, sources=sources)
+        post_index = await get_post_index(session, user_id) if settings.dedup_enabled else None
+    siblings = PostIndex(settings.dedup_max_distance) if post_index is not None else None
+    return {**db_result, "post_index": post_index, "siblings": siblings}
+
+
+def register_post(batch: dict, post_id: str, content: str) -> tuple[int | None, str | None]:
+    """
+    Signature for a post about to be written, and the id of an earlier post
+    (or one accepted earlier in this batch) it nearly duplicates. Accepted
+    posts are added to the batch's ``siblings`` index so later siblings are
+    checked against them.
+    """
+    signature = simhash(content)
+    if batch["post_index"] is None or signature is None:
+        return signature, None
+    duplicate_of = batch["post_index"].find(signature) or batch["siblings"].find(signature)
+    if duplicate_of is None:
+        batch["siblings"].add(post_id, signature)
+    return signature, duplicate_of
+
+
+async def generate_batch_post(batch: dict, user_id: str, i: int, count: int) -> dict:
+    """Draft and edit post ``i`` of ``count`` against a prepared batch."""
+    author_result = await run_author(
+        knowledge_context=batch["knowledge_context"],
+        prompt=f"Create unique post #{i + 1} of {count} for today. Vary the topic and angle.",
+        language=None,
+        multiple=False,
+        post_index=batch["post_index"],
+    )
+    return await run_editor(
+        draft_content=author_result["draft_content"],
+        suggestions=author_result["suggestions"],
+        available_images=batch["available_images"],
+        multiple=False,
+    )
+
+
+async def run_batch_pipeline(
+    user_id: str,
+    count: int,
+    schedule_times: list[str] | None = None,
+    sources: UserSources | None = None,
+) -> dict:
+    """
+    Generate and schedule ``count`` posts for one user.
+
+    The Database Manager stage (refresh check, knowledge context, image
+    list) and the near-duplicate index load run once for the whole batch;
+    each post is then drafted and edited concurrently, at most
+    ``batch_concurrency`` at a time. All posts are written in a single
+    transaction. Posts whose generation fails, or that nearly duplicate an
+    earlier post or a sibling, are skipped and reported in ``errors``.
+    Schedule times are validated before anything is generated.
+    """
+    scheduled_at = parse_schedule_times(schedule_times or [], count)
+
+    batch = await prepare_batch(user_id, sources)
+    if not batch["knowledge_context"]:
+        return {"post_ids": [], "errors": ["No knowledge sources found"], "log": batch["log"]}
+
+    limit = asyncio.Semaphore(max(1, settings.batch_concurrency))
+
+    async def generate_one(i: int) -> dict:
+        async with limit:
+            return await generate_batch_post(batch, user_id, i, count)
+
+    with llm_lane("batch"):
+        results = await asyncio.gather(*(generate_one(i) for i in range(count)), return_exceptions=True)
+
+    now = datetime.now(timezone.utc)
+    rows: list[dict] = []
+    errors: list[str] = []
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            errors.append(f"Post #{i + 1}: {result}")
+            continue
+        if not result["final_content"]:
+            continue
+        post_id = generate_cuid()
+        signature, duplicate_of = register_post(batch, post_id, result["final_content"])
+        if duplicate_of:
+            errors.append(f"Post #{i + 1}: near-duplicate of post {duplicate_of}")
+            continue
+        rows.append({
+            "id": post_id,
+            "content": result["final_content"],
+            "simhash": signature,
+            "status": "scheduled",
+            "scheduledAt": scheduled_at[i],
+            "mediaAssetId": result.get("media_asset_id"),
+            "userId": user_id,
+            "createdAt": now,
+            "updatedAt": now,
+        })
+
+    if rows:
+        async with async_session() as session:
+            await session.execute(insert(Post), rows)
+            await session.commit()
+
+    return {
+        "post_ids": [row["id"] for row in rows],
+        "errors": errors,
+        "log": batch["log"],
+    }
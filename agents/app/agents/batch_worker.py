@@ -0,0 +1,219 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, select, update
+
+from ..config import settings
+from ..database import async_session
+from ..ids import generate_cuid
+from ..models import BatchJob, BatchJobItem, Post
+from ..rate_governor import llm_lane
+from ..tools.batch_job_queue import claim_next_batch_job, heartbeat_batch_job, retry_at, wait_for_batch_work
+from .batch_pipeline import generate_batch_post, parse_schedule_times, prepare_batch, register_post
+
+
+class BatchWorker:
+    """
+    Background runner for BatchJob rows.
+
+    Each post is written together with its BatchJobItem in one transaction,
+    so a job picked up again after a crash only generates the items that are
+    still pending. Items are not retried once they fail; a job that ran to
+    the end with failed items is marked ``partial`` (or ``failed`` when no
+    post was written). A job that could not run to the end goes back to
+    pending after an exponential backoff, up to ``batch_job_max_attempts``.
+    """
+
+    def __init__(self, concurrency: int, poll_seconds: float):
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = poll_seconds
+        self._tasks: list[asyncio.Task] = []
+        self.jobs_done = 0
+        self.jobs_partial = 0
+        self.jobs_failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with async_session() as session:
+                    job = await claim_next_batch_job(session)
+                if job is None:
+                    await wait_for_batch_work(self.poll_seconds)
+                    continue
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _heartbeat(self, job_id: str) -> None:
+        interval = max(1.0, settings.batch_job_timeout_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_session() as session:
+                    await heartbeat_batch_job(session, job_id)
+            except Exception:
+                pass
+
+    async def _process(self, job: BatchJob) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        error: str | None = None
+        try:
+            await self._generate(job)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        finally:
+            heartbeat.cancel()
+
+        async with async_session() as session:
+            job = await session.get(BatchJob, job.id, populate_existing=True)
+            if job is None:
+                return
+            now = datetime.now(timezone.utc)
+            if error is None:
+                failed, total = await self._failed_items(session, job.id)
+                if not failed:
+                    job.status = "done"
+                    job.error = None
+                    self.jobs_done += 1
+                elif failed < total:
+                    job.status = "partial"
+                    job.error = f"{failed} of {total} posts failed"
+                    self.jobs_partial += 1
+                else:
+                    job.status = "failed"
+                    job.error = "Every post failed"
+                    self.jobs_failed += 1
+                job.finishedAt = now
+            elif job.attempts >= settings.batch_job_max_attempts:
+                job.status = "failed"
+                job.error = error
+                job.finishedAt = now
+                self.jobs_failed += 1
+            else:
+                job.status = "pending"
+                job.error = error
+                job.availableAt = retry_at(job.attempts)
+            job.updatedAt = now
+            await session.commit()
+
+    @staticmethod
+    async def _failed_items(session, job_id: str) -> tuple[int, int]:
+        result = await session.execute(
+            select(
+                func.count().filter(BatchJobItem.status == "failed"),
+                func.count(),
+            ).where(BatchJobItem.jobId == job_id)
+        )
+        failed, total = result.one()
+        return failed, total
+
+    async def _generate(self, job: BatchJob) -> None:
+        async with async_session() as session:
+            result = await session.execute(
+                select(BatchJobItem.id, BatchJobItem.position).where(
+                    BatchJobItem.jobId == job.id,
+                    BatchJobItem.status == "pending",
+                )
+            )
+            pending = result.all()
+        if not pending:
+            return
+
+        scheduled_at = parse_schedule_times(json.loads(job.scheduleTimes) if job.scheduleTimes else [], job.count)
+        batch = await prepare_batch(job.userId)
+        if not batch["knowledge_context"]:
+            raise RuntimeError("No knowledge sources found")
+
+        limit = asyncio.Semaphore(max(1, settings.batch_concurrency))
+
+        async def generate_one(item_id: str, position: int) -> None:
+            async with limit:
+                try:
+                    result = await generate_batch_post(batch, job.userId, position, job.count)
+                except Exception as e:
+                    await self._finish_item(item_id, error=str(e) or e.__class__.__name__)
+                    return
+            content = result["final_content"]
+            if not content:
+                await self._finish_item(item_id, error="Empty content")
+                return
+            post_id = generate_cuid()
+            signature, duplicate_of = register_post(batch, post_id, content)
+            if duplicate_of:
+                await self._finish_item(item_id, error=f"Near-duplicate of post {duplicate_of}")
+                return
+            await self._finish_item(item_id, post={
+                "id": post_id,
+                "content": content,
+                "simhash": signature,
+                "scheduledAt": scheduled_at[position],
+                "mediaAssetId": result.get("media_asset_id"),
+                "userId": job.userId,
+            })
+
+        with llm_lane("batch"):
+            results = await asyncio.gather(
+                *(generate_one(item_id, position) for item_id, position in pending),
+                return_exceptions=True,
+            )
+        # Let every sibling finish before giving up; items whose result could
+        # not be recorded stay pending for the job's next attempt
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise RuntimeError(
+                f"{len(errors)} of {len(pending)} posts could not be recorded: {errors[0]}"
+            ) from errors[0]
+
+    async def _finish_item(self, item_id: str, post: dict | None = None, error: str | None = None) -> None:
+        """
+        Mark an item done (writing its Post) or failed. The update only
+        applies to a still-pending item, so a job resumed concurrently by
+        another worker cannot write the same post twice.
+        """
+        now = datetime.now(timezone.utc)
+        post_id = post["id"] if post else None
+        async with async_session() as session:
+            claimed = await session.execute(
+                update(BatchJobItem)
+                .where(BatchJobItem.id == item_id, BatchJobItem.status == "pending")
+                .values(
+                    status="done" if post else "failed",
+                    content=post["content"] if post else None,
+                    postId=post_id,
+                    error=error,
+                    updatedAt=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if claimed.rowcount != 1:
+                await session.rollback()
+                return
+            if post:
+                await session.execute(
+                    insert(Post),
+                    [{"status": "scheduled", "createdAt": now, "updatedAt": now, **post}],
+                )
+            await session.commit()
+
+
+batch_worker = BatchWorker(
+    concurrency=settings.batch_worker_concurrency,
+    poll_seconds=settings.batch_poll_seconds,
+)
@@ -1,93 +1,87 @@
-import time
-import random
-import string
-from datetime import datetime, timezone
+import asyncio
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..metrics import instrument, timed
 from ..models import KnowledgeSource, MediaAsset
-from ..tools.scraper import scrape_website
-from ..tools.image_downloader import download_and_validate_image
-from ..tools.knowledge_reader import get_stale_sources, get_knowledge_context
-
-
-def _generate_cuid() -> str:
-    ts = int(time.time() * 1000)
-    chars = string.ascii_lowercase + string.digits
-    random_part = "".join(random.choices(chars, k=16))
-    return f"c{ts:x}{random_part}"
+from ..tools.knowledge_reader import UserSources, get_knowledge_context, load_user_sources
+from ..tools.refresh_queue import enqueue_refresh, notify_refresh_work
+from .source_refresh import refresh_single_flight
 
 
+@instrument("database_manager")
 async def run_database_manager(
     session: AsyncSession,
     user_id: str,
+    fresh: bool = False,
+    prompt: str | None = None,
+    sources: UserSources | None = None,
 ) -> dict:
     """
     Database Manager agent: refreshes stale knowledge sources,
     downloads product images, returns knowledge context.
+
+    Stale sources that already have content are served as-is and queued for
+    the background refresh worker (stale-while-revalidate). Sources that
+    have never been scraped, or every stale source when ``fresh`` is set,
+    are refreshed inline before the context is built. Inline refreshes are
+    single-flight per source, so concurrent requests share one crawl. The
+    context holds the passages most relevant to ``prompt``.
+
+    The user's sources are read once (without their content) and shared by
+    the stale check and the context build; callers that already loaded them
+    pass ``sources``.
     """
     log_parts: list[str] = []
 
     # Check for stale sources
-    stale_sources = await get_stale_sources(session, user_id)
+    if sources is None:
+        sources = await load_user_sources(session, user_id)
+    stale_sources = sources.stale()
 
     if stale_sources:
-        log_parts.append(f"Found {len(stale_sources)} stale source(s) to refresh")
-
+        inline: list[KnowledgeSource] = []
+        deferred: list[KnowledgeSource] = []
         for source in stale_sources:
-            try:
-                result = await scrape_website(source.url)
-                if result["success"]:
-                    source.content = result["content"]
-                    source.pagesScraped = result["pages_scraped"]
-                    source.lastScraped = datetime.now(timezone.utc)
-                    source.updatedAt = datetime.now(timezone.utc)
-
-                    # Download product images found during scraping
-                    images_downloaded = 0
-                    for img_info in result.get("images", [])[:10]:
-                        # Check if image already exists
-                        existing = await session.execute(
-                            select(MediaAsset).where(
-                                MediaAsset.sourceUrl == img_info["url"],
-                                MediaAsset.userId == user_id,
-                            )
-                        )
-                        if existing.scalar_one_or_none():
-                            continue
-
-                        img_data = await download_and_validate_image(img_info["url"])
-                        if img_data:
-                            asset = MediaAsset(
-                                id=_generate_cuid(),
-                                sourceUrl=img_info["url"],
-                                data=img_data["data"],
-                                mimeType=img_data["mime_type"],
-                                width=img_data["width"],
-                                height=img_data["height"],
-                                altText=img_info.get("alt", ""),
-                                userId=user_id,
-                            )
-                            session.add(asset)
-                            images_downloaded += 1
-
-                            if images_downloaded >= 5:
-                                break
+            (inline if fresh or not sources.has_content(source) else deferred).append(source)
 
-                    log_parts.append(
-                        f"Refreshed '{source.name}': {result['pages_scraped']} pages, "
-                        f"{images_downloaded} images downloaded"
-                    )
-            except Exception as e:
-                log_parts.append(f"Failed to refresh '{source.name}': {e}")
+        queued = 0
+        if deferred:
+            queued = await enqueue_refresh(session, deferred)
+            log_parts.append(
+                f"Serving {len(deferred)} stale source(s), {queued} queued for background refresh"
+            )
 
+        # Commit queued jobs and end the read transaction before crawling
         await session.commit()
+        if queued:
+            notify_refresh_work()
+
+        if inline:
+            log_parts.append(f"Found {len(inline)} stale source(s) to refresh")
+            names = [source.name for source in inline]
+            with timed("refresh"):
+                results = await asyncio.gather(
+                    *(refresh_single_flight(source.id) for source in inline),
+                    return_exceptions=True,
+                )
+            for name, result in zip(names, results):
+                if isinstance(result, Exception):
+                    log_parts.append(f"Failed to refresh '{name}': {result}")
+                elif result is None:
+                    log_parts.append(f"'{name}' refreshed by another request")
+                else:
+                    log_parts.append(result)
+            # Refreshes committed in their own sessions; reload the sources
+            session.expire_all()
+            sources = await load_user_sources(session, user_id)
     else:
         log_parts.append("All sources are up to date")
 
-    # Get combined knowledge context
-    knowledge_context = await get_knowledge_context(session, user_id)
+    # Retrieve the knowledge passages relevant to this request
+    with timed("knowledge_context"):
+        knowledge_context = await get_knowledge_context(session, user_id, query=prompt, sources=sources)
 
     # Get available images for this user
     img_result = await session.execute(
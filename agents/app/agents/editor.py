@@ -1,7 +1,13 @@
+import asyncio
+from collections.abc import Callable
+
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from ..config import settings
+from ..llm import complete, get_chat_model
+from ..metrics import IMAGE_SELECTIONS, instrument
+from ..tools.image_matcher import match_image
 
 EDITOR_SYSTEM_PROMPT = """You are a meticulous social media editor. Review and refine the draft tweet for maximum engagement and lead generation.
 
@@ -19,68 +25,116 @@ Your editing checklist:
 Output ONLY the refined tweet text. No explanations."""
 
 
+def _fit(text: str) -> str:
+    if len(text) > 280:
+        text = text[:277] + "..."
+    return text
+
+
+async def _refine(
+    llm: ChatOpenAI,
+    draft: str,
+    limit: asyncio.Semaphore,
+    on_token: Callable[[str], None] | None = None,
+) -> str:
+    messages = [
+        SystemMessage(content=EDITOR_SYSTEM_PROMPT),
+        HumanMessage(content=f"DRAFT TWEET:\n{draft}"),
+    ]
+    async with limit:
+        text = await complete(llm, messages, stage="edit", on_token=on_token)
+    return _fit(text.strip())
+
+
+@instrument("editor")
 async def run_editor(
     draft_content: str,
     suggestions: list[str],
     available_images: list[dict],
     multiple: bool = False,
+    on_token: Callable[[str], None] | None = None,
 ) -> dict:
-    """Editor agent: refines draft for engagement, selects best image."""
-    llm = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.3,
-        max_tokens=500 if multiple else 150,
-        api_key=settings.openai_api_key,
+    """
+    Editor agent: refines draft for engagement, selects best image.
+
+    Suggestions are refined concurrently (at most ``editor_concurrency`` at
+    a time). A suggestion whose refinement fails is kept as drafted; only if
+    every refinement fails is the error raised. The image is chosen for the
+    final tweet, so it waits for the first refinement.
+
+    ``on_token`` receives the first refinement's text as it streams in.
+    Streamed text is provisional: the returned content is authoritative
+    (it may be trimmed to 280 characters or fall back to the draft).
+    """
+    llm = get_chat_model("gpt-4o", temperature=0.3, max_tokens=500 if multiple else 150)
+    limit = asyncio.Semaphore(max(1, settings.editor_concurrency))
+
+    drafts = suggestions if multiple and suggestions else [draft_content]
+    results = await asyncio.gather(
+        *(
+            _refine(llm, draft, limit, on_token if i == 0 else None)
+            for i, draft in enumerate(drafts)
+        ),
+        return_exceptions=True,
     )
 
+    errors = [r for r in results if isinstance(r, Exception)]
+    if len(errors) == len(drafts):
+        raise errors[0]
+    refined = [
+        _fit(draft.strip()) if isinstance(result, Exception) else result
+        for draft, result in zip(drafts, results)
+    ]
+
     selected_image_id: str | None = None
+    if available_images:
+        try:
+            selected_image_id = await _choose_image(llm, refined[0], available_images)
+        except Exception:
+            # Image selection is best effort; the tweet stands without one
+            selected_image_id = None
 
     if multiple and suggestions:
-        # Refine each suggestion
-        refined: list[str] = []
-        for suggestion in suggestions:
-            response = await llm.ainvoke([
-                SystemMessage(content=EDITOR_SYSTEM_PROMPT),
-                HumanMessage(content=f"DRAFT TWEET:\n{suggestion}"),
-            ])
-            refined_text = response.content.strip()
-            if len(refined_text) > 280:
-                refined_text = refined_text[:277] + "..."
-            refined.append(refined_text)
-
-        # Select best image for the first suggestion
-        if available_images and refined:
-            selected_image_id = await _select_best_image(
-                llm, refined[0], available_images
-            )
-
+        log = f"Refined {len(refined) - len(errors)} suggestions"
+        if errors:
+            log += f", kept {len(errors)} unrefined after errors"
         return {
-            "final_content": refined[0] if refined else "",
+            "final_content": refined[0],
             "suggestions": refined,
             "media_asset_id": selected_image_id,
-            "log": f"Refined {len(refined)} suggestions",
+            "log": log,
         }
-    else:
-        response = await llm.ainvoke([
-            SystemMessage(content=EDITOR_SYSTEM_PROMPT),
-            HumanMessage(content=f"DRAFT TWEET:\n{draft_content}"),
-        ])
-        final = response.content.strip()
-        if len(final) > 280:
-            final = final[:277] + "..."
-
-        # Select best image
-        if available_images:
-            selected_image_id = await _select_best_image(
-                llm, final, available_images
-            )
 
-        return {
-            "final_content": final,
-            "suggestions": [],
-            "media_asset_id": selected_image_id,
-            "log": f"Refined tweet ({len(final)} chars)",
-        }
+    final = refined[0]
+    return {
+        "final_content": final,
+        "suggestions": [],
+        "media_asset_id": selected_image_id,
+        "log": f"Refined tweet ({len(final)} chars)",
+    }
+
+
+@instrument("image_select")
+async def _choose_image(
+    llm: ChatOpenAI,
+    tweet_text: str,
+    images: list[dict],
+) -> str | None:
+    """
+    Pick an image according to ``image_select_mode``.
+
+    "local" and "hybrid" rank images by BM25 over alt text and URL words;
+    "hybrid" falls back to the LLM when no image clearly wins, and "llm"
+    always asks the model.
+    """
+    mode = settings.image_select_mode
+    if mode != "llm":
+        image_id, clear = match_image(tweet_text, images, settings.image_select_margin)
+        if clear or mode == "local":
+            IMAGE_SELECTIONS.labels("local").inc()
+            return image_id
+    IMAGE_SELECTIONS.labels("llm").inc()
+    return await _select_best_image(llm, tweet_text, images)
 
 
 async def _select_best_image(
@@ -97,18 +151,21 @@ async def _select_best_image(
         for i, img in enumerate(images[:10])
     )
 
-    response = await llm.ainvoke([
-        SystemMessage(
-            content="You are an image selector. Given a tweet and a list of available images, "
-            "select the image that best matches the tweet content. "
-            "Respond with ONLY the image ID, or 'NONE' if no image is a good match."
-        ),
-        HumanMessage(
-            content=f"TWEET:\n{tweet_text}\n\nAVAILABLE IMAGES:\n{image_list}"
-        ),
-    ])
-
-    result = response.content.strip()
+    result = await complete(
+        llm,
+        [
+            SystemMessage(
+                content="You are an image selector. Given a tweet and a list of available images, "
+                "select the image that best matches the tweet content. "
+                "Respond with ONLY the image ID, or 'NONE' if no image is a good match."
+            ),
+            HumanMessage(
+                content=f"TWEET:\n{tweet_text}\n\nAVAILABLE IMAGES:\n{image_list}"
+            ),
+        ],
+        stage="image_select",
+    )
+    result = result.strip()
     if result == "NONE":
         return None
 
@@ -1,5 +1,10 @@
+from collections.abc import Callable
+
+from ..config import settings
 from ..database import async_session
-from ..schemas import GenerateResponse
+from ..metrics import collect_timings, timed
+from ..schemas import GenerateResponse, PipelineTimings
+from ..tools.post_index import get_post_index
 from .database_manager import run_database_manager
 from .author import run_author
 from .editor import run_editor
@@ -10,19 +15,51 @@ async def run_pipeline(
     prompt: str | None = None,
     language: str | None = None,
     multiple: bool = False,
+    fresh: bool = False,
+    on_event: Callable[[str, dict], None] | None = None,
+    debug: bool = False,
 ) -> GenerateResponse:
     """
     Run the 3-agent pipeline: Database Manager → Author → Editor.
 
-    Returns a GenerateResponse with the final content and metadata.
+    Returns a GenerateResponse with the final content and metadata. Stale
+    knowledge is served immediately and refreshed in the background unless
+    ``fresh`` is set, in which case stale sources are re-crawled first.
+
+    ``on_event`` is called with ``("stage", {"stage", "log"})`` as each stage
+    finishes and ``("token", {"text"})`` for each editor token.
+
+    Every stage is timed into the Prometheus metrics; with ``debug`` the
+    per-stage timings and token counts are also returned in ``timings``.
     """
+    with collect_timings() as timings:
+        with timed("pipeline"):
+            response = await _run_stages(user_id, prompt, language, multiple, fresh, on_event)
+    if debug:
+        response.timings = PipelineTimings(**timings)
+    return response
+
+
+async def _run_stages(
+    user_id: str,
+    prompt: str | None,
+    language: str | None,
+    multiple: bool,
+    fresh: bool,
+    on_event: Callable[[str, dict], None] | None,
+) -> GenerateResponse:
     pipeline_log: dict[str, str] = {}
 
+    def stage_done(stage: str, log: str) -> None:
+        pipeline_log[stage] = log
+        if on_event is not None:
+            on_event("stage", {"stage": stage, "log": log})
+
     async with async_session() as session:
         # Stage 1: Database Manager
-        # Refreshes stale knowledge sources, downloads images, returns context
-        db_result = await run_database_manager(session, user_id)
-        pipeline_log["database_manager"] = db_result["log"]
+        # Refreshes stale knowledge sources, downloads images, retrieves context
+        db_result = await run_database_manager(session, user_id, fresh=fresh, prompt=prompt)
+        stage_done("database_manager", db_result["log"])
 
         knowledge_context = db_result["knowledge_context"]
         if not knowledge_context:
@@ -33,16 +70,17 @@ async def run_pipeline(
             )
 
         # Stage 2: Author
-        # Drafts tweet content based on knowledge context
+        # Drafts tweet content based on knowledge context, redrafting
+        # near-duplicates of the user's earlier posts
+        post_index = await get_post_index(session, user_id) if settings.dedup_enabled else None
         author_result = await run_author(
-            session=session,
-            user_id=user_id,
             knowledge_context=knowledge_context,
             prompt=prompt,
             language=language,
             multiple=multiple,
+            post_index=post_index,
         )
-        pipeline_log["author"] = author_result["log"]
+        stage_done("author", author_result["log"])
 
         # Stage 3: Editor
         # Refines the draft for engagement, selects best image
@@ -51,13 +89,18 @@ async def run_pipeline(
             suggestions=author_result["suggestions"],
             available_images=db_result["available_images"],
             multiple=multiple,
+            on_token=(lambda text: on_event("token", {"text": text})) if on_event else None,
         )
-        pipeline_log["editor"] = editor_result["log"]
+        stage_done("editor", editor_result["log"])
 
+    # Redrafting may not have shaken off a repeat; flag it rather than hide it
+    final_content = editor_result["final_content"]
+    duplicate_of = post_index.find_text(final_content) if post_index is not None else None
     return GenerateResponse(
         success=True,
-        content=editor_result["final_content"],
+        content=final_content,
         suggestions=editor_result.get("suggestions", []),
         media_asset_id=editor_result.get("media_asset_id"),
+        duplicate_of=duplicate_of,
         pipeline_log=pipeline_log,
     )
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timezone
+
+from ..config import settings
+from ..database import async_session
+from ..models import KnowledgeRefreshJob
+from ..tools.refresh_queue import claim_next_job, retry_at, wait_for_work
+from .source_refresh import refresh_single_flight
+
+
+class RefreshWorker:
+    """
+    Background consumer of the KnowledgeRefreshJob queue.
+
+    Runs ``refresh_worker_concurrency`` loops in this process; several
+    processes may run workers against the same queue. A failed job is
+    retried after an exponential backoff, up to ``refresh_max_attempts``.
+    """
+
+    def __init__(self, concurrency: int, poll_seconds: float):
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = poll_seconds
+        self._tasks: list[asyncio.Task] = []
+        self.jobs_done = 0
+        self.jobs_failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with async_session() as session:
+                    job = await claim_next_job(session)
+                if job is None:
+                    await wait_for_work(self.poll_seconds)
+                    continue
+                await self._process(job.id, job.sourceId)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Database hiccup while claiming; back off and retry
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _process(self, job_id: str, source_id: str) -> None:
+        error: str | None = None
+        try:
+            # Lock busy or source already fresh (None) both mean another
+            # request or worker has it covered, so the job is done.
+            await refresh_single_flight(source_id, wait=False)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+
+        async with async_session() as session:
+            job = await session.get(KnowledgeRefreshJob, job_id)
+            if job is None:
+                return
+            now = datetime.now(timezone.utc)
+            if error is None:
+                job.status = "done"
+                job.error = None
+                job.finishedAt = now
+                self.jobs_done += 1
+            elif job.attempts >= settings.refresh_max_attempts:
+                job.status = "failed"
+                job.error = error
+                job.finishedAt = now
+                self.jobs_failed += 1
+            else:
+                job.status = "pending"
+                job.error = error
+                job.availableAt = retry_at(job.attempts)
+            job.updatedAt = now
+            await session.commit()
+
+
+refresh_worker = RefreshWorker(
+    concurrency=settings.refresh_worker_concurrency,
+    poll_seconds=settings.refresh_poll_seconds,
+)
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session, engine
+from ..ids import generate_cuid
+from ..models import KnowledgeChunk, KnowledgePage, KnowledgeSource
+from ..tools.image_harvester import harvest_images
+from ..tools.knowledge_reader import get_page_cache, invalidate_knowledge_cache, stale_clause
+from ..tools.retrieval import content_hash, index_chunks
+from ..tools.scraper import scrape_website
+
+# Postgres SQLSTATE for lock_not_available (lock_timeout expired)
+LOCK_NOT_AVAILABLE = "55P03"
+
+# In-process refreshes keyed by source id, so concurrent requests in this
+# worker share one crawl instead of starting their own. Each entry records
+# whether the refresh waits for the cross-process lock.
+_inflight: dict[str, tuple[asyncio.Task, bool]] = {}
+
+
+def _save_pages(
+    session: AsyncSession,
+    source: KnowledgeSource,
+    pages: list[dict],
+    rows: dict[str, KnowledgePage],
+) -> None:
+    """Upsert the crawl cache rows for the pages seen in this crawl."""
+    now = datetime.now(timezone.utc)
+    for page in pages:
+        row = rows.get(page["url"])
+        if row is None:
+            row = KnowledgePage(id=generate_cuid(), url=page["url"], sourceId=source.id)
+            session.add(row)
+        row.title = page["title"]
+        row.content = page["content"]
+        row.images = json.dumps(page["images"])
+        row.links = json.dumps(page["internal_links"])
+        row.etag = page["etag"]
+        row.lastModified = page["last_modified"]
+        row.contentHash = page["content_hash"]
+        row.fetchedAt = now
+        row.updatedAt = now
+
+
+async def _reindex_chunks(session: AsyncSession, source: KnowledgeSource) -> None:
+    """Rebuild the source's retrieval chunks if its content changed."""
+    digest = content_hash(source.content)
+    current = await session.execute(
+        select(KnowledgeChunk.contentHash).where(KnowledgeChunk.sourceId == source.id).limit(1)
+    )
+    if current.scalar() == digest:
+        return
+
+    await session.execute(delete(KnowledgeChunk).where(KnowledgeChunk.sourceId == source.id))
+    rows = [
+        {
+            "id": generate_cuid(),
+            "position": entry["position"],
+            "content": entry["content"],
+            "terms": json.dumps(entry["terms"], ensure_ascii=False),
+            "length": entry["length"],
+            "contentHash": digest,
+            "sourceId": source.id,
+        }
+        for entry in index_chunks(source.content, settings.knowledge_chunk_chars)
+    ]
+    if rows:
+        await session.execute(insert(KnowledgeChunk), rows)
+
+
+async def refresh_source(session: AsyncSession, source: KnowledgeSource) -> str:
+    """
+    Re-crawl one knowledge source, update its content and crawl cache, and
+    stage any new product images. Returns a log line; the caller commits.
+    The session's read transaction is ended before crawling, so it holds no
+    connection while pages are fetched.
+    """
+    page_cache, page_rows = await get_page_cache(session, source.id)
+    await session.commit()
+    result = await scrape_website(source.url, page_cache=page_cache)
+    if not result["success"]:
+        return f"Failed to refresh '{source.name}'"
+
+    _save_pages(session, source, result["pages"], page_rows)
+    source.content = result["content"]
+    source.pagesScraped = result["pages_scraped"]
+    source.lastScraped = datetime.now(timezone.utc)
+    source.updatedAt = datetime.now(timezone.utc)
+    await _reindex_chunks(session, source)
+
+    # Download product images found during scraping
+    images_downloaded = await harvest_images(session, source.userId, result.get("images", []))
+
+    return (
+        f"Refreshed '{source.name}': {result['pages_scraped']} pages "
+        f"({result['pages_unchanged']} unchanged), "
+        f"{images_downloaded} images downloaded"
+    )
+
+
+def _lock_key(source_id: str) -> int:
+    """Stable signed 64-bit advisory lock key for a source id."""
+    return int.from_bytes(hashlib.sha256(source_id.encode()).digest()[:8], "big", signed=True)
+
+
+def _sqlstate(error: DBAPIError) -> str | None:
+    return getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+
+
+@asynccontextmanager
+async def _source_lock(source_id: str, wait: bool):
+    """
+    Hold a session-level Postgres advisory lock on the source for the
+    duration of the block; yields whether it was acquired. The lock lives on
+    its own connection outside any transaction, so the crawl does not keep
+    a transaction open. Other databases have no cross-process lock, so the
+    in-process single-flight map is the only coordination there.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+
+    key = _lock_key(source_id)
+    async with engine.connect() as conn:
+        if wait:
+            timeout_ms = max(1, int(settings.refresh_lock_wait_seconds * 1000))
+            try:
+                await conn.execute(text(f"SET LOCAL lock_timeout = {timeout_ms}"))
+                await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+                locked = True
+            except DBAPIError as e:
+                if _sqlstate(e) != LOCK_NOT_AVAILABLE:
+                    raise
+                # lock_timeout expired: another worker is still crawling this source
+                locked = False
+                await conn.rollback()
+        else:
+            result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+            locked = bool(result.scalar())
+        # The lock is session-level and survives the end of the transaction
+        await conn.commit()
+
+        if not locked:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            try:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                await conn.commit()
+            except BaseException:
+                # Never return a connection that may still hold the lock to the pool
+                await conn.invalidate()
+                raise
+
+
+async def _refresh_exclusive(source_id: str, wait: bool) -> str | None:
+    async with _source_lock(source_id, wait) as locked:
+        if not locked:
+            return None
+
+        async with async_session() as session:
+            # Re-check under the lock: whoever held it may have just refreshed the source
+            result = await session.execute(
+                select(KnowledgeSource).where(KnowledgeSource.id == source_id, stale_clause())
+            )
+            source = result.scalar_one_or_none()
+            if source is None:
+                await session.rollback()
+                return None
+
+            message = await refresh_source(session, source)
+            await session.commit()
+    if source.userId:
+        invalidate_knowledge_cache(source.userId)
+    return message
+
+
+def _forget(source_id: str, task: asyncio.Task) -> None:
+    entry = _inflight.get(source_id)
+    if entry is not None and entry[0] is task:
+        del _inflight[source_id]
+    if not task.cancelled():
+        # Mark the exception retrieved in case every waiter was cancelled
+        task.exception()
+
+
+def _start_refresh(source_id: str, wait: bool) -> asyncio.Task:
+    task = asyncio.create_task(_refresh_exclusive(source_id, wait))
+    _inflight[source_id] = (task, wait)
+    task.add_done_callback(lambda t: _forget(source_id, t))
+    return task
+
+
+async def refresh_single_flight(source_id: str, wait: bool = True) -> str | None:
+    """
+    Refresh a stale source with at most one crawl per source at a time.
+
+    Callers in this process share the in-flight refresh; across processes a
+    Postgres advisory lock serialises them and the loser re-checks staleness
+    once it gets the lock. Runs in its own session and commits.
+
+    Returns the refresh log line, or None when no refresh was done here:
+    the source was already fresh, or the lock was busy (``wait=False``) or
+    not acquired within ``refresh_lock_wait_seconds``. Callers then use the
+    source's current content. A waiting caller that joins a non-waiting
+    refresh which found the lock busy goes on to wait for the lock itself.
+    """
+    entry = _inflight.get(source_id)
+    if entry is not None and not entry[0].done():
+        task, task_waits = entry
+        if not wait:
+            return None
+        # Shield so a cancelled caller does not abort the crawl other callers await
+        message = await asyncio.shield(task)
+        if message is not None or task_waits:
+            return message
+        entry = _inflight.get(source_id)
+        if entry is not None and not entry[0].done():
+            return await asyncio.shield(entry[0])
+    return await asyncio.shield(_start_refresh(source_id, wait))
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from .config import settings
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_store: "BlobStore | None" = None
+
+
+def blob_key(data: bytes) -> str:
+    """Content address of a blob: the hex SHA-256 of its bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_valid_key(key: str) -> bool:
+    return bool(_KEY_RE.match(key))
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed byte storage; identical bytes always map to the same key.
+
+    The content type passed to ``put`` is attached where the backend keeps
+    object metadata (S3); ``MediaAsset.mimeType`` remains the record of it.
+    """
+
+    async def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        key = blob_key(data)
+        if not await self.exists(key):
+            await self._write(key, data, content_type)
+        return key
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def _write(self, key: str, data: bytes, content_type: str) -> None: ...
+
+
+class LocalBlobStore(BlobStore):
+    """Stores blobs under ``root/ab/cd/<key>``; writes are atomic renames."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        if not is_valid_key(key):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return self.root / key[:2] / key[2:4] / key
+
+    async def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).exists)
+
+    async def _write(self, key: str, data: bytes, content_type: str) -> None:
+        path = self._path(key)
+
+        def write() -> None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+        await asyncio.to_thread(write)
+
+
+class S3BlobStore(BlobStore):
+    """
+    Stores blobs in an S3-compatible bucket (AWS S3, R2, MinIO, ...).
+
+    Set ``media_s3_endpoint_url`` to point at a non-AWS endpoint such as a
+    local MinIO container. Credentials come from the standard AWS environment.
+    Requires the ``s3`` extra (boto3).
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None, region: str | None = None):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def _object_key(self, key: str) -> str:
+        if not is_valid_key(key):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return f"{self.prefix}{key}"
+
+    async def get(self, key: str) -> bytes | None:
+        def read() -> bytes | None:
+            try:
+                obj = self._client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+            except self._client.exceptions.NoSuchKey:
+                return None
+            return obj["Body"].read()
+
+        return await asyncio.to_thread(read)
+
+    async def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        def head() -> bool:
+            try:
+                self._client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    return False
+                raise
+            return True
+
+        return await asyncio.to_thread(head)
+
+    async def _write(self, key: str, data: bytes, content_type: str) -> None:
+        await asyncio.to_thread(
+            self._client.put_object,
+            Bucket=self.bucket,
+            Key=self._object_key(key),
+            Body=data,
+            ContentType=content_type,
+        )
+
+
+def get_blob_store() -> BlobStore | None:
+    """
+    Return the configured blob store, or None when media bytes are kept
+    inline in ``MediaAsset.data`` (``media_blob_backend = "database"``).
+    """
+    global _store
+    backend = settings.media_blob_backend
+    if backend == "database":
+        return None
+    if _store is None:
+        if backend == "local":
+            _store = LocalBlobStore(settings.media_blob_dir)
+        elif backend == "s3":
+            _store = S3BlobStore(
+                bucket=settings.media_s3_bucket,
+                prefix=settings.media_s3_prefix,
+                endpoint_url=settings.media_s3_endpoint_url,
+                region=settings.media_s3_region,
+            )
+        else:
+            raise ValueError(f"Unknown media_blob_backend: {backend!r}")
+    return _store
@@ -6,6 +6,111 @@ class Settings(BaseSettings):
     openai_api_key: str
     agent_api_secret: str = ""
 
+    # Shared outbound HTTP client
+    http_http2: bool = True
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_per_host_connections: int = 6
+    http_dns_ttl_seconds: float = 300.0
+
+    # Crawler
+    crawl_concurrency: int = 6
+    crawl_per_host_concurrency: int = 4
+    crawl_per_host_delay: float = 0.05
+    crawl_deadline_seconds: float = 45.0
+
+    # HTML extraction: "auto" picks threads on free-threaded builds, else processes.
+    # "inline" parses on the event loop (the pre-pool behaviour, useful for comparison).
+    extract_executor: str = "auto"
+    extract_workers: int = 2
+    extract_max_chars: int = 2_000_000
+    extract_timeout_seconds: float = 10.0
+    # "bs4" (reference) or "lxml" (single-pass, needs the `fast` extra)
+    html_extractor: str = "bs4"
+
+    # Image harvesting
+    image_download_concurrency: int = 4
+    # Skip images within this many bits (of 64) of an existing asset's dHash
+    image_phash_max_distance: int = 6
+
+    # Media bytes: "database" keeps them inline in MediaAsset.data,
+    # "local" / "s3" write content-addressed blobs and store only the key.
+    media_blob_backend: str = "database"
+    media_blob_dir: str = "/data/media-blobs"
+    media_s3_bucket: str = ""
+    media_s3_prefix: str = "media/"
+    media_s3_endpoint_url: str | None = None
+    media_s3_region: str | None = None
+
+    # Background knowledge refresh (stale-while-revalidate)
+    refresh_worker_enabled: bool = True
+    refresh_worker_concurrency: int = 2
+    refresh_poll_seconds: float = 5.0
+    refresh_job_timeout_seconds: float = 300.0
+    refresh_max_attempts: int = 3
+    # A failed refresh is retried after this delay, doubled on every further attempt
+    refresh_retry_backoff_seconds: float = 60.0
+    # How long an inline refresh waits on another worker's lock before serving current content
+    refresh_lock_wait_seconds: float = 60.0
+
+    # Asynchronous batch jobs
+    batch_worker_enabled: bool = True
+    batch_worker_concurrency: int = 1
+    batch_poll_seconds: float = 5.0
+    batch_job_timeout_seconds: float = 120.0
+    batch_job_max_attempts: int = 3
+    # A failed job is retried after this delay, doubled on every further attempt
+    batch_retry_backoff_seconds: float = 30.0
+
+    # LLM clients and response cache
+    openai_base_url: str | None = None
+    llm_max_connections: int = 50
+    llm_timeout_seconds: float = 60.0
+    # Rate governor: OpenAI quota for this process, and the share batch work may use
+    llm_rpm_limit: int = 500
+    llm_tpm_limit: int = 30000
+    llm_batch_share: float = 0.7
+    llm_max_retries: int = 4
+    llm_backoff_base_seconds: float = 1.0
+    llm_backoff_max_seconds: float = 60.0
+    llm_cache_enabled: bool = True
+    # Only stages whose output should repeat for identical input; the author is creative
+    llm_cache_stages: list[str] = ["image_select", "edit"]
+    llm_cache_max_entries: int = 2000
+    llm_cache_max_bytes: int = 16 * 1024 * 1024
+    llm_cache_ttl_seconds: float = 3600.0
+
+    # Generation
+    editor_concurrency: int = 4
+    batch_concurrency: int = 5
+    # Image choice: "llm" asks the model, "local" ranks alt text and URL words with BM25,
+    # "hybrid" ranks locally and asks the model only when no image clearly wins
+    image_select_mode: str = "hybrid"
+    # In hybrid mode the local winner must score this many times the runner-up
+    image_select_margin: float = 1.5
+
+    # Near-duplicate posts: drafts whose 64-bit SimHash is within this many bits
+    # of an earlier post are redrafted (up to dedup_max_redrafts) or rejected
+    dedup_enabled: bool = True
+    dedup_max_distance: int = 7
+    dedup_max_redrafts: int = 1
+    dedup_cache_max_entries: int = 1000
+
+    # Prompt budget: tokens are counted with the model's tokenizer ("tiktoken"), or
+    # estimated ("estimate": CJK characters 1:1, other text ~4 chars per token)
+    prompt_tokenizer: str = "tiktoken"
+    # Input tokens for the author call (system prompt included); knowledge is trimmed to fit
+    author_prompt_tokens: int = 2500
+
+    # Knowledge retrieval
+    knowledge_chunk_chars: int = 800
+    knowledge_context_tokens: int = 1500
+    knowledge_top_k: int = 8
+    context_cache_max_entries: int = 1000
+    context_cache_max_bytes: int = 64 * 1024 * 1024
+    context_cache_ttl_seconds: float = 600.0
+
     @property
     def async_database_url(self) -> str:
         url = self.database_url
@@ -0,0 +1,239 @@
+import asyncio
+import ipaddress
+import socket
+import time
+from contextlib import contextmanager
+
+import httpcore
+import httpx
+
+from .config import settings
+
+USER_AGENT = "Mozilla/5.0 (compatible; XPostBot/1.0)"
+
+_client: httpx.AsyncClient | None = None
+
+# httpcore errors as the httpx errors callers catch, most specific first
+_CORE_ERRORS: tuple[tuple[type[Exception], type[httpx.HTTPError]], ...] = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+class _CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """Wraps httpcore's network backend with a TTL cache for getaddrinfo results."""
+
+    def __init__(self, inner: httpcore.AsyncNetworkBackend, ttl: float):
+        self._inner = inner
+        self._ttl = ttl
+        self._cache: dict[tuple[str, int], tuple[float, list[str]]] = {}
+
+    async def _resolve(self, host: str, port: int) -> list[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        key = (host, port)
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[key] = (time.monotonic() + self._ttl, addresses)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        # TLS still uses the original hostname for SNI; httpcore passes it to start_tls.
+        addresses = await self._resolve(host, port)
+        last_error: Exception | None = None
+        for address in addresses:
+            try:
+                return await self._inner.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        self._cache.pop((host, port), None)
+        raise last_error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._inner.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._inner.sleep(seconds)
+
+
+@contextmanager
+def _mapped_errors():
+    try:
+        yield
+    except Exception as e:
+        for core_error, httpx_error in _CORE_ERRORS:
+            if isinstance(e, core_error):
+                raise httpx_error(str(e)) from e
+        raise
+
+
+class _CoreStream(httpx.AsyncByteStream):
+    def __init__(self, inner):
+        self._inner = inner
+
+    async def __aiter__(self):
+        with _mapped_errors():
+            async for chunk in self._inner:
+                yield chunk
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class _PoolTransport(httpx.AsyncBaseTransport):
+    """httpx transport over an httpcore pool built here, so its network backend can be chosen."""
+
+    def __init__(self, pool: httpcore.AsyncConnectionPool):
+        self._pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _mapped_errors():
+            response = await self._pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_CoreStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, inner: httpx.AsyncByteStream, release):
+        self._inner = inner
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._inner:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._inner.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Caps in-flight requests per host; a slot is held until the response is
+    closed. A host's semaphore is dropped once nothing holds or waits on it.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, per_host: int):
+        self._inner = inner
+        self._per_host = max(1, per_host)
+        # host -> (semaphore, requests holding or waiting for it)
+        self._slots: dict[str, list] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        entry = self._slots.get(host)
+        if entry is None:
+            entry = self._slots[host] = [asyncio.Semaphore(self._per_host), 0]
+        entry[1] += 1
+        try:
+            await entry[0].acquire()
+        except BaseException:
+            self._leave(host, entry)
+            raise
+
+        def release() -> None:
+            entry[0].release()
+            self._leave(host, entry)
+
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def _leave(self, host: str, entry: list) -> None:
+        entry[1] -= 1
+        if entry[1] == 0 and self._slots.get(host) is entry:
+            del self._slots[host]
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def create_http_client() -> httpx.AsyncClient:
+    pool = httpcore.AsyncConnectionPool(
+        ssl_context=httpx.create_ssl_context(),
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+        http2=settings.http_http2,
+        network_backend=_CachingDNSBackend(httpcore.AnyIOBackend(), settings.http_dns_ttl_seconds),
+    )
+    transport = _PoolTransport(pool)
+
+    return httpx.AsyncClient(
+        transport=_HostLimitedTransport(transport, settings.http_per_host_connections),
+        headers={"User-Agent": USER_AGENT},
+        timeout=15,
+        follow_redirects=True,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the application-wide client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
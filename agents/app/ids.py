@@ -0,0 +1,10 @@
+import random
+import string
+import time
+
+
+def generate_cuid() -> str:
+    ts = int(time.time() * 1000)
+    chars = string.ascii_lowercase + string.digits
+    random_part = "".join(random.choices(chars, k=16))
+    return f"c{ts:x}{random_part}"
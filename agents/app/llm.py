@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import json
+from collections.abc import Callable
+
+import httpx
+import openai
+from langchain_core.messages import BaseMessage
+from langchain_openai import ChatOpenAI
+
+from .cache import LRUCache
+from .config import settings
+from .metrics import record_llm_call, timed
+from .prompt_budget import count_tokens
+from .rate_governor import current_lane, governor
+
+# Errors worth retrying; the SDK's own retries are disabled so the governor owns backoff
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+# A 429 with this code means the account is out of credit; waiting will not help
+QUOTA_EXHAUSTED = "insufficient_quota"
+
+_http_client: httpx.AsyncClient | None = None
+_models: dict[tuple, ChatOpenAI] = {}
+
+_response_cache = LRUCache(
+    max_entries=settings.llm_cache_max_entries,
+    max_bytes=settings.llm_cache_max_bytes,
+    ttl=settings.llm_cache_ttl_seconds,
+)
+
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """Connection pool shared by every chat model, so API connections are reused."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=settings.http_http2,
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(settings.llm_timeout_seconds, connect=10.0),
+        )
+    return _http_client
+
+
+def get_chat_model(model: str = "gpt-4o", temperature: float = 0.7, max_tokens: int | None = None) -> ChatOpenAI:
+    """Return the shared ChatOpenAI instance for these parameters, creating it on first use."""
+    key = (model, temperature, max_tokens)
+    llm = _models.get(key)
+    if llm is None:
+        llm = ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            http_async_client=get_llm_http_client(),
+            max_retries=0,
+            stream_usage=True,
+        )
+        _models[key] = llm
+    return llm
+
+
+async def close_llm_clients() -> None:
+    global _http_client
+    _models.clear()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _cache_key(llm: ChatOpenAI, messages: list[BaseMessage]) -> str:
+    payload = json.dumps(
+        {
+            "model": llm.model_name,
+            "temperature": llm.temperature,
+            "max_tokens": llm.max_tokens,
+            "messages": [[m.type, m.content] for m in messages],
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cacheable(stage: str) -> bool:
+    return settings.llm_cache_enabled and stage in settings.llm_cache_stages
+
+
+async def complete(
+    llm: ChatOpenAI,
+    messages: list[BaseMessage],
+    stage: str,
+    on_token: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Run one chat completion and return its text.
+
+    For stages listed in ``llm_cache_stages`` an identical request (same
+    model, parameters and messages) is answered from an in-process LRU/TTL
+    cache. With ``on_token`` the response is streamed; a cached response is
+    delivered as a single token. Calls are timed and their token usage
+    counted under ``stage``.
+    """
+    key = _cache_key(llm, messages) if _cacheable(stage) else None
+    if key is not None:
+        cached = _response_cache.get(key)
+        if cached is not None:
+            record_llm_call(stage, "cached")
+            if on_token is not None:
+                on_token(cached)
+            return cached
+
+    with timed(f"llm.{stage}", model=llm.model_name):
+        try:
+            text, usage = await _call_governed(llm, messages, on_token)
+        except Exception:
+            record_llm_call(stage, "error")
+            raise
+        record_llm_call(stage, "ok", usage)
+
+    if key is not None:
+        _response_cache.set(key, text, size=len(text) * 2 + 200)
+    return text
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+async def _call_governed(
+    llm: ChatOpenAI,
+    messages: list[BaseMessage],
+    on_token: Callable[[str], None] | None,
+) -> tuple[str, dict | None]:
+    """
+    Make the API call through the rate governor, retrying rate limits and
+    transient errors with backoff. A stream is not retried once tokens have
+    been emitted. A 429 for an exhausted quota is raised at once. Returns
+    the text and the reported usage, if any.
+    """
+    estimate = sum(count_tokens(str(m.content)) for m in messages) + (llm.max_tokens or 0)
+    lane = current_lane()
+    attempt = 0
+    while True:
+        await governor.acquire(estimate, lane)
+        emitted = False
+        usage: dict | None = None
+        try:
+            if on_token is None:
+                response = await llm.ainvoke(messages)
+                text = response.content
+                usage = response.usage_metadata
+            else:
+                parts: list[str] = []
+                async for chunk in llm.astream(messages):
+                    if chunk.usage_metadata:
+                        usage = chunk.usage_metadata
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        emitted = True
+                        on_token(chunk.content)
+                text = "".join(parts)
+        except RETRYABLE_ERRORS as e:
+            rate_limited = isinstance(e, openai.RateLimitError)
+            if rate_limited:
+                # Rejected before it was served: return the request slot too
+                governor.refund(estimate)
+            else:
+                governor.settle(estimate, 0)
+            if rate_limited and getattr(e, "code", None) == QUOTA_EXHAUSTED:
+                raise
+            if emitted or attempt >= settings.llm_max_retries:
+                raise
+            retry_after = _retry_after(e)
+            delay = governor.backoff(attempt, retry_after)
+            if rate_limited:
+                # Everyone waits, not just this caller
+                governor.pause(delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        governor.settle(estimate, usage["total_tokens"] if usage else None)
+        return text, usage
+
+
+def llm_cache_stats() -> dict:
+    return {
+        "enabled": settings.llm_cache_enabled,
+        "stages": settings.llm_cache_stages,
+        **_response_cache.stats(),
+    }
@@ -0,0 +1,59 @@
+import asyncio
+from collections import deque
+
+
+class EventLoopMonitor:
+    """
+    Measures event-loop blocking by timing how late a periodic sleep wakes up.
+
+    Any lag beyond ``threshold`` is counted as time the loop was blocked by
+    synchronous work (e.g. HTML parsing) and could not serve other requests.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.01, window: int = 1200):
+        self.interval = interval
+        self.threshold = threshold
+        self._lags: deque[float] = deque(maxlen=window)
+        self._task: asyncio.Task | None = None
+        self.blocked_seconds_total = 0.0
+        self.blocked_events_total = 0
+        self.max_lag = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked_seconds_total += lag
+                self.blocked_events_total += 1
+
+    def snapshot(self) -> dict:
+        lags = sorted(self._lags)
+        p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+        return {
+            "blocked_seconds_total": round(self.blocked_seconds_total, 4),
+            "blocked_events_total": self.blocked_events_total,
+            "max_lag_seconds": round(self.max_lag, 4),
+            "recent_p99_lag_seconds": round(p99, 4),
+            "recent_mean_lag_seconds": round(sum(lags) / len(lags), 4) if lags else 0.0,
+        }
+
+
+loop_monitor = EventLoopMonitor()
@@ -1,9 +1,44 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from .routers import generate, batch, health
+from .agents.batch_worker import batch_worker
+from .agents.refresh_worker import refresh_worker
+from .config import settings
+from .http_client import close_http_client, get_http_client
+from .llm import close_llm_clients, get_llm_http_client
+from .loop_monitor import loop_monitor
+from .prompt_budget import start_tokenizer_load
+from .routers import generate, batch, health, media, metrics, refresh, stats
+from .tools.extract_pool import shutdown_extract_pool, start_extract_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor.start()
+    start_extract_pool()
+    get_http_client()
+    get_llm_http_client()
+    start_tokenizer_load()
+    if settings.refresh_worker_enabled:
+        refresh_worker.start()
+    if settings.batch_worker_enabled:
+        batch_worker.start()
+    yield
+    await batch_worker.stop()
+    await refresh_worker.stop()
+    await close_llm_clients()
+    await close_http_client()
+    shutdown_extract_pool()
+    await loop_monitor.stop()
+
 
-app = FastAPI(title="X Post Agents", version="0.1.0")
+app = FastAPI(title="X Post Agents", version="0.1.0", lifespan=lifespan)
 
 app.include_router(health.router)
 app.include_router(generate.router)
 app.include_router(batch.router)
+app.include_router(media.router)
+app.include_router(refresh.router)
+app.include_router(stats.router)
+app.include_router(metrics.router)
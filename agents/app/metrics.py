@@ -0,0 +1,165 @@
+import contextvars
+import functools
+import time
+from collections.abc import Callable
+from contextlib import contextmanager, nullcontext
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+try:
+    from opentelemetry import trace
+except ImportError:  # spans need the `otel` extra
+    trace = None
+
+_tracer = trace.get_tracer("x-post-agents") if trace is not None else None
+
+STAGE_SECONDS = Histogram(
+    "xpost_stage_duration_seconds",
+    "Wall time of pipeline stages, crawls and LLM calls",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+LLM_REQUESTS = Counter(
+    "xpost_llm_requests_total",
+    "LLM completions by stage and outcome (ok, cached, error)",
+    ["stage", "outcome"],
+)
+LLM_TOKENS = Counter(
+    "xpost_llm_tokens_total",
+    "LLM tokens reported by the API, by stage and kind (prompt, completion)",
+    ["stage", "kind"],
+)
+IMAGE_SELECTIONS = Counter(
+    "xpost_image_selections_total",
+    "Editor image choices by method (local, llm)",
+    ["method"],
+)
+PROMPT_TOKENS = Histogram(
+    "xpost_prompt_tokens",
+    "Packed prompt size in tokens, by stage",
+    ["stage"],
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000),
+)
+
+# /stats keys that only ever grow (besides ``*_total``), exported as counters
+COUNTER_STATS = frozenset({"hits", "misses", "evictions", "pages", "timeouts", "errors", "truncated"})
+
+# Per-request accumulator, set by collect_timings(). Tasks spawned inside
+# share the same dict, so concurrent stages add to it too.
+_timings: contextvars.ContextVar[dict | None] = contextvars.ContextVar("timings", default=None)
+
+
+@contextmanager
+def collect_timings():
+    """Gather the timings and token counts recorded in this context into a dict."""
+    timings: dict = {"stages_ms": {}, "tokens": {}}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextmanager
+def timed(stage: str, **attributes):
+    """
+    Time the enclosed block with a monotonic clock into the stage histogram
+    (and the current collect_timings() dict), inside an OpenTelemetry span
+    when the API is installed. Repeated or concurrent stages are summed in
+    the per-request timings.
+    """
+    span = (
+        _tracer.start_as_current_span(f"xpost.{stage}", attributes=attributes)
+        if _tracer is not None
+        else nullcontext()
+    )
+    started = time.perf_counter()
+    with span:
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            STAGE_SECONDS.labels(stage).observe(elapsed)
+            timings = _timings.get()
+            if timings is not None:
+                stages = timings["stages_ms"]
+                stages[stage] = round(stages.get(stage, 0.0) + elapsed * 1000, 1)
+
+
+def instrument(stage: str):
+    """Decorator form of ``timed`` for coroutine functions."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with timed(stage):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def record_llm_call(stage: str, outcome: str, usage: dict | None = None) -> None:
+    """Count one LLM completion and the tokens it used (LangChain ``usage_metadata``)."""
+    LLM_REQUESTS.labels(stage, outcome).inc()
+    if not usage:
+        return
+    prompt = usage.get("input_tokens", 0)
+    completion = usage.get("output_tokens", 0)
+    LLM_TOKENS.labels(stage, "prompt").inc(prompt)
+    LLM_TOKENS.labels(stage, "completion").inc(completion)
+
+    if trace is not None:
+        span = trace.get_current_span()
+        span.set_attribute("llm.prompt_tokens", prompt)
+        span.set_attribute("llm.completion_tokens", completion)
+
+    timings = _timings.get()
+    if timings is not None:
+        counts = timings["tokens"].setdefault(stage, {"prompt": 0, "completion": 0})
+        counts["prompt"] += prompt
+        counts["completion"] += completion
+
+
+class StatsCollector:
+    """
+    Exposes a ``/stats``-style snapshot as metrics: ``{section: {key: n}}``
+    becomes ``xpost_<section>_<key>``, and a nested ``{name: {key: n}}``
+    mapping (e.g. the governor's ``lanes``) becomes a label. Cumulative keys
+    (``*_total`` and ``COUNTER_STATS``) are counters, the rest gauges.
+    """
+
+    def __init__(self, source: Callable[[], dict]):
+        self._source = source
+
+    def describe(self):
+        # Without this the registry calls collect() when registering
+        return []
+
+    def collect(self):
+        for section, values in self._source().items():
+            for key, value in values.items():
+                name = f"xpost_{section}_{key}"
+                if _is_number(value):
+                    family = _family(key)(name, f"{section} {key}", labels=[])
+                    family.add_metric([], value)
+                    yield family
+                elif isinstance(value, dict) and value and all(isinstance(v, dict) for v in value.values()):
+                    label = key.removesuffix("s")
+                    fields = {f for v in value.values() for f, n in v.items() if _is_number(n)}
+                    for field in sorted(fields):
+                        family = _family(field)(f"{name}_{field}", f"{section} {key} {field}", labels=[label])
+                        for member, v in value.items():
+                            if _is_number(v.get(field)):
+                                family.add_metric([member], v[field])
+                        yield family
+
+
+def _family(key: str) -> type:
+    return CounterMetricFamily if key.endswith("_total") or key in COUNTER_STATS else GaugeMetricFamily
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
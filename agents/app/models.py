@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Integer, LargeBinary, String, func
+from sqlalchemy import BigInteger, Boolean, DateTime, Integer, LargeBinary, String, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -28,6 +28,7 @@ class Post(Base):
     tweetId: Mapped[str | None] = mapped_column(String, nullable=True)
     error: Mapped[str | None] = mapped_column(String, nullable=True)
     mediaAssetId: Mapped[str | None] = mapped_column(String, nullable=True)
+    simhash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     createdAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updatedAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     userId: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -48,16 +49,95 @@ class KnowledgeSource(Base):
     userId: Mapped[str | None] = mapped_column(String, nullable=True)
 
 
+class KnowledgePage(Base):
+    __tablename__ = "KnowledgePage"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    url: Mapped[str] = mapped_column(String)
+    title: Mapped[str] = mapped_column(String, default="")
+    content: Mapped[str] = mapped_column(String, default="")
+    images: Mapped[str | None] = mapped_column(String, nullable=True)  # JSON
+    links: Mapped[str | None] = mapped_column(String, nullable=True)  # JSON
+    etag: Mapped[str | None] = mapped_column(String, nullable=True)
+    lastModified: Mapped[str | None] = mapped_column(String, nullable=True)
+    contentHash: Mapped[str | None] = mapped_column(String, nullable=True)
+    fetchedAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updatedAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    sourceId: Mapped[str] = mapped_column(String)
+
+
+class KnowledgeChunk(Base):
+    __tablename__ = "KnowledgeChunk"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    position: Mapped[int] = mapped_column(Integer)
+    content: Mapped[str] = mapped_column(String)
+    terms: Mapped[str] = mapped_column(String)  # JSON
+    length: Mapped[int] = mapped_column(Integer)
+    contentHash: Mapped[str] = mapped_column(String)
+    createdAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    sourceId: Mapped[str] = mapped_column(String)
+
+
+class KnowledgeRefreshJob(Base):
+    __tablename__ = "KnowledgeRefreshJob"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    status: Mapped[str] = mapped_column(String, default="pending")  # pending | running | done | failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    createdAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    startedAt: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finishedAt: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    availableAt: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updatedAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    sourceId: Mapped[str] = mapped_column(String)
+    userId: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+class BatchJob(Base):
+    __tablename__ = "BatchJob"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    status: Mapped[str] = mapped_column(String, default="pending")  # pending | running | done | partial | failed
+    count: Mapped[int] = mapped_column(Integer)
+    scheduleTimes: Mapped[str | None] = mapped_column(String, nullable=True)  # JSON
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    createdAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    startedAt: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finishedAt: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    availableAt: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updatedAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    userId: Mapped[str] = mapped_column(String)
+
+
+class BatchJobItem(Base):
+    __tablename__ = "BatchJobItem"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    position: Mapped[int] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String, default="pending")  # pending | done | failed
+    content: Mapped[str | None] = mapped_column(String, nullable=True)
+    postId: Mapped[str | None] = mapped_column(String, nullable=True)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    updatedAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    jobId: Mapped[str] = mapped_column(String)
+
+
 class MediaAsset(Base):
     __tablename__ = "MediaAsset"
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     sourceUrl: Mapped[str] = mapped_column(String)
-    data: Mapped[bytes] = mapped_column(LargeBinary)
+    # Inline bytes (legacy / "database" backend); never loaded unless accessed
+    data: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    blobKey: Mapped[str | None] = mapped_column(String, nullable=True)
     mimeType: Mapped[str] = mapped_column(String, default="image/jpeg")
     width: Mapped[int | None] = mapped_column(Integer, nullable=True)
     height: Mapped[int | None] = mapped_column(Integer, nullable=True)
     altText: Mapped[str | None] = mapped_column(String, nullable=True)
+    phash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     isActive: Mapped[bool] = mapped_column(Boolean, default=True)
     createdAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updatedAt: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -0,0 +1,133 @@
+import asyncio
+import math
+import re
+
+import tiktoken
+
+from .config import settings
+from .metrics import PROMPT_TOKENS
+
+CJK_RUN_RE = re.compile("[\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af]+")
+# Below this many tokens a truncated section is not worth including
+MIN_SECTION_TOKENS = 64
+
+_encoders: dict = {}
+_load_task: asyncio.Task | None = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: one per CJK character, one per ~4 other characters."""
+    cjk = sum(len(run) for run in CJK_RUN_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def load_tokenizer(model: str = "gpt-4o") -> bool:
+    """
+    Load ``model``'s tiktoken encoding. The first load may download its BPE
+    ranks (cached under ``TIKTOKEN_CACHE_DIR``), so call it off the event
+    loop. On failure token counts keep using ``estimate_tokens``.
+    """
+    if settings.prompt_tokenizer != "tiktoken":
+        return False
+    try:
+        _encoders[model] = tiktoken.encoding_for_model(model)
+    except Exception:
+        return False
+    return True
+
+
+def start_tokenizer_load() -> None:
+    """Load the tokenizer in a worker thread; counts use the estimate until it is ready."""
+    global _load_task
+    if _load_task is None:
+        _load_task = asyncio.create_task(asyncio.to_thread(load_tokenizer))
+
+
+def tokenizer_name(model: str = "gpt-4o") -> str:
+    encoder = _encoders.get(model)
+    return encoder.name if encoder is not None else "estimate"
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    encoder = _encoders.get(model)
+    if encoder is None:
+        return estimate_tokens(text)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """Longest prefix of ``text`` within ``max_tokens``, cut back to a line break when one is near."""
+    if max_tokens <= 0:
+        return ""
+    encoder = _encoders.get(model)
+    if encoder is not None:
+        ids = encoder.encode(text, disallowed_special=())
+        if len(ids) <= max_tokens:
+            return text
+        cut = encoder.decode(ids[:max_tokens]).rstrip("\ufffd")
+    else:
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if estimate_tokens(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        cut = text[:low]
+    newline = cut.rfind("\n")
+    if newline > len(cut) // 2:
+        cut = cut[:newline]
+    return cut.rstrip()
+
+
+def pack_prompt(
+    sections: list[tuple[str, str, int]],
+    budget: int,
+    stage: str,
+    model: str = "gpt-4o",
+) -> dict:
+    """
+    Fit ``(name, text, priority)`` sections into ``budget`` tokens.
+
+    Priority 0 sections are always kept. The rest are added in ascending
+    priority while they fit; the first one that does not is truncated to
+    the remaining budget (or dropped if too little is left). Kept sections
+    are joined with newlines in their original order. Returns the text, its
+    token count, per-section counts and what was truncated or dropped.
+    """
+    counts = [count_tokens(text, model) if text else 0 for _, text, _ in sections]
+    kept: dict[int, str] = {i: text for i, (_, text, priority) in enumerate(sections) if priority == 0 and text}
+    used = sum(counts[i] for i in kept)
+    truncated: list[str] = []
+    dropped: list[str] = []
+
+    optional = sorted(
+        (i for i, (_, text, priority) in enumerate(sections) if priority > 0 and text),
+        key=lambda i: sections[i][2],
+    )
+    for i in optional:
+        name, text, _ = sections[i]
+        remaining = budget - used
+        if counts[i] <= remaining:
+            kept[i] = text
+            used += counts[i]
+        elif remaining >= MIN_SECTION_TOKENS:
+            kept[i] = truncate_tokens(text, remaining, model)
+            counts[i] = count_tokens(kept[i], model)
+            used += counts[i]
+            truncated.append(name)
+        else:
+            dropped.append(name)
+
+    text = "\n".join(kept[i] for i in sorted(kept))
+    tokens = count_tokens(text, model)
+    PROMPT_TOKENS.labels(stage).observe(tokens)
+    return {
+        "text": text,
+        "tokens": tokens,
+        "sections": {sections[i][0]: counts[i] for i in sorted(kept)},
+        "truncated": truncated,
+        "dropped": dropped,
+    }
@@ -0,0 +1,192 @@
+import asyncio
+import contextvars
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .config import settings
+
+LANES = ("interactive", "batch")
+
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar("llm_lane", default="interactive")
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+@contextmanager
+def llm_lane(lane: str):
+    """
+    Route LLM calls made in this context (and tasks created from it)
+    through ``lane``. Batch work uses ``"batch"`` so interactive requests
+    keep priority.
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane: {lane!r}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class _Bucket:
+    """Token bucket refilled continuously at ``capacity`` per minute."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def seconds_until(self, amount: float, floor: float) -> float:
+        """Time until ``amount`` can be taken while leaving ``floor`` behind."""
+        missing = min(self.capacity, amount + floor) - self.level
+        return max(0.0, missing * 60.0 / self.capacity)
+
+
+class RateGovernor:
+    """
+    Process-wide limiter for LLM calls: requests and estimated tokens per
+    minute, each a token bucket.
+
+    Callers wait in one FIFO per lane. Interactive waiters are always served
+    first, and batch calls may only use ``batch_share`` of each bucket so
+    some headroom is left for interactive traffic. A 429 pauses every lane
+    for the server's Retry-After.
+    """
+
+    def __init__(self, rpm: int, tpm: int, batch_share: float):
+        self._requests = _Bucket(rpm)
+        self._tokens = _Bucket(tpm)
+        self.batch_share = batch_share
+        self._queues: dict[str, deque] = {lane: deque() for lane in LANES}
+        self._timer: asyncio.TimerHandle | None = None
+        self._paused_until = 0.0
+        self._waits: dict[str, deque[float]] = {lane: deque(maxlen=1000) for lane in LANES}
+        self.wait_seconds_total = {lane: 0.0 for lane in LANES}
+        self.requests_total = {lane: 0 for lane in LANES}
+        self.rate_limited_total = 0
+
+    async def acquire(self, tokens: int, lane: str = "interactive") -> float:
+        """Wait for capacity for one request of ~``tokens`` tokens; returns the wait in seconds."""
+        tokens = min(tokens, int(self._tokens.capacity))
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._queues[lane].append((future, tokens))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A cancelled waiter is skipped by _dispatch; one granted just as
+            # it was cancelled gives its capacity back.
+            if future.done() and not future.cancelled():
+                self.refund(tokens)
+            raise
+        waited = time.monotonic() - started
+        self._waits[lane].append(waited)
+        self.wait_seconds_total[lane] += waited
+        self.requests_total[lane] += 1
+        return waited
+
+    def settle(self, reserved: int, actual: int | None) -> None:
+        """Correct the token bucket once a call's real usage is known."""
+        if actual is not None:
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level + reserved - actual)
+
+    def refund(self, reserved: int) -> None:
+        """Give back a granted call's request slot and token reservation (it was never served)."""
+        self._requests.level = min(self._requests.capacity, self._requests.level + 1)
+        self.settle(reserved, 0)
+        self._dispatch()
+
+    def pause(self, seconds: float) -> None:
+        """Hold every lane for ``seconds`` (e.g. after a 429)."""
+        self.rate_limited_total += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        wait = self._paused_until - now
+
+        if wait <= 0:
+            wait = 0.0
+            for lane in LANES:
+                queue = self._queues[lane]
+                # Keep (1 - batch_share) of each bucket for interactive calls
+                reserve = 1.0 - self.batch_share if lane == "batch" else 0.0
+                while queue:
+                    future, tokens = queue[0]
+                    if future.done():
+                        queue.popleft()
+                        continue
+                    wait = max(
+                        self._requests.seconds_until(1, reserve * self._requests.capacity),
+                        self._tokens.seconds_until(tokens, reserve * self._tokens.capacity),
+                    )
+                    if wait > 0:
+                        break
+                    queue.popleft()
+                    self._requests.level -= 1
+                    self._tokens.level -= tokens
+                    future.set_result(None)
+                if queue:
+                    # Lower lanes wait until this one is drained
+                    break
+
+        if any(self._queues[lane] for lane in LANES):
+            self._timer = asyncio.get_running_loop().call_later(max(wait, 0.01), self._dispatch)
+
+    def backoff(self, attempt: int, retry_after: float | None) -> float:
+        """
+        Delay before retry ``attempt`` (0-based). Honors the server's
+        Retry-After with a little jitter; otherwise exponential with full
+        jitter.
+        """
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, min(1.0, retry_after * 0.1 + 0.1))
+        else:
+            cap = min(settings.llm_backoff_max_seconds, settings.llm_backoff_base_seconds * 2**attempt)
+            delay = random.uniform(0, cap)
+        return min(delay, settings.llm_backoff_max_seconds)
+
+    def stats(self) -> dict:
+        lanes = {}
+        for lane in LANES:
+            waits = sorted(self._waits[lane])
+            lanes[lane] = {
+                "queued": len(self._queues[lane]),
+                "requests_total": self.requests_total[lane],
+                "wait_seconds_total": round(self.wait_seconds_total[lane], 3),
+                "wait_p95_seconds": round(waits[int(len(waits) * 0.95) - 1], 3) if waits else 0.0,
+            }
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        return {
+            "rpm_limit": int(self._requests.capacity),
+            "tpm_limit": int(self._tokens.capacity),
+            "requests_available": int(self._requests.level),
+            "tokens_available": int(self._tokens.level),
+            "rate_limited_total": self.rate_limited_total,
+            "lanes": lanes,
+        }
+
+
+governor = RateGovernor(
+    rpm=settings.llm_rpm_limit,
+    tpm=settings.llm_tpm_limit,
+    batch_share=settings.llm_batch_share,
+)
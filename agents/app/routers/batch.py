@@ -1,26 +1,26 @@
-from datetime import datetime
+import asyncio
+import json
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 
 from ..auth import verify_token
 from ..database import async_session
-from ..models import KnowledgeSource, Post
-from ..schemas import BatchGenerateRequest, BatchGenerateResponse
-from ..agents.pipeline import run_pipeline
+from ..schemas import (
+    BatchGenerateRequest,
+    BatchGenerateResponse,
+    BatchJobCreated,
+    BatchJobStatus,
+)
+from ..agents.batch_pipeline import parse_schedule_times, run_batch_pipeline
+from ..tools.batch_job_queue import FINISHED_STATUSES, create_batch_job, get_batch_job, notify_batch_work
+from ..tools.knowledge_reader import load_user_sources
 
 router = APIRouter()
 
-
-def _generate_cuid() -> str:
-    import time
-    import random
-    import string
-
-    ts = int(time.time() * 1000)
-    chars = string.ascii_lowercase + string.digits
-    random_part = "".join(random.choices(chars, k=16))
-    return f"c{ts:x}{random_part}"
+# How often the progress stream re-reads the job, and how long one stream may run
+EVENTS_POLL_SECONDS = 1.0
+EVENTS_MAX_SECONDS = 600.0
 
 
 @router.post("/batch-generate", response_model=BatchGenerateResponse)
@@ -28,61 +28,102 @@ async def batch_generate(
     request: BatchGenerateRequest, _token: str = Depends(verify_token)
 ):
     try:
-        # Verify user has knowledge sources
+        # Verify user has knowledge sources; the batch reuses them
         async with async_session() as session:
-            result = await session.execute(
-                select(KnowledgeSource).where(
-                    KnowledgeSource.userId == request.user_id,
-                    KnowledgeSource.isActive == True,  # noqa: E712
-                )
+            sources = await load_user_sources(session, request.user_id)
+        if not sources:
+            return BatchGenerateResponse(
+                success=False,
+                error="No active knowledge sources found",
             )
-            sources = result.scalars().all()
-            if not sources:
-                return BatchGenerateResponse(
-                    success=False,
-                    error="No active knowledge sources found",
-                )
-
-        post_ids: list[str] = []
-        count = min(request.count, 10)
-
-        for i in range(count):
-            # Generate unique content for each post
-            gen_result = await run_pipeline(
-                user_id=request.user_id,
-                prompt=f"Create unique post #{i + 1} of {count} for today. Vary the topic and angle.",
-                language=None,
-                multiple=False,
-            )
-
-            if not gen_result.success or not gen_result.content:
-                continue
 
-            # Determine schedule time
-            scheduled_at = None
-            if i < len(request.schedule_times):
-                scheduled_at = datetime.fromisoformat(
-                    request.schedule_times[i].replace("Z", "+00:00")
-                )
-
-            # Create post in database
-            async with async_session() as session:
-                post = Post(
-                    id=_generate_cuid(),
-                    content=gen_result.content,
-                    status="scheduled",
-                    scheduledAt=scheduled_at,
-                    mediaAssetId=gen_result.media_asset_id,
-                    userId=request.user_id,
-                )
-                session.add(post)
-                await session.commit()
-                post_ids.append(post.id)
+        result = await run_batch_pipeline(
+            user_id=request.user_id,
+            count=min(request.count, 10),
+            schedule_times=request.schedule_times,
+            sources=sources,
+        )
+        post_ids = result["post_ids"]
 
         return BatchGenerateResponse(
             success=True,
             posts_created=len(post_ids),
             post_ids=post_ids,
+            errors=result["errors"],
         )
     except Exception as e:
         return BatchGenerateResponse(success=False, error=str(e))
+
+
+@router.post("/batch-jobs", response_model=BatchJobCreated, status_code=status.HTTP_202_ACCEPTED)
+async def create_batch(
+    request: BatchGenerateRequest, _token: str = Depends(verify_token)
+):
+    """Queue a batch for the background worker and return its id immediately."""
+    try:
+        count = min(request.count, 10)
+        # Reject bad timestamps now rather than after the posts are generated
+        parse_schedule_times(request.schedule_times, count)
+        async with async_session() as session:
+            if not await load_user_sources(session, request.user_id):
+                return BatchJobCreated(success=False, error="No active knowledge sources found")
+            job = await create_batch_job(
+                session,
+                user_id=request.user_id,
+                count=count,
+                schedule_times=request.schedule_times,
+            )
+            await session.commit()
+        notify_batch_work()
+        return BatchJobCreated(success=True, job_id=job.id)
+    except Exception as e:
+        return BatchJobCreated(success=False, error=str(e))
+
+
+@router.get("/batch-jobs/{job_id}", response_model=BatchJobStatus)
+async def get_batch(job_id: str, _token: str = Depends(verify_token)):
+    async with async_session() as session:
+        job = await get_batch_job(session, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch job not found")
+    return job
+
+
+@router.get("/batch-jobs/{job_id}/events")
+async def stream_batch(job_id: str, request: Request, _token: str = Depends(verify_token)):
+    """
+    Server-sent events for a batch job: a ``progress`` event whenever the
+    job changes and a final ``done`` event once it has finished. The stream
+    ends with a ``timeout`` event (carrying the latest status) after
+    ``EVENTS_MAX_SECONDS``; clients still interested reconnect. Each poll
+    uses a fresh session, so a waiting stream holds no connection.
+    """
+    async with async_session() as session:
+        if await get_batch_job(session, job_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch job not found")
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + EVENTS_MAX_SECONDS
+        last: dict | None = None
+        while not await request.is_disconnected():
+            async with async_session() as session:
+                job = await get_batch_job(session, job_id)
+            if job is None:
+                return
+            if job["status"] in FINISHED_STATUSES:
+                yield f"event: done\ndata: {json.dumps(job)}\n\n"
+                return
+            if loop.time() >= deadline:
+                yield f"event: timeout\ndata: {json.dumps(job)}\n\n"
+                return
+            if job != last:
+                yield f"event: progress\ndata: {json.dumps(job)}\n\n"
+                last = job
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,4 +1,8 @@
+import asyncio
+import json
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 
 from ..auth import verify_token
 from ..schemas import GenerateRequest, GenerateResponse
@@ -8,14 +12,80 @@ router = APIRouter()
 
 
 @router.post("/generate", response_model=GenerateResponse)
-async def generate(request: GenerateRequest, _token: str = Depends(verify_token)):
+async def generate(
+    request: GenerateRequest,
+    fresh: bool = False,
+    debug: bool = False,
+    _token: str = Depends(verify_token),
+):
     try:
         result = await run_pipeline(
             user_id=request.user_id,
             prompt=request.prompt,
             language=request.language,
             multiple=request.multiple,
+            fresh=fresh,
+            debug=debug,
         )
         return result
     except Exception as e:
         return GenerateResponse(success=False, error=str(e))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/generate/stream")
+async def generate_stream(
+    request: GenerateRequest,
+    fresh: bool = False,
+    debug: bool = False,
+    _token: str = Depends(verify_token),
+):
+    """
+    Streaming variant of /generate as server-sent events:
+
+    - ``stage``: ``{"stage", "log"}`` as each pipeline stage finishes
+    - ``token``: ``{"text"}`` editor output as it is generated (provisional)
+    - ``result``: the full GenerateResponse, sent last
+    """
+    events: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+
+    async def run() -> GenerateResponse:
+        try:
+            return await run_pipeline(
+                user_id=request.user_id,
+                prompt=request.prompt,
+                language=request.language,
+                multiple=request.multiple,
+                fresh=fresh,
+                debug=debug,
+                on_event=lambda event, data: events.put_nowait((event, data)),
+            )
+        except Exception as e:
+            return GenerateResponse(success=False, error=str(e))
+
+    async def stream():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield _sse(*getter.result())
+                    continue
+                getter.cancel()
+                break
+            while not events.empty():
+                yield _sse(*events.get_nowait())
+            yield _sse("result", task.result().model_dump())
+        finally:
+            # Client went away: stop paying for the rest of the pipeline
+            task.cancel()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
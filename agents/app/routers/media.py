@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+
+from ..auth import verify_token
+from ..blob_store import get_blob_store, is_valid_key
+from ..database import async_session
+from ..models import MediaAsset
+
+router = APIRouter()
+
+
+@router.get("/media/{key}")
+async def get_media_blob(key: str, _token: str = Depends(verify_token)):
+    """
+    Serve MediaAsset bytes kept in the blob store (rows with a blobKey),
+    typed with the asset's ``mimeType``. Assets belong to one user, so
+    responses may only be cached privately.
+    """
+    store = get_blob_store()
+    if store is None or not is_valid_key(key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    async with async_session() as session:
+        result = await session.execute(
+            select(MediaAsset.mimeType).where(MediaAsset.blobKey == key).limit(1)
+        )
+        mime_type = result.scalar_one_or_none()
+    if mime_type is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    data = await store.get(key)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    return Response(
+        content=data,
+        media_type=mime_type,
+        headers={"Cache-Control": "private, max-age=31536000, immutable"},
+    )
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from ..auth import verify_token
+from ..metrics import StatsCollector
+from .stats import collect_stats
+
+router = APIRouter()
+
+# The /stats snapshot (caches, governor, event loop, extraction) as gauges
+REGISTRY.register(StatsCollector(collect_stats))
+
+
+@router.get("/metrics")
+async def metrics(_token: str = Depends(verify_token)):
+    """Prometheus exposition: stage latency histograms, LLM call and token counters, /stats gauges."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+
+from ..auth import verify_token
+from ..database import async_session
+from ..agents.refresh_worker import refresh_worker
+from ..tools.refresh_queue import get_queue_stats
+
+router = APIRouter()
+
+
+@router.get("/refresh-queue")
+async def refresh_queue(_token: str = Depends(verify_token)):
+    """Knowledge refresh queue depth and lag."""
+    async with async_session() as session:
+        stats = await get_queue_stats(session)
+    return {
+        **stats,
+        "worker": {
+            "running": refresh_worker.running,
+            "jobs_done": refresh_worker.jobs_done,
+            "jobs_failed": refresh_worker.jobs_failed,
+        },
+    }
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+
+from ..auth import verify_token
+from ..llm import llm_cache_stats
+from ..loop_monitor import loop_monitor
+from ..rate_governor import governor
+from ..tools.extract_pool import extract_stats
+from ..tools.image_harvester import phash_index_stats
+from ..tools.knowledge_reader import knowledge_cache_stats
+from ..tools.post_index import post_index_stats
+
+router = APIRouter()
+
+
+def collect_stats() -> dict:
+    return {
+        "event_loop": loop_monitor.snapshot(),
+        "html_extraction": extract_stats(),
+        "knowledge_cache": knowledge_cache_stats(),
+        "llm_cache": llm_cache_stats(),
+        "llm_governor": governor.stats(),
+        "phash_index": phash_index_stats(),
+        "post_index": post_index_stats(),
+    }
+
+
+@router.get("/stats")
+async def stats(_token: str = Depends(verify_token)):
+    return collect_stats()
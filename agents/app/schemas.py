@@ -8,12 +8,21 @@ class GenerateRequest(BaseModel):
     multiple: bool = False
 
 
+class PipelineTimings(BaseModel):
+    # Milliseconds per stage; stages that ran concurrently or repeatedly are summed
+    stages_ms: dict[str, float] = {}
+    # {"author": {"prompt": n, "completion": n}, ...}
+    tokens: dict[str, dict[str, int]] = {}
+
+
 class GenerateResponse(BaseModel):
     success: bool
     content: str | None = None
     suggestions: list[str] = []
     media_asset_id: str | None = None
+    duplicate_of: str | None = None  # Earlier post the content nearly repeats
     pipeline_log: dict[str, str] = {}
+    timings: PipelineTimings | None = None
     error: str | None = None
 
 
@@ -27,4 +36,30 @@ class BatchGenerateResponse(BaseModel):
     success: bool
     posts_created: int = 0
     post_ids: list[str] = []
+    errors: list[str] = []  # Posts that were skipped (failed or near-duplicate)
+    error: str | None = None
+
+
+class BatchJobCreated(BaseModel):
+    success: bool
+    job_id: str | None = None
+    error: str | None = None
+
+
+class BatchJobItemStatus(BaseModel):
+    position: int
+    status: str
+    post_id: str | None = None
+    content: str | None = None
+    error: str | None = None
+
+
+class BatchJobStatus(BaseModel):
+    job_id: str
+    status: str
+    count: int
+    completed: int = 0
+    failed: int = 0
+    post_ids: list[str] = []
     error: str | None = None
+    items: list[BatchJobItemStatus] = []
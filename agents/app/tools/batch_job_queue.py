@@ -0,0 +1,145 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..ids import generate_cuid
+from ..models import BatchJob, BatchJobItem
+
+FINISHED_STATUSES = ("done", "partial", "failed")
+
+_work_available = asyncio.Event()
+
+
+async def create_batch_job(
+    session: AsyncSession,
+    user_id: str,
+    count: int,
+    schedule_times: list[str],
+) -> BatchJob:
+    """
+    Record a pending batch job with one pending item per post. The caller
+    commits, then calls ``notify_batch_work`` so a worker here picks it up.
+    """
+    now = datetime.now(timezone.utc)
+    job = BatchJob(
+        id=generate_cuid(),
+        status="pending",
+        count=count,
+        scheduleTimes=json.dumps(schedule_times) if schedule_times else None,
+        attempts=0,
+        createdAt=now,
+        updatedAt=now,
+        userId=user_id,
+    )
+    session.add(job)
+    session.add_all(
+        BatchJobItem(id=generate_cuid(), position=i, status="pending", updatedAt=now, jobId=job.id)
+        for i in range(count)
+    )
+    return job
+
+
+def notify_batch_work() -> None:
+    """Wake this process's batch workers; call once the new job is committed."""
+    _work_available.set()
+
+
+def retry_at(attempts: int) -> datetime:
+    """When a job that has failed ``attempts`` times may be claimed again."""
+    delay = settings.batch_retry_backoff_seconds * 2 ** max(0, attempts - 1)
+    return datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+
+async def wait_for_batch_work(timeout: float) -> None:
+    """Sleep until a job is created in this process or ``timeout`` elapses."""
+    try:
+        await asyncio.wait_for(_work_available.wait(), timeout)
+    except TimeoutError:
+        pass
+    _work_available.clear()
+
+
+async def claim_next_batch_job(session: AsyncSession) -> BatchJob | None:
+    """
+    Atomically claim the oldest pending job that is past its retry backoff,
+    or a running one whose heartbeat is older than ``batch_job_timeout_seconds``
+    (its worker died).
+    """
+    now = datetime.now(timezone.utc)
+    abandoned_before = now - timedelta(seconds=settings.batch_job_timeout_seconds)
+    result = await session.execute(
+        select(BatchJob)
+        .where(or_(
+            and_(
+                BatchJob.status == "pending",
+                or_(BatchJob.availableAt == None, BatchJob.availableAt <= now),  # noqa: E711
+            ),
+            and_(BatchJob.status == "running", BatchJob.updatedAt < abandoned_before),
+        ))
+        .order_by(BatchJob.createdAt)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        await session.rollback()
+        return None
+
+    claimed = await session.execute(
+        update(BatchJob)
+        .where(BatchJob.id == job.id, BatchJob.attempts == job.attempts)
+        .values(status="running", attempts=job.attempts + 1, startedAt=now, updatedAt=now)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    if claimed.rowcount != 1:
+        return None
+    await session.refresh(job)
+    return job
+
+
+async def heartbeat_batch_job(session: AsyncSession, job_id: str) -> None:
+    await session.execute(
+        update(BatchJob)
+        .where(BatchJob.id == job_id, BatchJob.status == "running")
+        .values(updatedAt=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
+async def get_batch_job(session: AsyncSession, job_id: str) -> dict | None:
+    """Job status with per-post progress, or None if the job does not exist."""
+    job = await session.get(BatchJob, job_id, populate_existing=True)
+    if job is None:
+        return None
+    result = await session.execute(
+        select(BatchJobItem)
+        .where(BatchJobItem.jobId == job_id)
+        .order_by(BatchJobItem.position)
+        .execution_options(populate_existing=True)
+    )
+    items = result.scalars().all()
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "count": job.count,
+        "completed": sum(1 for item in items if item.status == "done"),
+        "failed": sum(1 for item in items if item.status == "failed"),
+        "post_ids": [item.postId for item in items if item.postId],
+        "error": job.error,
+        "items": [
+            {
+                "position": item.position,
+                "status": item.status,
+                "post_id": item.postId,
+                "content": item.content,
+                "error": item.error,
+            }
+            for item in items
+        ],
+    }
@@ -0,0 +1,109 @@
+import asyncio
+import multiprocessing
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ..config import settings
+from .html_extract import extract_page
+
+EXECUTOR_MODES = ("auto", "process", "thread", "inline")
+
+_executor: Executor | None = None
+_stats = {"pages": 0, "timeouts": 0, "errors": 0, "truncated": 0, "seconds_total": 0.0}
+
+
+def _free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def executor_mode() -> str:
+    mode = settings.extract_executor
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"extract_executor must be one of {', '.join(EXECUTOR_MODES)}, got {mode!r}")
+    if mode == "auto":
+        return "thread" if _free_threaded() else "process"
+    return mode
+
+
+def start_extract_pool() -> None:
+    """Create the extraction executor. Called from the app lifespan; also lazy."""
+    global _executor
+    if _executor is not None:
+        return
+    mode = executor_mode()
+    workers = max(1, settings.extract_workers)
+    if mode == "process":
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    elif mode == "thread":
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract")
+
+
+def shutdown_extract_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _discard_pool(executor: Executor | None) -> None:
+    """Drop a broken pool so the next page starts a new one (unless that already happened)."""
+    global _executor
+    if executor is not None and executor is _executor:
+        _executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_stats() -> dict:
+    return {"mode": executor_mode(), "backend": settings.html_extractor, **_stats}
+
+
+async def run_extract(html: str, url: str) -> dict:
+    """
+    Run ``extract_page`` off the event loop.
+
+    Input is capped at ``settings.extract_max_chars`` and each page gets
+    ``settings.extract_timeout_seconds``. A timed-out or failed page is
+    reported as an error page rather than raised, so one bad page cannot
+    stop a crawl; a process worker may still finish a timed-out page in the
+    background. A broken process pool (a worker was killed) is replaced.
+    """
+    if len(html) > settings.extract_max_chars:
+        html = html[: settings.extract_max_chars]
+        _stats["truncated"] += 1
+
+    started = time.monotonic()
+    executor = None
+    try:
+        if executor_mode() == "inline":
+            return extract_page(html, url, settings.html_extractor)
+
+        start_extract_pool()
+        executor = _executor
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(executor, extract_page, html, url, settings.html_extractor),
+            timeout=settings.extract_timeout_seconds,
+        )
+    except TimeoutError:
+        _stats["timeouts"] += 1
+        return _error_page(url, "extraction timed out")
+    except BrokenProcessPool:
+        _stats["errors"] += 1
+        _discard_pool(executor)
+        return _error_page(url, "extraction worker died")
+    except Exception as e:
+        _stats["errors"] += 1
+        return _error_page(url, f"extraction failed: {e}")
+    finally:
+        _stats["pages"] += 1
+        _stats["seconds_total"] += time.monotonic() - started
+
+
+def _error_page(url: str, error: str) -> dict:
+    return {"url": url, "title": "", "content": "", "images": [], "error": error}
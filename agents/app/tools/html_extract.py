@@ -0,0 +1,228 @@
+import re
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+NOISE_TAGS = frozenset(["script", "style", "nav", "header", "footer", "aside"])
+NOISE_CLASS_RE = re.compile(r"ad|popup|modal|cookie|banner", re.I)
+CONTENT_CLASS_RE = re.compile(r"content|post|entry", re.I)
+SKIP_IMAGE_TOKENS = ["logo", "icon", "favicon", "sprite", "pixel", "tracking", "avatar"]
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".webp"]
+
+
+def _is_cjk(text: str) -> bool:
+    cjk_count = sum(1 for c in text if "\u4e00" <= c <= "\u9fff" or "\u3040" <= c <= "\u30ff" or "\uac00" <= c <= "\ud7af")
+    return cjk_count > len(text) * 0.1
+
+
+def _clean_text(text: str) -> str:
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+def _image_entry(url: str, src: str, alt: str, width: str, height: str) -> dict | None:
+    """Apply the product-image filters to one <img>; returns None if it is skipped."""
+    if not src:
+        return None
+    src = urljoin(url, src)
+
+    # Skip tiny images
+    try:
+        if width and int(width) < 150:
+            return None
+        if height and int(height) < 150:
+            return None
+    except ValueError:
+        pass
+
+    # Skip common non-product images
+    src_lower = src.lower()
+    if any(skip in src_lower for skip in SKIP_IMAGE_TOKENS):
+        return None
+
+    # Check for valid image extensions
+    path = urlparse(src).path.lower()
+    if not any(path.endswith(ext) for ext in IMAGE_EXTENSIONS):
+        # Also accept URLs without extensions (could be CDN)
+        if "." in path.split("/")[-1]:
+            return None
+
+    return {"url": src, "alt": alt}
+
+
+def _internal_link(url: str, href: str) -> str | None:
+    parsed_base = urlparse(url)
+    parsed = urlparse(urljoin(url, href))
+    if parsed.netloc == parsed_base.netloc and parsed.path != parsed_base.path:
+        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+    return None
+
+
+def extract_page(html: str, url: str, backend: str = "bs4") -> dict:
+    """
+    Parse HTML and extract title, main text, candidate images and internal links.
+
+    ``backend`` selects the implementation: "bs4" (reference) or "lxml"
+    (single traversal; falls back to bs4 when lxml is not installed).
+    """
+    if backend == "lxml":
+        try:
+            return extract_page_lxml(html, url)
+        except ImportError:
+            pass
+    return extract_page_bs4(html, url)
+
+
+def extract_page_bs4(html: str, url: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Remove noise
+    for tag in soup.find_all(list(NOISE_TAGS)):
+        tag.decompose()
+    for tag in soup.find_all(class_=NOISE_CLASS_RE):
+        tag.decompose()
+
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+
+    # Extract content from main content areas
+    content_el = (
+        soup.find("article")
+        or soup.find("main")
+        or soup.find(class_=CONTENT_CLASS_RE)
+        or soup.find("body")
+    )
+
+    content = _clean_text(content_el.get_text(" ", strip=True)) if content_el else ""
+
+    min_length = 30 if _is_cjk(content) else 100
+    if len(content) < min_length:
+        content = _clean_text(soup.get_text(" ", strip=True))
+
+    # Extract product images
+    images: list[dict] = []
+    for img in soup.find_all("img"):
+        entry = _image_entry(
+            url, img.get("src", ""), img.get("alt", ""), img.get("width", ""), img.get("height", "")
+        )
+        if entry:
+            images.append(entry)
+
+    # Extract internal links
+    internal_links: list[str] = []
+    seen_links: set[str] = set()
+    for a in soup.find_all("a", href=True):
+        clean_href = _internal_link(url, a["href"])
+        if clean_href and clean_href not in seen_links:
+            seen_links.add(clean_href)
+            internal_links.append(clean_href)
+
+    return {
+        "url": url,
+        "title": title,
+        "content": content,
+        "images": images,
+        "internal_links": internal_links,
+    }
+
+
+def _has_class(el, pattern: re.Pattern) -> bool:
+    classes = el.get("class")
+    return bool(classes) and any(pattern.search(c) for c in classes.split())
+
+
+def extract_page_lxml(html: str, url: str) -> dict:
+    """
+    Single-traversal extractor built on lxml.
+
+    Noise subtrees are skipped rather than removed, every text node is visited
+    once, and the span of each content candidate (article, main, content-like
+    class, body) is recorded as a slice of the collected text so the main
+    content and the whole-page fallback both come from the same walk.
+    """
+    from lxml import etree
+    from lxml.html import HTMLParser, document_fromstring
+
+    try:
+        root = document_fromstring(html.encode("utf-8", "replace"), parser=HTMLParser(encoding="utf-8"))
+    except (etree.ParserError, ValueError):
+        return {"url": url, "title": "", "content": "", "images": [], "internal_links": []}
+
+    pieces: list[str] = []
+    spans: dict[str, list[int]] = {}
+    title: str | None = None
+    images: list[dict] = []
+    internal_links: list[str] = []
+    seen_links: set[str] = set()
+
+    def add_text(text: str | None) -> None:
+        if text:
+            text = text.strip()
+            if text:
+                pieces.append(text)
+
+    # (element, closing, candidate keys opened by this element)
+    stack: list[tuple] = [(root, False, ())]
+    while stack:
+        el, closing, keys = stack.pop()
+        if closing:
+            for key in keys:
+                spans[key][1] = len(pieces)
+            if el is not root:
+                add_text(el.tail)
+            continue
+
+        tag = el.tag
+        if not isinstance(tag, str):
+            # Comments and processing instructions contribute only their tail
+            add_text(el.tail)
+            continue
+        if tag in NOISE_TAGS or _has_class(el, NOISE_CLASS_RE):
+            add_text(el.tail)
+            continue
+
+        opened = []
+        if tag in ("article", "main", "body") and tag not in spans:
+            opened.append(tag)
+        if "classed" not in spans and _has_class(el, CONTENT_CLASS_RE):
+            opened.append("classed")
+        for key in opened:
+            spans[key] = [len(pieces), len(pieces)]
+
+        if tag == "title" and title is None:
+            title = (el.text or "").strip() if len(el) == 0 else ""
+        elif tag == "img":
+            entry = _image_entry(
+                url, el.get("src", ""), el.get("alt", ""), el.get("width", ""), el.get("height", "")
+            )
+            if entry:
+                images.append(entry)
+        elif tag == "a":
+            href = el.get("href")
+            if href is not None:
+                clean_href = _internal_link(url, href)
+                if clean_href and clean_href not in seen_links:
+                    seen_links.add(clean_href)
+                    internal_links.append(clean_href)
+
+        add_text(el.text)
+        stack.append((el, True, tuple(opened)))
+        stack.extend((child, False, ()) for child in reversed(el))
+
+    content = ""
+    for key in ("article", "main", "classed", "body"):
+        if key in spans:
+            start, end = spans[key]
+            content = _clean_text(" ".join(pieces[start:end]))
+            break
+
+    min_length = 30 if _is_cjk(content) else 100
+    if len(content) < min_length:
+        content = _clean_text(" ".join(pieces))
+
+    return {
+        "url": url,
+        "title": title or "",
+        "content": content,
+        "images": images,
+        "internal_links": internal_links,
+    }
@@ -1,54 +1,122 @@
+import asyncio
 import io
 
-import httpx
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
+
+from ..http_client import get_http_client
+from ..metrics import instrument
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; XPostBot/1.0)",
 }
 MIN_DIMENSION = 200
 MAX_DIMENSION = 2048
+MAX_BYTES = 10 * 1024 * 1024  # 10MB limit
+# Stop looking for dimensions after this much data (large EXIF/ICC blocks come first)
+HEADER_SNIFF_BYTES = 256 * 1024
+PHASH_SIZE = 8
+
+
+def perceptual_hash(img: Image.Image) -> int:
+    """
+    64-bit difference hash (dHash) of an image, as a signed int for BIGINT.
+
+    Each bit records whether a pixel is brighter than its right neighbour on a
+    9x8 grayscale thumbnail, so resized or re-encoded copies hash alike.
+    """
+    small = img.convert("L").resize((PHASH_SIZE + 1, PHASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(PHASH_SIZE):
+        offset = row * (PHASH_SIZE + 1)
+        for col in range(PHASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _sniff_size(data: bytearray) -> tuple[int, int] | None:
+    """
+    Image dimensions from the bytes received so far, or None while the
+    header is incomplete. ``Image.open`` only parses the header; no pixels
+    are decoded.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return img.size
+    except (UnidentifiedImageError, OSError):
+        return None
+
 
+def _process_image(image_data: bytes) -> dict | None:
+    """Decode, validate, downscale and re-encode an image as JPEG."""
+    img = Image.open(io.BytesIO(image_data))
+    width, height = img.size
 
+    if width < MIN_DIMENSION or height < MIN_DIMENSION:
+        return None
+
+    # Resize if too large; draft() lets JPEG decode at a reduced scale first
+    if width > MAX_DIMENSION or height > MAX_DIMENSION:
+        img.draft("RGB", (MAX_DIMENSION, MAX_DIMENSION))
+        img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+        width, height = img.size
+
+    phash = perceptual_hash(img)
+
+    # Convert to JPEG for consistency
+    output = io.BytesIO()
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+    img.save(output, format="JPEG", quality=85)
+    processed_data = output.getvalue()
+
+    return {
+        "data": processed_data,
+        "mime_type": "image/jpeg",
+        "width": width,
+        "height": height,
+        "phash": phash,
+    }
+
+
+@instrument("image_download")
 async def download_and_validate_image(url: str) -> dict | None:
-    """Download an image from URL, validate it, and return processed bytes."""
+    """
+    Download an image from URL, validate it, and return processed bytes.
+
+    The body is streamed with a hard byte cap, and the image header is parsed
+    as soon as it arrives so undersized images are dropped after a few KB.
+    """
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=HEADERS, timeout=15, follow_redirects=True)
+        client = get_http_client()
+        async with client.stream("GET", url, headers=HEADERS, timeout=15, follow_redirects=True) as resp:
             resp.raise_for_status()
 
             content_type = resp.headers.get("content-type", "")
             if not content_type.startswith("image/"):
                 return None
 
-            image_data = resp.content
-            if len(image_data) > 10 * 1024 * 1024:  # 10MB limit
+            content_length = resp.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > MAX_BYTES:
                 return None
 
-            # Validate with Pillow
-            img = Image.open(io.BytesIO(image_data))
-            width, height = img.size
+            image_data = bytearray()
+            sniffing = True
+            async for chunk in resp.aiter_bytes():
+                image_data.extend(chunk)
+                if len(image_data) > MAX_BYTES:
+                    return None
 
-            if width < MIN_DIMENSION or height < MIN_DIMENSION:
-                return None
+                if sniffing:
+                    size = _sniff_size(image_data)
+                    if size is not None:
+                        sniffing = False
+                        width, height = size
+                        if width < MIN_DIMENSION or height < MIN_DIMENSION:
+                            return None
+                    elif len(image_data) >= HEADER_SNIFF_BYTES:
+                        sniffing = False
 
-            # Resize if too large
-            if width > MAX_DIMENSION or height > MAX_DIMENSION:
-                img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
-                width, height = img.size
-
-            # Convert to JPEG for consistency
-            output = io.BytesIO()
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            img.save(output, format="JPEG", quality=85)
-            processed_data = output.getvalue()
-
-            return {
-                "data": processed_data,
-                "mime_type": "image/jpeg",
-                "width": width,
-                "height": height,
-            }
+        return await asyncio.to_thread(_process_image, bytes(image_data))
     except Exception:
         return None
@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..blob_store import get_blob_store
+from ..cache import LRUCache
+from ..config import settings
+from ..ids import generate_cuid
+from ..models import MediaAsset
+from .image_downloader import download_and_validate_image
+from .post_index import PostIndex
+
+MAX_CANDIDATES = 10
+MAX_IMAGES_PER_SOURCE = 5
+_UINT64_MASK = (1 << 64) - 1
+
+# Per-user perceptual-hash index, keyed by user id and checked against a version stamp
+_phash_cache = LRUCache(max_entries=settings.dedup_cache_max_entries)
+
+
+def phash_distance(a: int, b: int) -> int:
+    """Hamming distance between two (signed) 64-bit perceptual hashes."""
+    return ((a ^ b) & _UINT64_MASK).bit_count()
+
+
+async def get_phash_index(session: AsyncSession, user_id: str) -> PostIndex:
+    """
+    The user's image near-duplicate index (banded, like the post index),
+    cached in-process until their asset count or latest ``createdAt``
+    changes. Assets are never re-hashed, so those two cover every change
+    that matters here.
+    """
+    result = await session.execute(
+        select(func.count(MediaAsset.id), func.max(MediaAsset.createdAt)).where(MediaAsset.userId == user_id)
+    )
+    stamp = tuple(result.one())
+    cached = _phash_cache.get(user_id)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    rows = await session.execute(
+        select(MediaAsset.id, MediaAsset.phash).where(
+            MediaAsset.userId == user_id,
+            MediaAsset.phash.is_not(None),
+        )
+    )
+    index = PostIndex(settings.image_phash_max_distance)
+    for asset_id, phash in rows.all():
+        index.add(asset_id, phash)
+    _phash_cache.set(user_id, (stamp, index), size=index.size * 64 * len(index._bands))
+    return index
+
+
+def phash_index_stats() -> dict:
+    return _phash_cache.stats()
+
+
+async def harvest_images(
+    session: AsyncSession,
+    user_id: str,
+    images: list[dict],
+    limit: int = MAX_IMAGES_PER_SOURCE,
+) -> int:
+    """
+    Download new product images for a user and stage them as MediaAsset rows.
+
+    Candidate URLs are checked against existing assets with a single IN query,
+    the survivors are downloaded concurrently (at most
+    ``image_download_concurrency`` at a time, in candidate order), and up to
+    ``limit`` successful images (in candidate order) are inserted in one bulk
+    statement. Downloads still queued or in flight once ``limit`` images are
+    accepted are cancelled. Images
+    whose perceptual hash is within ``image_phash_max_distance`` bits of one
+    the user already has (or of one earlier in this batch) are skipped. The
+    caller owns the transaction, so this batch's hashes are kept out of the
+    cached index until they are committed.
+    """
+    candidates: dict[str, dict] = {}
+    for img_info in images[:MAX_CANDIDATES]:
+        candidates.setdefault(img_info["url"], img_info)
+    if not candidates:
+        return 0
+
+    existing = await session.execute(
+        select(MediaAsset.sourceUrl).where(
+            MediaAsset.userId == user_id,
+            MediaAsset.sourceUrl.in_(list(candidates)),
+        )
+    )
+    for (source_url,) in existing.all():
+        candidates.pop(source_url, None)
+    if not candidates:
+        return 0
+
+    semaphore = asyncio.Semaphore(max(1, settings.image_download_concurrency))
+
+    async def fetch(url: str) -> dict | None:
+        async with semaphore:
+            return await download_and_validate_image(url)
+
+    # The semaphore admits waiters in order, so downloads start in candidate order
+    downloads = [asyncio.create_task(fetch(url)) for url in candidates]
+    try:
+        rows = await _accept_images(session, user_id, list(candidates.values()), downloads, limit)
+    finally:
+        for task in downloads:
+            task.cancel()
+        await asyncio.gather(*downloads, return_exceptions=True)
+
+    if rows:
+        await session.execute(insert(MediaAsset), rows)
+    return len(rows)
+
+
+async def _accept_images(
+    session: AsyncSession,
+    user_id: str,
+    candidates: list[dict],
+    downloads: list[asyncio.Task],
+    limit: int,
+) -> list[dict]:
+    """MediaAsset rows for the first ``limit`` downloads that are not near-duplicates."""
+    known = await get_phash_index(session, user_id)
+    accepted = PostIndex(settings.image_phash_max_distance)
+
+    blob_store = get_blob_store()
+    now = datetime.now(timezone.utc)
+    rows: list[dict] = []
+    for img_info, download in zip(candidates, downloads):
+        img_data = await download
+        if not img_data:
+            continue
+        phash = img_data["phash"]
+        if known.find(phash) or accepted.find(phash):
+            continue
+
+        data, key = img_data["data"], None
+        if blob_store is not None:
+            data, key = None, await blob_store.put(img_data["data"], img_data["mime_type"])
+        asset_id = generate_cuid()
+        accepted.add(asset_id, phash)
+        rows.append({
+            "id": asset_id,
+            "sourceUrl": img_info["url"],
+            "data": data,
+            "blobKey": key,
+            "mimeType": img_data["mime_type"],
+            "width": img_data["width"],
+            "height": img_data["height"],
+            "phash": phash,
+            "altText": img_info.get("alt", ""),
+            "isActive": True,
+            "createdAt": now,
+            "updatedAt": now,
+            "userId": user_id,
+        })
+        if len(rows) >= limit:
+            break
+    return rows
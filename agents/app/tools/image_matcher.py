@@ -0,0 +1,45 @@
+import re
+from collections import Counter
+from urllib.parse import unquote, urlparse
+
+from .retrieval import bm25_scores, tokenize
+
+PATH_SEPARATOR_RE = re.compile(r"[/_.\-+%]+")
+# Path terms that say nothing about the picture (already stemmed)
+URL_NOISE = frozenset(
+    "img image photo pic picture media upload wp content static asset file cdn thumb thumbnail "
+    "large medium small full scaled original resize crop jpg jpeg png webp gif avif svg".split()
+)
+OPAQUE_TERM_RE = re.compile(r"^(?:\d+|\d+x\d+|[0-9a-f]{8,})$")
+
+
+def image_terms(image: dict) -> list[str]:
+    """BM25 terms for an image: its alt text plus the descriptive words in its URL path."""
+    path = unquote(urlparse(image.get("url") or "").path)
+    url_terms = [
+        term
+        for term in tokenize(PATH_SEPARATOR_RE.sub(" ", path))
+        if term not in URL_NOISE and not OPAQUE_TERM_RE.match(term)
+    ]
+    return tokenize(image.get("alt") or "") + url_terms
+
+
+def rank_images(text: str, images: list[dict]) -> list[tuple[float, dict]]:
+    """Images scored against ``text`` by BM25, best first."""
+    counts = [Counter(image_terms(image)) for image in images]
+    scores = bm25_scores(text, [dict(c) for c in counts], [sum(c.values()) for c in counts])
+    return sorted(zip(scores.tolist(), images), key=lambda pair: -pair[0])
+
+
+def match_image(text: str, images: list[dict], margin: float) -> tuple[str | None, bool]:
+    """
+    Best-matching image id for ``text`` and whether it clearly wins: it must
+    score above zero and at least ``margin`` times the runner-up. Returns
+    ``(None, False)`` when no image shares a term with the text.
+    """
+    ranked = rank_images(text, images)
+    if not ranked or ranked[0][0] <= 0:
+        return None, False
+    best = ranked[0][0]
+    runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+    return ranked[0][1]["id"], best >= runner_up * margin
@@ -1,55 +1,233 @@
+import json
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 
-from ..models import KnowledgeSource, Post
+from ..cache import LRUCache
+from ..config import settings
+from ..models import KnowledgeChunk, KnowledgePage, KnowledgeSource
+from .retrieval import content_hash, index_chunks, select_chunks
 
 STALENESS_DAYS = 7
 
 
-async def get_knowledge_context(session: AsyncSession, user_id: str) -> str:
-    """Read all active knowledge sources for a user and combine into context."""
+# Per-user chunk index, keyed by user id and checked against a source version stamp
+_index_cache = LRUCache(
+    max_entries=settings.context_cache_max_entries,
+    max_bytes=settings.context_cache_max_bytes,
+    ttl=settings.context_cache_ttl_seconds,
+)
+
+
+def invalidate_knowledge_cache(user_id: str) -> None:
+    """Drop a user's cached knowledge index, e.g. after a refresh commits."""
+    _index_cache.pop(user_id)
+
+
+def knowledge_cache_stats() -> dict:
+    return _index_cache.stats()
+
+
+class UserSources:
+    """
+    A user's active knowledge sources, loaded once per request with the
+    ``content`` column deferred. The stale check, the chunk-index stamp and
+    the "has any sources" check are all answered from these rows; content is
+    fetched separately, and only when the chunk index has to be rebuilt.
+    """
+
+    def __init__(self, user_id: str, rows: list[tuple[KnowledgeSource, bool]]):
+        self.user_id = user_id
+        self.active = [source for source, _ in rows]
+        self._has_content = {source.id for source, has_content in rows if has_content}
+
+    def __bool__(self) -> bool:
+        return bool(self.active)
+
+    @property
+    def stamp(self) -> tuple:
+        """Version of the source set: latest ``updatedAt`` and count."""
+        return max((s.updatedAt for s in self.active), default=None), len(self.active)
+
+    def has_content(self, source: KnowledgeSource) -> bool:
+        return source.id in self._has_content
+
+    def stale(self) -> list[KnowledgeSource]:
+        """Sources due for a re-scrape (the in-memory form of ``stale_clause``)."""
+        threshold = datetime.now(timezone.utc) - timedelta(days=STALENESS_DAYS)
+        return [s for s in self.active if _scraped_before(s.lastScraped, threshold)]
+
+
+async def load_user_sources(session: AsyncSession, user_id: str) -> UserSources:
+    """Load the user's active sources without their content, in one query."""
     result = await session.execute(
-        select(KnowledgeSource).where(
+        select(KnowledgeSource, func.length(KnowledgeSource.content) > 0)
+        .where(
             KnowledgeSource.userId == user_id,
             KnowledgeSource.isActive == True,  # noqa: E712
         )
+        .options(defer(KnowledgeSource.content))
     )
-    sources = result.scalars().all()
+    return UserSources(user_id, [(source, bool(has_content)) for source, has_content in result.all()])
 
-    if not sources:
+
+def _scraped_before(last_scraped: datetime | None, threshold: datetime) -> bool:
+    if last_scraped is None:
+        return True
+    if last_scraped.tzinfo is None:
+        last_scraped = last_scraped.replace(tzinfo=timezone.utc)
+    return last_scraped < threshold
+
+
+async def get_knowledge_context(
+    session: AsyncSession,
+    user_id: str,
+    query: str | None = None,
+    sources: UserSources | None = None,
+) -> str:
+    """
+    Build the knowledge context for a generation request.
+
+    Active sources are searched chunk by chunk and only the passages most
+    relevant to ``query`` (or, without a query, the leading passages of
+    every source) are kept, within ``knowledge_context_tokens``.
+
+    The chunk index is cached per user and keyed by a version stamp of the
+    user's active sources, so repeated requests skip loading source content
+    until a source is added, removed or updated. Pass the request's
+    ``sources`` when they are already loaded to skip reading them again.
+    """
+    if sources is None:
+        sources = await load_user_sources(session, user_id)
+    index = await _get_index(session, sources)
+    if index is None:
         return ""
 
+    selected = select_chunks(
+        query,
+        index["chunks"],
+        token_budget=settings.knowledge_context_tokens,
+        top_k=settings.knowledge_top_k,
+    )
+
+    by_source: dict[str, list[dict]] = {}
+    for chunk in selected:
+        by_source.setdefault(chunk["source_id"], []).append(chunk)
+
+    # Sources appear in order of their best-ranked chunk
     parts: list[str] = []
-    for source in sources:
-        content = source.content
-        if len(content) > 2000:
-            content = content[:2000] + "..."
-        parts.append(f"Source: {source.name} ({source.url})\n{content}")
+    for source_id, picked in by_source.items():
+        name, url = index["sources"][source_id]
+        body = "\n...\n".join(c["content"] for c in sorted(picked, key=lambda c: c["position"]))
+        parts.append(f"Source: {name} ({url})\n{body}")
 
     return "\n\n---\n\n".join(parts)
 
 
-async def get_stale_sources(session: AsyncSession, user_id: str) -> list[KnowledgeSource]:
-    """Find knowledge sources that haven't been scraped recently."""
-    threshold = datetime.now(timezone.utc) - timedelta(days=STALENESS_DAYS)
-    result = await session.execute(
-        select(KnowledgeSource).where(
-            KnowledgeSource.userId == user_id,
-            KnowledgeSource.isActive == True,  # noqa: E712
-            (KnowledgeSource.lastScraped == None) | (KnowledgeSource.lastScraped < threshold),  # noqa: E711
+async def _get_index(session: AsyncSession, sources: UserSources) -> dict | None:
+    """Cached chunk index for the user's active sources; None if there are none."""
+    if not sources:
+        return None
+
+    stamp = sources.stamp
+    cached = _index_cache.get(sources.user_id)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    # Only sources with content contribute chunks; fetch just those bodies
+    with_content = [s.id for s in sources.active if sources.has_content(s)]
+    contents: dict[str, str] = {}
+    if with_content:
+        result = await session.execute(
+            select(KnowledgeSource.id, KnowledgeSource.content).where(KnowledgeSource.id.in_(with_content))
         )
+        fetched = dict(result.all())
+        contents = {source_id: fetched.get(source_id, "") for source_id in with_content}
+    chunks = await _load_chunks(session, contents)
+    index = {
+        "sources": {source.id: (source.name, source.url) for source in sources.active},
+        "chunks": chunks,
+    }
+
+    # Approximate footprint: text plus per-term dict overhead
+    size = sum(len(c["content"]) * 2 + len(c["terms"]) * 100 + 200 for c in chunks) + 200 * len(sources.active)
+    # Replaces the user's previous version, if any
+    _index_cache.set(sources.user_id, (stamp, index), size=size)
+    return index
+
+
+async def _load_chunks(session: AsyncSession, contents: dict[str, str]) -> list[dict]:
+    """
+    Chunk index for the given ``{source_id: content}``. Stored chunks are
+    used when they were cut from the current content; otherwise (content
+    written elsewhere, or not yet indexed) the source is chunked in memory.
+    """
+    if not contents:
+        return []
+    result = await session.execute(
+        select(KnowledgeChunk).where(KnowledgeChunk.sourceId.in_(list(contents)))
     )
-    return list(result.scalars().all())
+    stored: dict[str, list[KnowledgeChunk]] = {}
+    for row in result.scalars().all():
+        stored.setdefault(row.sourceId, []).append(row)
+
+    chunks: list[dict] = []
+    for source_id, content in contents.items():
+        if not content:
+            continue
+        rows = stored.get(source_id, [])
+        if rows and rows[0].contentHash == content_hash(content):
+            chunks.extend(
+                {
+                    "source_id": source_id,
+                    "position": row.position,
+                    "content": row.content,
+                    "terms": json.loads(row.terms),
+                    "length": row.length,
+                }
+                for row in rows
+            )
+        else:
+            for entry in index_chunks(content, settings.knowledge_chunk_chars):
+                entry["source_id"] = source_id
+                chunks.append(entry)
+    return chunks
+
+
+def stale_clause():
+    """SQL condition matching active sources that are due for a re-scrape."""
+    threshold = datetime.now(timezone.utc) - timedelta(days=STALENESS_DAYS)
+    return (
+        (KnowledgeSource.isActive == True)  # noqa: E712
+        & ((KnowledgeSource.lastScraped == None) | (KnowledgeSource.lastScraped < threshold))  # noqa: E711
+    )
+
 
+async def get_page_cache(
+    session: AsyncSession, source_id: str
+) -> tuple[dict[str, dict], dict[str, KnowledgePage]]:
+    """
+    Load the per-page crawl cache for a source.
 
-async def get_recent_posts(session: AsyncSession, user_id: str, limit: int = 20) -> list[str]:
-    """Get recent post contents to avoid repetition."""
+    Returns the cache records keyed by URL (the shape ``scrape_website`` takes
+    as ``page_cache``) and the underlying rows keyed by URL for updating.
+    """
     result = await session.execute(
-        select(Post.content)
-        .where(Post.userId == user_id)
-        .order_by(Post.createdAt.desc())
-        .limit(limit)
+        select(KnowledgePage).where(KnowledgePage.sourceId == source_id)
     )
-    return [row[0] for row in result.all()]
+    rows = {row.url: row for row in result.scalars().all()}
+    cache = {
+        url: {
+            "title": row.title,
+            "content": row.content,
+            "images": json.loads(row.images) if row.images else [],
+            "internal_links": json.loads(row.links) if row.links else [],
+            "etag": row.etag,
+            "last_modified": row.lastModified,
+            "content_hash": row.contentHash,
+        }
+        for url, row in rows.items()
+    }
+    return cache, rows
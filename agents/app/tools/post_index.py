@@ -0,0 +1,140 @@
+import hashlib
+import re
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..cache import LRUCache
+from ..config import settings
+from ..metrics import instrument
+from ..models import Post
+from .retrieval import tokenize
+
+URL_RE = re.compile(r"https?://\S+")
+_UINT64_MASK = (1 << 64) - 1
+
+# Per-user index, keyed by user id and checked against a version stamp
+_index_cache = LRUCache(max_entries=settings.dedup_cache_max_entries)
+
+
+def simhash(text: str) -> int | None:
+    """
+    64-bit SimHash of a post, as a signed integer (BIGINT-compatible).
+
+    Features are the post's terms (as for BM25), so reordered or lightly
+    reworded copies land a few bits apart while unrelated tweets differ in
+    about half the bits. URLs are ignored. Returns None for text without
+    terms (only URLs, emoji or stopwords), which has nothing to compare.
+    """
+    features = tokenize(URL_RE.sub(" ", text))
+    if not features:
+        return None
+    digests = np.frombuffer(
+        b"".join(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features),
+        dtype="<u8",
+    )
+    bits = (digests[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    votes = bits.astype(np.int32).sum(axis=0) * 2 - len(features)
+    value = 0
+    for bit in np.flatnonzero(votes > 0):
+        value |= 1 << int(bit)
+    return value - (1 << 64) if value >> 63 else value
+
+
+def simhash_distance(a: int, b: int) -> int:
+    return ((a ^ b) & _UINT64_MASK).bit_count()
+
+
+class PostIndex:
+    """
+    Near-duplicate lookup over one user's 64-bit signatures (post SimHashes,
+    and image dHashes in the harvester).
+
+    The 64 bits are cut into ``max_distance + 1`` bands; two signatures
+    within ``max_distance`` bits must agree exactly on at least one band
+    (pigeonhole), so a lookup only compares against posts sharing a band
+    instead of scanning them all.
+    """
+
+    def __init__(self, max_distance: int):
+        if not 0 <= max_distance < 64:
+            raise ValueError(f"max_distance must be between 0 and 63, got {max_distance}")
+        self.max_distance = max_distance
+        n_bands = max_distance + 1
+        # Exactly n_bands bands; the first 64 % n_bands are one bit wider
+        base, extra = divmod(64, n_bands)
+        self._bands: list[tuple[int, int]] = []
+        start = 0
+        for i in range(n_bands):
+            width = base + (i < extra)
+            self._bands.append((start, width))
+            start += width
+        self._tables: list[dict[int, list[tuple[str, int]]]] = [{} for _ in self._bands]
+        self.size = 0
+
+    def _keys(self, signature: int):
+        unsigned = signature & _UINT64_MASK
+        for table, (start, width) in zip(self._tables, self._bands):
+            yield table, (unsigned >> start) & ((1 << width) - 1)
+
+    def add(self, post_id: str, signature: int) -> None:
+        for table, key in self._keys(signature):
+            table.setdefault(key, []).append((post_id, signature))
+        self.size += 1
+
+    def find(self, signature: int) -> str | None:
+        """Id of an indexed post within ``max_distance`` bits, or None."""
+        for table, key in self._keys(signature):
+            for post_id, other in table.get(key, ()):
+                if simhash_distance(signature, other) <= self.max_distance:
+                    return post_id
+        return None
+
+    def find_text(self, text: str) -> str | None:
+        signature = simhash(text)
+        return self.find(signature) if signature is not None else None
+
+
+@instrument("post_index")
+async def get_post_index(session: AsyncSession, user_id: str) -> PostIndex:
+    """
+    The user's near-duplicate index, cached in-process until their post
+    count or latest ``updatedAt`` changes (the web app bumps ``updatedAt``
+    on every edit). Posts without a signature, whether written by the web
+    app or edited there (a trigger clears ``simhash`` when ``content``
+    changes), are hashed and backfilled on load, which commits the session.
+    Posts without terms keep a NULL signature and are not indexed.
+    """
+    result = await session.execute(
+        select(func.count(Post.id), func.max(Post.updatedAt)).where(Post.userId == user_id)
+    )
+    stamp = tuple(result.one())
+    cached = _index_cache.get(user_id)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    missing = await session.execute(
+        select(Post.id, Post.content).where(Post.userId == user_id, Post.simhash.is_(None))
+    )
+    backfill = [
+        {"id": post_id, "simhash": signature}
+        for post_id, content in missing.all()
+        if (signature := simhash(content)) is not None
+    ]
+    if backfill:
+        await session.execute(update(Post), backfill)
+        await session.commit()
+
+    rows = await session.execute(
+        select(Post.id, Post.simhash).where(Post.userId == user_id, Post.simhash.is_not(None))
+    )
+    index = PostIndex(settings.dedup_max_distance)
+    for post_id, signature in rows.all():
+        index.add(post_id, signature)
+    _index_cache.set(user_id, (stamp, index), size=index.size * 64 * len(index._bands))
+    return index
+
+
+def post_index_stats() -> dict:
+    return _index_cache.stats()
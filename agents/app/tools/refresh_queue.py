@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..ids import generate_cuid
+from ..models import KnowledgeRefreshJob, KnowledgeSource
+
+ACTIVE_STATUSES = ("pending", "running")
+
+_work_available = asyncio.Event()
+
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+async def enqueue_refresh(session: AsyncSession, sources: list[KnowledgeSource]) -> int:
+    """
+    Queue a background refresh for each source that has no pending or running
+    job yet. Returns the number of jobs added; the caller commits, then calls
+    ``notify_refresh_work`` if any were added.
+    """
+    if not sources:
+        return 0
+    result = await session.execute(
+        select(KnowledgeRefreshJob.sourceId).where(
+            KnowledgeRefreshJob.sourceId.in_([s.id for s in sources]),
+            KnowledgeRefreshJob.status.in_(ACTIVE_STATUSES),
+        )
+    )
+    already_queued = {row[0] for row in result.all()}
+
+    now = datetime.now(timezone.utc)
+    added = 0
+    for source in sources:
+        if source.id in already_queued:
+            continue
+        session.add(KnowledgeRefreshJob(
+            id=generate_cuid(),
+            status="pending",
+            attempts=0,
+            createdAt=now,
+            updatedAt=now,
+            sourceId=source.id,
+            userId=source.userId,
+        ))
+        added += 1
+    return added
+
+
+def notify_refresh_work() -> None:
+    """Wake this process's refresh workers; call once new jobs are committed."""
+    _work_available.set()
+
+
+def retry_at(attempts: int) -> datetime:
+    """When a job that has failed ``attempts`` times may be claimed again."""
+    delay = settings.refresh_retry_backoff_seconds * 2 ** max(0, attempts - 1)
+    return datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+
+async def wait_for_work(timeout: float) -> None:
+    """Sleep until new jobs are enqueued in this process or ``timeout`` elapses."""
+    try:
+        await asyncio.wait_for(_work_available.wait(), timeout)
+    except TimeoutError:
+        pass
+    _work_available.clear()
+
+
+async def claim_next_job(session: AsyncSession) -> KnowledgeRefreshJob | None:
+    """
+    Atomically claim the oldest pending job that is past its retry backoff
+    (or one whose worker died). Uses FOR UPDATE SKIP LOCKED so concurrent
+    workers skip each other's rows.
+    """
+    now = datetime.now(timezone.utc)
+    abandoned_before = now - timedelta(seconds=settings.refresh_job_timeout_seconds)
+    result = await session.execute(
+        select(KnowledgeRefreshJob)
+        .where(or_(
+            and_(
+                KnowledgeRefreshJob.status == "pending",
+                or_(KnowledgeRefreshJob.availableAt == None, KnowledgeRefreshJob.availableAt <= now),  # noqa: E711
+            ),
+            and_(
+                KnowledgeRefreshJob.status == "running",
+                KnowledgeRefreshJob.startedAt < abandoned_before,
+            ),
+        ))
+        .order_by(KnowledgeRefreshJob.createdAt)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        await session.rollback()
+        return None
+
+    # Conditional on attempts so a racing claimer (e.g. without SKIP LOCKED
+    # support) cannot take the same job twice.
+    claimed = await session.execute(
+        update(KnowledgeRefreshJob)
+        .where(
+            KnowledgeRefreshJob.id == job.id,
+            KnowledgeRefreshJob.attempts == job.attempts,
+        )
+        .values(status="running", attempts=job.attempts + 1, startedAt=now, updatedAt=now)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    if claimed.rowcount != 1:
+        return None
+    await session.refresh(job)
+    return job
+
+
+async def get_queue_stats(session: AsyncSession) -> dict:
+    """Queue depth by status and the age of the oldest pending job."""
+    result = await session.execute(
+        select(
+            KnowledgeRefreshJob.status,
+            func.count(),
+            func.min(KnowledgeRefreshJob.createdAt),
+        )
+        .where(KnowledgeRefreshJob.status.in_(ACTIVE_STATUSES))
+        .group_by(KnowledgeRefreshJob.status)
+    )
+    stats = {"pending": 0, "running": 0, "oldest_pending_age_seconds": 0.0}
+    now = _naive_utc(datetime.now(timezone.utc))
+    for status, count, oldest in result.all():
+        stats[status] = count
+        if status == "pending" and oldest is not None:
+            stats["oldest_pending_age_seconds"] = round(
+                (now - _naive_utc(oldest)).total_seconds(), 1
+            )
+    return stats
@@ -0,0 +1,156 @@
+import hashlib
+import re
+from collections import Counter
+
+import numpy as np
+
+from ..prompt_budget import CJK_RUN_RE, count_tokens
+
+PAGE_SEPARATOR = "\n\n---\n\n"
+SENTENCE_SPLIT_RE = re.compile("(?<=[.!?])\\s+|(?<=[\u3002\uff01\uff1f])")
+WORD_RE = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was "
+    "were will with you your we our they their not but can".split()
+)
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _stem(word: str) -> str:
+    # Plural folding only; enough for "shoe" to match "shoes"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Terms for BM25: lowercase words minus stopwords, plus character bigrams
+    for CJK runs (which have no spaces to split on).
+    """
+    text = text.lower()
+    terms = [_stem(w) for w in WORD_RE.findall(text) if w not in STOPWORDS and len(w) > 1]
+    for run in CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def chunk_text(text: str, max_chars: int = 800) -> list[str]:
+    """
+    Split source content into chunks of at most ``max_chars``.
+
+    Pages (joined by ``---`` separators) never share a chunk; within a page
+    chunks break on sentence boundaries, and over-long sentences are cut.
+    """
+    chunks: list[str] = []
+    for page in text.split(PAGE_SEPARATOR):
+        current = ""
+        for sentence in SENTENCE_SPLIT_RE.split(page):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            while len(sentence) > max_chars:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def index_chunks(text: str, max_chars: int = 800) -> list[dict]:
+    """Chunk ``text`` and precompute each chunk's term frequencies and length."""
+    entries = []
+    for position, chunk in enumerate(chunk_text(text, max_chars)):
+        terms = tokenize(chunk)
+        entries.append({
+            "position": position,
+            "content": chunk,
+            "terms": dict(Counter(terms)),
+            "length": len(terms),
+        })
+    return entries
+
+
+def bm25_scores(query: str, term_freqs: list[dict[str, int]], lengths: list[int]) -> np.ndarray:
+    """
+    Okapi BM25 score of every chunk against ``query``.
+
+    Document frequencies are taken over the given chunks, so scores are
+    relative to this candidate set (one user's knowledge base).
+    """
+    n_docs = len(term_freqs)
+    query_counts = Counter(tokenize(query))
+    if not n_docs or not query_counts:
+        return np.zeros(n_docs)
+
+    query_terms = list(query_counts)
+    tf = np.array([[freqs.get(term, 0) for term in query_terms] for freqs in term_freqs], dtype=np.float64)
+    doc_len = np.asarray(lengths, dtype=np.float64)
+    avg_len = doc_len.mean() or 1.0
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_len / avg_len)
+    weights = tf * (BM25_K1 + 1.0) / (tf + norm[:, None])
+    query_weights = np.array([query_counts[term] for term in query_terms], dtype=np.float64)
+    return weights @ (idf * query_weights)
+
+
+def select_chunks(query: str | None, chunks: list[dict], token_budget: int, top_k: int) -> list[dict]:
+    """
+    Pick the chunks to send to the LLM within ``token_budget``.
+
+    Sources take turns contributing their leading chunks, so with no query
+    every source is represented. With a query, up to ``top_k`` chunks are
+    taken by descending BM25 score, topped up with leading chunks when few
+    match. Chunks that do not fit the remaining budget are skipped. Chunks
+    need ``source_id``, ``position``, ``content``, ``terms`` and ``length``.
+    """
+    if not chunks:
+        return []
+
+    by_source: dict[str, list[int]] = {}
+    for i, chunk in enumerate(chunks):
+        by_source.setdefault(chunk["source_id"], []).append(i)
+    queues = [sorted(ids, key=lambda i: chunks[i]["position"]) for ids in by_source.values()]
+    depth = max(len(q) for q in queues)
+    order = [q[d] for d in range(depth) for q in queues if d < len(q)]
+    limit = len(chunks)
+
+    if query:
+        scores = bm25_scores(query, [c["terms"] for c in chunks], [c["length"] for c in chunks])
+        ranked = np.argsort(-scores, kind="stable")
+        matched = [int(i) for i in ranked if scores[i] > 0]
+        matched_set = set(matched)
+        order = matched + [i for i in order if i not in matched_set]
+        limit = top_k
+
+    selected: list[dict] = []
+    used = 0
+    for i in order:
+        if len(selected) >= limit:
+            break
+        cost = count_tokens(chunks[i]["content"])
+        if used + cost > token_budget:
+            continue
+        selected.append(chunks[i])
+        used += cost
+    return selected
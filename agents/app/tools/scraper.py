@@ -1,9 +1,15 @@
 import asyncio
-import re
-from urllib.parse import urljoin, urlparse
+import hashlib
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
 
 import httpx
-from bs4 import BeautifulSoup
+
+from ..config import settings
+from ..http_client import get_http_client
+from ..metrics import instrument
+from .extract_pool import run_extract
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; XPostBot/1.0)",
@@ -11,137 +17,191 @@ HEADERS = {
 MAX_CONTENT_LENGTH = 50_000
 
 
-def _is_cjk(text: str) -> bool:
-    cjk_count = sum(1 for c in text if "\u4e00" <= c <= "\u9fff" or "\u3040" <= c <= "\u30ff" or "\uac00" <= c <= "\ud7af")
-    return cjk_count > len(text) * 0.1
+def _revalidation_headers(cached: dict | None) -> dict:
+    headers = dict(HEADERS)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
 
+def _unchanged_page(url: str, cached: dict, resp: httpx.Response | None = None) -> dict:
+    """Reuse a cached page; images are omitted since they were harvested last time."""
+    return {
+        "url": url,
+        "title": cached.get("title", ""),
+        "content": cached.get("content", ""),
+        "images": [],
+        "internal_links": cached.get("internal_links", []),
+        "etag": (resp.headers.get("etag") if resp is not None else None) or cached.get("etag"),
+        "last_modified": (resp.headers.get("last-modified") if resp is not None else None)
+        or cached.get("last_modified"),
+        "content_hash": cached.get("content_hash"),
+        "cached_images": cached.get("images", []),
+        "unchanged": True,
+    }
 
-def _clean_text(text: str) -> str:
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
 
+@instrument("scrape_page")
+async def scrape_single_page(
+    client: httpx.AsyncClient,
+    url: str,
+    cached: dict | None = None,
+) -> dict:
+    """
+    Fetch and extract one page.
 
-async def scrape_single_page(client: httpx.AsyncClient, url: str) -> dict:
+    When ``cached`` holds the page's previous validators, the request is made
+    conditional and a 304 or an identical body hash short-circuits parsing.
+    """
     try:
-        resp = await client.get(url, headers=HEADERS, timeout=15, follow_redirects=True)
+        resp = await client.get(
+            url, headers=_revalidation_headers(cached), timeout=15, follow_redirects=True
+        )
+        if cached and resp.status_code == 304:
+            return _unchanged_page(url, cached, resp)
         resp.raise_for_status()
     except Exception as e:
         return {"url": url, "title": "", "content": "", "images": [], "error": str(e)}
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    # Remove noise
-    for tag in soup.find_all(["script", "style", "nav", "header", "footer", "aside"]):
-        tag.decompose()
-    for tag in soup.find_all(class_=re.compile(r"ad|popup|modal|cookie|banner", re.I)):
-        tag.decompose()
-
-    title = soup.title.string.strip() if soup.title and soup.title.string else ""
-
-    # Extract content from main content areas
-    content_el = (
-        soup.find("article")
-        or soup.find("main")
-        or soup.find(class_=re.compile(r"content|post|entry", re.I))
-        or soup.find("body")
-    )
-
-    content = _clean_text(content_el.get_text(" ", strip=True)) if content_el else ""
-
-    min_length = 30 if _is_cjk(content) else 100
-    if len(content) < min_length:
-        content = _clean_text(soup.get_text(" ", strip=True))
-
-    # Extract product images
-    images: list[dict] = []
-    for img in soup.find_all("img"):
-        src = img.get("src", "")
-        if not src:
-            continue
-        src = urljoin(url, src)
-
-        # Filter out small icons, logos, etc.
-        alt = img.get("alt", "")
-        width = img.get("width", "")
-        height = img.get("height", "")
-
-        # Skip tiny images
-        try:
-            if width and int(width) < 150:
-                continue
-            if height and int(height) < 150:
-                continue
-        except ValueError:
-            pass
-
-        # Skip common non-product images
-        src_lower = src.lower()
-        if any(skip in src_lower for skip in ["logo", "icon", "favicon", "sprite", "pixel", "tracking", "avatar"]):
-            continue
-
-        # Check for valid image extensions
-        path = urlparse(src).path.lower()
-        if not any(path.endswith(ext) for ext in [".jpg", ".jpeg", ".png", ".webp"]):
-            # Also accept URLs without extensions (could be CDN)
-            if "." in path.split("/")[-1] and not any(path.endswith(ext) for ext in [".jpg", ".jpeg", ".png", ".webp"]):
-                continue
-
-        images.append({"url": src, "alt": alt})
-
-    # Extract internal links
-    internal_links: list[str] = []
-    parsed_base = urlparse(url)
-    for a in soup.find_all("a", href=True):
-        href = urljoin(url, a["href"])
-        parsed = urlparse(href)
-        if parsed.netloc == parsed_base.netloc and parsed.path != parsed_base.path:
-            clean_href = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            if clean_href not in internal_links:
-                internal_links.append(clean_href)
-
-    return {
-        "url": url,
-        "title": title,
-        "content": content,
-        "images": images,
-        "internal_links": internal_links,
-    }
-
+    content_hash = hashlib.sha256(resp.content).hexdigest()
+    if cached and cached.get("content_hash") == content_hash:
+        return _unchanged_page(url, cached, resp)
+
+    page = await run_extract(resp.text, url)
+    if page.get("error"):
+        return page
+    page["etag"] = resp.headers.get("etag")
+    page["last_modified"] = resp.headers.get("last-modified")
+    page["content_hash"] = content_hash
+    page["unchanged"] = False
+    return page
+
+
+class _HostThrottle:
+    """Per-host politeness: caps in-flight requests and spaces out request starts."""
+
+    def __init__(self, concurrency: int, delay: float):
+        self._concurrency = max(1, concurrency)
+        self._delay = delay
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = urlparse(url).netloc
+        sem = self._slots.setdefault(host, asyncio.Semaphore(self._concurrency))
+        async with sem:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start_at = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start_at + self._delay
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+            yield
+
+
+@instrument("crawl")
+async def scrape_website(
+    url: str,
+    max_pages: int = 20,
+    page_cache: dict[str, dict] | None = None,
+) -> dict:
+    """
+    Crawl a site with a pool of concurrent workers.
+
+    The frontier is a FIFO queue with an O(1) seen-set, each host gets its own
+    concurrency cap and request spacing, and the whole crawl is bounded by
+    ``settings.crawl_deadline_seconds``. Pages are reported in discovery order
+    regardless of which worker finished first.
+
+    ``page_cache`` maps page URLs to the records returned in ``pages`` by a
+    previous crawl; those pages are revalidated instead of re-parsed.
+    """
+    page_cache = page_cache or {}
+    frontier: asyncio.Queue[str] = asyncio.Queue()
+    deferred: deque[str] = deque()
+    seen: dict[str, int] = {url: 0}
+    results: dict[int, dict] = {}
+    in_flight = 0
+    throttle = _HostThrottle(settings.crawl_per_host_concurrency, settings.crawl_per_host_delay)
+    frontier.put_nowait(url)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal in_flight
+        while True:
+            current_url = await frontier.get()
+            try:
+                if len(results) >= max_pages:
+                    continue
+                if len(results) + in_flight >= max_pages:
+                    # Budget is reserved by in-flight fetches; retry if one fails
+                    deferred.append(current_url)
+                    continue
+
+                in_flight += 1
+                try:
+                    async with throttle.slot(current_url):
+                        result = await scrape_single_page(
+                            client, current_url, page_cache.get(current_url)
+                        )
+                finally:
+                    in_flight -= 1
+
+                if result.get("error"):
+                    if deferred:
+                        frontier.put_nowait(deferred.popleft())
+                    continue
+
+                results[seen[current_url]] = result
+                for link in result.get("internal_links", []):
+                    if link not in seen:
+                        seen[link] = len(seen)
+                        frontier.put_nowait(link)
+            finally:
+                frontier.task_done()
+
+    client = get_http_client()
+    workers = [
+        asyncio.create_task(worker(client))
+        for _ in range(max(1, settings.crawl_concurrency))
+    ]
+    try:
+        async with asyncio.timeout(settings.crawl_deadline_seconds):
+            await frontier.join()
+    except TimeoutError:
+        pass
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
 
-async def scrape_website(url: str, max_pages: int = 20) -> dict:
-    visited: set[str] = set()
-    to_visit: list[str] = [url]
     all_content: list[str] = []
     all_images: list[dict] = []
-    pages_scraped = 0
-
-    async with httpx.AsyncClient() as client:
-        while to_visit and pages_scraped < max_pages:
-            current_url = to_visit.pop(0)
-            if current_url in visited:
-                continue
-            visited.add(current_url)
-
-            result = await scrape_single_page(client, current_url)
-            if result.get("error"):
-                continue
-
-            pages_scraped += 1
-            content = result["content"]
-            if content:
-                title = result.get("title", "")
-                all_content.append(f"## {title}\nSource: {current_url}\n\n{content}")
-
-            all_images.extend(result.get("images", []))
-
-            # Add internal links to visit
-            for link in result.get("internal_links", []):
-                if link not in visited and link not in to_visit:
-                    to_visit.append(link)
-
-            # Rate limiting
-            if to_visit:
-                await asyncio.sleep(0.2)
+    pages: list[dict] = []
+    pages_unchanged = 0
+    for index in sorted(results)[:max_pages]:
+        result = results[index]
+        pages.append({
+            "url": result["url"],
+            "title": result.get("title", ""),
+            "content": result["content"],
+            "images": result.get("cached_images", result.get("images", [])),
+            "internal_links": result.get("internal_links", []),
+            "etag": result.get("etag"),
+            "last_modified": result.get("last_modified"),
+            "content_hash": result.get("content_hash"),
+        })
+        if result.get("unchanged"):
+            pages_unchanged += 1
+        content = result["content"]
+        if content:
+            title = result.get("title", "")
+            all_content.append(f"## {title}\nSource: {result['url']}\n\n{content}")
+        all_images.extend(result.get("images", []))
+    pages_scraped = min(len(results), max_pages)
 
     combined = "\n\n---\n\n".join(all_content)
     if len(combined) > MAX_CONTENT_LENGTH:
@@ -159,5 +219,7 @@ async def scrape_website(url: str, max_pages: int = 20) -> dict:
         "success": True,
         "content": combined,
         "pages_scraped": pages_scraped,
+        "pages_unchanged": pages_unchanged,
         "images": unique_images[:50],  # Cap at 50 images
+        "pages": pages,
     }
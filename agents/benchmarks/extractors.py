@@ -0,0 +1,100 @@
+"""
+Compare HTML extractor backends on the checked-in corpus.
+
+Reports per-backend throughput and checks that every alternative backend
+produces the same output as the reference BeautifulSoup path.
+
+    python -m benchmarks.extractors [--iterations 50] [--strict]
+"""
+
+import argparse
+import json
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from app.tools.html_extract import extract_page_bs4, extract_page_lxml
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+BACKENDS = {
+    "bs4": extract_page_bs4,
+    "lxml": extract_page_lxml,
+}
+
+
+def load_corpus() -> list[tuple[str, str, str]]:
+    manifest = json.loads((CORPUS_DIR / "manifest.json").read_text())
+    return [
+        (name, url, (CORPUS_DIR / name).read_text(encoding="utf-8"))
+        for name, url in sorted(manifest.items())
+    ]
+
+
+def compare(reference: dict, candidate: dict) -> dict:
+    return {
+        "title": reference["title"] == candidate["title"],
+        "content": reference["content"] == candidate["content"],
+        "content_similarity": round(
+            SequenceMatcher(None, reference["content"], candidate["content"], autojunk=False).ratio(), 4
+        ),
+        "images": reference["images"] == candidate["images"],
+        "internal_links": reference["internal_links"] == candidate["internal_links"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--strict", action="store_true", help="exit non-zero on any parity mismatch")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    total_bytes = sum(len(html.encode("utf-8")) for _, _, html in corpus)
+
+    available = {}
+    for name, fn in BACKENDS.items():
+        try:
+            fn("<html></html>", "https://example.com/")
+        except ImportError as e:
+            print(f"{name:>6}: skipped ({e})")
+            continue
+        available[name] = fn
+
+    print(f"corpus: {len(corpus)} pages, {total_bytes / 1024:.1f} KiB, {args.iterations} iterations\n")
+    timings: dict[str, float] = {}
+    for name, fn in available.items():
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            for _, url, html in corpus:
+                fn(html, url)
+        timings[name] = time.perf_counter() - started
+        pages = len(corpus) * args.iterations
+        print(
+            f"{name:>6}: {pages / timings[name]:8.1f} pages/s  "
+            f"{total_bytes * args.iterations / timings[name] / 2**20:6.2f} MiB/s"
+        )
+    if "bs4" in timings:
+        for name, elapsed in timings.items():
+            if name != "bs4":
+                print(f"{name:>6}: {timings['bs4'] / elapsed:.2f}x vs bs4")
+
+    mismatches = 0
+    print("\nparity vs bs4:")
+    for name, fn in available.items():
+        if name == "bs4":
+            continue
+        for page, url, html in corpus:
+            result = compare(extract_page_bs4(html, url), fn(html, url))
+            ok = all(v for k, v in result.items() if k != "content_similarity")
+            mismatches += not ok
+            status = "ok" if ok else "MISMATCH " + ", ".join(
+                k for k, v in result.items() if v is False
+            )
+            print(f"  {name:>6} {page:<22} similarity={result['content_similarity']:.4f}  {status}")
+
+    return 1 if args.strict and mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
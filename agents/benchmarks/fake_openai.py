@@ -0,0 +1,125 @@
+"""
+OpenAI-compatible stub for offline benchmarks.
+
+Serves ``POST /v1/chat/completions`` (streaming and non-streaming) with a
+configurable time-to-first-token and generation rate, and returns plausible
+output for each pipeline stage: tweet drafts, numbered suggestions, and an
+image id picked from the prompt. Usage is reported so the rate governor
+can settle its token estimates.
+
+    python -m benchmarks.fake_openai --port 8901 --ttft 0.3 --tokens-per-second 60
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+IMAGE_ID_RE = re.compile(r"ID: (\S+)")
+COUNT_RE = re.compile(r"exactly (\d+) distinct")
+WORDS = (
+    "Discover how our handmade goods are built to last and why customers keep coming back "
+    "for the quality craftsmanship behind every piece we ship worldwide"
+).split()
+
+
+def _reply(messages: list[dict]) -> str:
+    system = messages[0].get("content", "") if messages else ""
+    user = messages[-1].get("content", "") if messages else ""
+    if "AVAILABLE IMAGES" in user:
+        match = IMAGE_ID_RE.search(user)
+        return match.group(1) if match else "NONE"
+    count = COUNT_RE.search(system)
+    if count:
+        return "\n".join(
+            f"{i + 1}. {' '.join(WORDS[i:i + 14])} #craft" for i in range(int(count.group(1)))
+        )
+    return " ".join(WORDS[:18]) + " #handmade"
+
+
+def _tokens(text: str) -> list[str]:
+    # Roughly one token per word, keeping the separating spaces
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def create_app(ttft: float = 0.3, tokens_per_second: float = 60.0) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        messages = body.get("messages", [])
+        text = _reply(messages)
+        tokens = _tokens(text)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        created = int(time.time())
+        model = body.get("model", "gpt-4o")
+        delay = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + delay * len(tokens))
+            return JSONResponse({
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        async def stream():
+            def chunk(delta: dict, finish: str | None = None, with_usage: bool = False) -> str:
+                payload = {
+                    "id": "chatcmpl-bench",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [] if with_usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+                }
+                if with_usage:
+                    payload["usage"] = usage
+                return f"data: {json.dumps(payload)}\n\n"
+
+            await asyncio.sleep(ttft)
+            yield chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                yield chunk({"content": token})
+                await asyncio.sleep(delay)
+            yield chunk({}, finish="stop")
+            if body.get("stream_options", {}).get("include_usage"):
+                yield chunk({}, with_usage=True)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.ttft, args.tokens_per_second), port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Synthetic multi-page website for offline benchmarks.
+
+``/`` links to every page; each page has product copy, links to its
+neighbours, and one product image. Images are generated with Pillow and
+pages honour ``If-None-Match``, so crawl-cache revalidation can be
+measured too.
+
+    python -m benchmarks.fixture_site --port 8902 --pages 20
+"""
+
+import argparse
+import hashlib
+import io
+
+import numpy as np
+from fastapi import FastAPI, Request, Response
+from PIL import Image
+
+PARAGRAPH = (
+    "Our workshop makes durable leather goods by hand. Each product is cut, stitched and "
+    "finished by one craftsperson, and we publish the story behind every piece. "
+)
+
+
+def _page(i: int, pages: int) -> str:
+    links = "".join(
+        f'<a href="/p{j}.html">Product {j}</a> ' for j in ((i - 1) % pages, (i + 1) % pages)
+    )
+    body = f"<p>Product {i}: {PARAGRAPH * 6}</p>" * 3
+    return (
+        f"<html><head><title>Product {i}</title></head><body>"
+        f"<nav><a href=\"/\">Home</a></nav><main><article><h1>Product {i}</h1>{body}"
+        f'<img src="/img/{i}.jpg" alt="Product {i} photo" width="600" height="400">'
+        f"</article></main><div>{links}</div><footer>Footer</footer></body></html>"
+    )
+
+
+def _index(pages: int) -> str:
+    links = "".join(f'<li><a href="/p{i}.html">Product {i}</a></li>' for i in range(pages))
+    return (
+        "<html><head><title>Fixture Shop</title></head><body><main>"
+        f"<h1>Fixture Shop</h1><p>{PARAGRAPH * 3}</p><ul>{links}</ul>"
+        "</main></body></html>"
+    )
+
+
+def _image(i: int) -> bytes:
+    # Distinct pattern per product so perceptual-hash dedup keeps them all
+    y, x = np.mgrid[0:400, 0:600]
+    pixels = np.stack(
+        [(x * (i + 1)) % 256, (y * 3 + i * 40) % 256, ((x // (i + 2)) ^ (y // 7)) * 9 % 256],
+        axis=-1,
+    ).astype(np.uint8)
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, format="JPEG", quality=80)
+    return output.getvalue()
+
+
+def create_app(pages: int = 20) -> FastAPI:
+    app = FastAPI()
+    documents = {"/": _index(pages), **{f"/p{i}.html": _page(i, pages) for i in range(pages)}}
+    images: dict[int, bytes] = {}
+
+    def respond(request: Request, content: bytes, media_type: str) -> Response:
+        etag = '"' + hashlib.sha256(content).hexdigest()[:16] + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=content, media_type=media_type, headers={"ETag": etag})
+
+    @app.get("/img/{i}.jpg")
+    async def image(i: int, request: Request):
+        if not 0 <= i < pages:
+            return Response(status_code=404)
+        if i not in images:
+            images[i] = _image(i)
+        return respond(request, images[i], "image/jpeg")
+
+    @app.get("/{path:path}")
+    async def document(path: str, request: Request):
+        html = documents.get("/" + path)
+        if html is None:
+            return Response(status_code=404)
+        return respond(request, html.encode("utf-8"), "text/html; charset=utf-8")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8902)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.pages), port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
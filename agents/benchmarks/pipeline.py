@@ -0,0 +1,313 @@
+"""
+Offline end-to-end benchmark for the generation pipeline.
+
+Starts the OpenAI stub and the fixture website on local ports, points the
+service at them and at a scratch database (SQLite by default), then drives
+``run_pipeline``, ``/generate``, ``/generate/stream`` and
+``/batch-generate`` at the requested concurrency. Reports p50/p95/p99
+latency per stage; ``--json`` saves the report and ``--baseline`` fails
+the run when any p95 regressed by more than ``--tolerance``. The SQLite
+default needs the ``bench`` extra (``pip install -e ".[bench]"``).
+
+    python -m benchmarks.pipeline [--requests 20] [--concurrency 4] [--ttft 0.3]
+    python -m benchmarks.pipeline --json bench.json
+    python -m benchmarks.pipeline --baseline bench.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+import httpx
+import uvicorn
+
+from . import fake_openai, fixture_site
+
+API_SECRET = "bench"
+PROMPTS = [
+    "Share a tip about caring for leather",
+    "Announce our handmade craftsmanship",
+    "Why durable goods beat fast fashion",
+    "Behind the scenes in the workshop",
+    None,
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _serve(app, port: int) -> tuple[uvicorn.Server, asyncio.Task]:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.samples.setdefault(name, []).append(seconds)
+
+    def error(self, name: str) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self) -> dict:
+        return {
+            name: {
+                "n": len(values),
+                "errors": self.errors.get(name.split("/")[0], 0),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": max(values),
+            }
+            for name, values in self.samples.items()
+        }
+
+
+async def _run_concurrently(total: int, concurrency: int, fn: Callable[[int], Awaitable[None]]) -> None:
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with limit:
+            await fn(i)
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+
+
+async def bench_pipeline(recorder: Recorder, user_id: str, total: int, concurrency: int, name: str) -> None:
+    from app.agents.pipeline import run_pipeline
+
+    async def one(i: int) -> None:
+        marks = [time.perf_counter()]
+        stages: list[str] = []
+
+        def on_event(event: str, data: dict) -> None:
+            if event == "stage":
+                marks.append(time.perf_counter())
+                stages.append(data["stage"])
+
+        result = await run_pipeline(user_id=user_id, prompt=PROMPTS[i % len(PROMPTS)], on_event=on_event)
+        end = time.perf_counter()
+        if not result.success:
+            recorder.error(name)
+            return
+        for stage, start, finish in zip(stages, marks, marks[1:]):
+            recorder.add(f"{name}/{stage}", finish - start)
+        recorder.add(f"{name}/total", end - marks[0])
+
+    await _run_concurrently(total, concurrency, one)
+
+
+async def bench_http(
+    recorder: Recorder, client: httpx.AsyncClient, user_id: str, args: argparse.Namespace
+) -> None:
+    headers = {"Authorization": f"Bearer {API_SECRET}"}
+
+    async def generate(i: int) -> None:
+        started = time.perf_counter()
+        resp = await client.post(
+            "/generate", json={"user_id": user_id, "prompt": PROMPTS[i % len(PROMPTS)]}, headers=headers
+        )
+        if resp.status_code != 200 or not resp.json().get("success"):
+            recorder.error("http_generate")
+            return
+        recorder.add("http_generate/total", time.perf_counter() - started)
+
+    async def stream(i: int) -> None:
+        started = time.perf_counter()
+        first_token: float | None = None
+        ok = False
+        async with client.stream(
+            "POST",
+            "/generate/stream",
+            json={"user_id": user_id, "prompt": PROMPTS[i % len(PROMPTS)]},
+            headers=headers,
+        ) as resp:
+            event = ""
+            async for line in resp.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[7:]
+                    if event == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                elif line.startswith("data: ") and event == "result":
+                    ok = json.loads(line[6:]).get("success", False)
+        if not ok:
+            recorder.error("http_generate_stream")
+            return
+        if first_token is not None:
+            recorder.add("http_generate_stream/first_token", first_token)
+        recorder.add("http_generate_stream/total", time.perf_counter() - started)
+
+    async def batch(i: int) -> None:
+        started = time.perf_counter()
+        resp = await client.post(
+            "/batch-generate", json={"user_id": user_id, "count": args.batch_count}, headers=headers
+        )
+        body = resp.json()
+        if resp.status_code != 200 or not body.get("success"):
+            recorder.error("http_batch_generate")
+            return
+        recorder.add("http_batch_generate/total", time.perf_counter() - started)
+
+    await _run_concurrently(args.requests, args.concurrency, generate)
+    await _run_concurrently(args.requests, args.concurrency, stream)
+    await _run_concurrently(args.batch_requests, args.concurrency, batch)
+
+
+async def seed(site_url: str) -> str:
+    from app.database import async_session, engine
+    from app.models import Base, KnowledgeSource
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    user_id = f"bench-{uuid.uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    async with async_session() as session:
+        session.add(KnowledgeSource(
+            id=f"{user_id}-site",
+            url=site_url,
+            name="Fixture Shop",
+            content="",
+            userId=user_id,
+            isActive=True,
+            createdAt=now,
+            updatedAt=now,
+        ))
+        await session.commit()
+    return user_id
+
+
+async def run(args: argparse.Namespace) -> dict:
+    openai_port, site_port = _free_port(), _free_port()
+    servers = [
+        await _serve(fake_openai.create_app(args.ttft, args.tokens_per_second), openai_port),
+        await _serve(fixture_site.create_app(args.pages), site_port),
+    ]
+
+    # Settings are read at import time, so configure before importing the app.
+    # The stub never rate-limits, so the governor is opened up unless asked.
+    os.environ.update(
+        DATABASE_URL=args.database_url,
+        OPENAI_API_KEY="bench",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{openai_port}/v1",
+        AGENT_API_SECRET=API_SECRET,
+        LLM_CACHE_ENABLED="true" if args.llm_cache else "false",
+        LLM_RPM_LIMIT=str(args.rpm),
+        LLM_TPM_LIMIT=str(args.tpm),
+    )
+
+    recorder = Recorder()
+    try:
+        user_id = await seed(f"http://127.0.0.1:{site_port}/")
+
+        from app.main import app
+
+        # Served over a real socket: ASGITransport buffers streamed responses
+        app_port = _free_port()
+        servers.append(await _serve(app, app_port))
+
+        # First run crawls the fixture site inline
+        await bench_pipeline(recorder, user_id, 1, 1, "cold_pipeline")
+        await bench_pipeline(recorder, user_id, args.requests, args.concurrency, "pipeline")
+        if not args.skip_http:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=None) as client:
+                await bench_http(recorder, client, user_id, args)
+    finally:
+        for server, task in reversed(servers):
+            server.should_exit = True
+            await task
+
+    return recorder.report()
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'stage':<36}{'n':>5}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in report.items():
+        print(
+            f"{name:<36}{row['n']:>5}{row['errors']:>5}"
+            + "".join(f"{row[k] * 1000:>10.1f}" for k in ("p50", "p95", "p99", "max"))
+        )
+
+
+def compare_baseline(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, row in report.items():
+        before = baseline.get(name)
+        if before and before["p95"] > 0 and row["p95"] > before["p95"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {before['p95'] * 1000:.1f} -> {row['p95'] * 1000:.1f} ms"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-requests", type=int, default=2)
+    parser.add_argument("--batch-count", type=int, default=5, help="posts per batch request")
+    parser.add_argument("--pages", type=int, default=20, help="pages on the fixture site")
+    parser.add_argument("--ttft", type=float, default=0.3, help="stub seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--rpm", type=int, default=1_000_000, help="LLM governor requests per minute")
+    parser.add_argument("--tpm", type=int, default=1_000_000_000, help="LLM governor tokens per minute")
+    parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on")
+    parser.add_argument("--skip-http", action="store_true", help="only drive run_pipeline directly")
+    parser.add_argument(
+        "--database-url",
+        help="defaults to a scratch SQLite file; a Postgres URL must point at a disposable database",
+    )
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="compare against a report written with --json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown vs baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.database_url:
+            args.database_url = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        started = time.perf_counter()
+        report = asyncio.run(run(args))
+        print_report(report)
+        print(f"\nwall time {time.perf_counter() - started:.1f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nregressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
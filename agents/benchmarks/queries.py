@@ -0,0 +1,167 @@
+"""
+Count the SQL statements one generation's Database Manager stage issues.
+
+Seeds a scratch SQLite database with a user's knowledge sources (large
+``content``) and media, then runs ``run_database_manager`` with a cold and a
+warm knowledge-index cache, and the ``/batch-generate`` preflight plus batch
+preparation. Statements are captured with SQLAlchemy cursor events; the
+report shows totals, how many touch ``KnowledgeSource``, and how many of
+those read its ``content`` column. Needs the ``bench`` extra (aiosqlite):
+``pip install -e ".[bench]"``.
+
+    python -m benchmarks.queries [--sources 8] [--content-kb 50] [--verbose]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+SOURCE_TABLE = '"KnowledgeSource"'
+# The full column, not a length(...) over it
+CONTENT_COLUMN_RE = re.compile(r'(?<!length\()"KnowledgeSource"\.content\b')
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.statements: list[str] = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(" ".join(statement.split()))
+
+    def reset(self) -> list[str]:
+        statements, self.statements = self.statements, []
+        return statements
+
+
+def summarize(statements: list[str]) -> dict:
+    selects = [s for s in statements if s.startswith("SELECT")]
+    source_reads = [s for s in selects if SOURCE_TABLE in s.split(" WHERE ")[0]]
+    return {
+        "statements": len(statements),
+        "selects": len(selects),
+        "source_selects": len(source_reads),
+        "content_reads": sum(bool(CONTENT_COLUMN_RE.search(s.split(" FROM ")[0])) for s in source_reads),
+    }
+
+
+async def seed(n_sources: int, content_kb: int) -> str:
+    from app.database import async_session, engine
+    from app.models import Base, KnowledgeSource, MediaAsset
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    user_id = "bench-user"
+    now = datetime.now(timezone.utc)
+    paragraph = "Our workshop makes durable leather goods by hand. Each piece is stitched by one craftsperson. "
+    content = "\n\n---\n\n".join(
+        paragraph * max(1, content_kb * 1024 // len(paragraph) // 4) for _ in range(4)
+    )
+    async with async_session() as session:
+        for i in range(n_sources):
+            session.add(KnowledgeSource(
+                id=f"src-{i}",
+                url=f"https://example{i}.com/",
+                name=f"Source {i}",
+                content=content,
+                userId=user_id,
+                isActive=True,
+                # The last source is stale and gets queued for a background refresh
+                lastScraped=now - timedelta(days=30 if i == n_sources - 1 else 1),
+                createdAt=now,
+                updatedAt=now,
+            ))
+        for i in range(30):
+            session.add(MediaAsset(
+                id=f"img-{i}",
+                sourceUrl=f"https://example0.com/img/{i}.jpg",
+                mimeType="image/jpeg",
+                altText=f"Product {i}",
+                isActive=True,
+                userId=user_id,
+                createdAt=now,
+            ))
+        await session.commit()
+    return user_id
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from app.agents.batch_pipeline import prepare_batch
+    from app.agents.database_manager import run_database_manager
+    from app.database import async_session, engine
+    from app.routers.batch import batch_generate
+    from app.schemas import BatchGenerateRequest
+
+    user_id = await seed(args.sources, args.content_kb)
+    counter = QueryCounter(engine)
+    report: dict[str, dict] = {}
+
+    async def measure(name: str, fn) -> None:
+        counter.reset()
+        await fn()
+        statements = counter.reset()
+        report[name] = summarize(statements)
+        if args.verbose:
+            print(f"\n-- {name}")
+            for statement in statements:
+                print(f"   {statement[:160]}")
+
+    async def database_manager() -> None:
+        async with async_session() as session:
+            await run_database_manager(session, user_id, prompt="leather care")
+
+    async def batch_preflight() -> None:
+        # /batch-generate up to the point where posts are drafted
+        import app.agents.batch_pipeline as batch_pipeline
+
+        async def stop_after_prepare(user_id: str, count: int, schedule_times=None, **kwargs) -> dict:
+            await prepare_batch(user_id, **kwargs)
+            return {"post_ids": [], "errors": [], "log": ""}
+
+        original = batch_pipeline.run_batch_pipeline
+        import app.routers.batch as batch_router
+        batch_router.run_batch_pipeline = stop_after_prepare
+        try:
+            await batch_generate(BatchGenerateRequest(user_id=user_id, count=1))
+        finally:
+            batch_router.run_batch_pipeline = original
+
+    await measure("database_manager (cold index)", database_manager)
+    await measure("database_manager (warm index)", database_manager)
+    await measure("batch_generate preflight (warm)", batch_preflight)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sources", type=int, default=8)
+    parser.add_argument("--content-kb", type=int, default=50, help="content size per source")
+    parser.add_argument("--verbose", action="store_true", help="print every statement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings are read at import time, so configure before importing the app
+        os.environ.update(
+            DATABASE_URL=f"sqlite+aiosqlite:///{tmp}/queries.db",
+            OPENAI_API_KEY="bench",
+        )
+        report = asyncio.run(run(args))
+
+    print(f"\n{'scenario':<34}{'stmts':>7}{'selects':>9}{'source':>8}{'content':>9}")
+    for name, row in report.items():
+        print(
+            f"{name:<34}{row['statements']:>7}{row['selects']:>9}"
+            f"{row['source_selects']:>8}{row['content_reads']:>9}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+import os
+
+# Settings are read at import time; these unit tests touch neither the
+# database nor the OpenAI API, so placeholders are enough.
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://test@localhost/test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,66 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.routers import batch
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: int | None = None):
+        self.checks = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        self.checks += 1
+        return self.disconnect_after is not None and self.checks > self.disconnect_after
+
+
+@pytest.fixture
+def job_status(monkeypatch):
+    """The job stays running (with changing progress) unless the test finishes it."""
+    state = {"status": "running", "polls": 0}
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    async def get_batch_job(session, job_id):
+        state["polls"] += 1
+        return {"job_id": job_id, "status": state["status"], "completed": state["polls"]}
+
+    monkeypatch.setattr(batch, "async_session", session)
+    monkeypatch.setattr(batch, "get_batch_job", get_batch_job)
+    monkeypatch.setattr(batch, "EVENTS_POLL_SECONDS", 0)
+    return state
+
+
+def _collect(request: FakeRequest) -> list[str]:
+    async def run():
+        response = await batch.stream_batch("job", request)
+        return [chunk async for chunk in response.body_iterator]
+
+    return asyncio.run(run())
+
+
+def test_stream_stops_when_client_disconnects(job_status):
+    events = _collect(FakeRequest(disconnect_after=3))
+
+    assert len(events) == 3
+    assert all(event.startswith("event: progress") for event in events)
+
+
+def test_stream_ends_with_done_for_finished_job(job_status):
+    job_status["status"] = "partial"
+
+    events = _collect(FakeRequest())
+
+    assert len(events) == 1 and events[0].startswith("event: done")
+
+
+def test_stream_times_out(job_status, monkeypatch):
+    monkeypatch.setattr(batch, "EVENTS_MAX_SECONDS", 0)
+
+    events = _collect(FakeRequest())
+
+    assert len(events) == 1 and events[0].startswith("event: timeout")
@@ -0,0 +1,70 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.agents import batch_worker as worker_module
+from app.agents.batch_worker import BatchWorker
+from app.config import settings
+from app.models import BatchJob
+from app.tools.batch_job_queue import retry_at
+
+
+class _Rows:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+@pytest.fixture
+def job(monkeypatch):
+    """A three-post job whose items are all pending; generation always succeeds."""
+    pending = [("item-0", 0), ("item-1", 1), ("item-2", 2)]
+
+    class Session:
+        async def execute(self, statement):
+            return _Rows(pending)
+
+    @asynccontextmanager
+    async def session():
+        yield Session()
+
+    async def prepare_batch(user_id):
+        return {"knowledge_context": "Leather goods", "post_index": None, "siblings": None}
+
+    async def generate_batch_post(batch, user_id, position, count):
+        return {"final_content": f"Post {position}"}
+
+    monkeypatch.setattr(worker_module, "async_session", session)
+    monkeypatch.setattr(worker_module, "prepare_batch", prepare_batch)
+    monkeypatch.setattr(worker_module, "generate_batch_post", generate_batch_post)
+    monkeypatch.setattr(worker_module, "register_post", lambda batch, post_id, content: (None, None))
+    return BatchJob(id="job", count=3, scheduleTimes=None, userId="u")
+
+
+def test_failed_write_lets_siblings_finish_before_raising(job):
+    finished: list[str] = []
+
+    async def finish_item(item_id, post=None, error=None):
+        if item_id == "item-0":
+            raise ConnectionError("database went away")
+        await asyncio.sleep(0.01)
+        finished.append(item_id)
+
+    worker = BatchWorker(concurrency=1, poll_seconds=1)
+    worker._finish_item = finish_item
+
+    with pytest.raises(RuntimeError, match="1 of 3 posts could not be recorded"):
+        asyncio.run(worker._generate(job))
+    assert sorted(finished) == ["item-1", "item-2"]
+
+
+def test_retry_backoff_doubles_per_attempt(monkeypatch):
+    monkeypatch.setattr(settings, "batch_retry_backoff_seconds", 10.0)
+    now = datetime.now(timezone.utc)
+
+    assert retry_at(1) - now == pytest.approx(timedelta(seconds=10), abs=timedelta(seconds=1))
+    assert retry_at(3) - now == pytest.approx(timedelta(seconds=40), abs=timedelta(seconds=1))
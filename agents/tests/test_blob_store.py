@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.blob_store import LocalBlobStore, S3BlobStore, blob_key
+
+DATA = b"\x89PNG\r\n\x1a\n fake image bytes"
+
+
+def test_local_round_trip(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+
+    key = asyncio.run(store.put(DATA, "image/png"))
+
+    assert key == blob_key(DATA)
+    assert (tmp_path / key[:2] / key[2:4] / key).read_bytes() == DATA
+    assert asyncio.run(store.exists(key))
+    assert asyncio.run(store.get(key)) == DATA
+
+
+def test_local_put_is_idempotent(tmp_path, monkeypatch):
+    store = LocalBlobStore(str(tmp_path))
+    writes: list[str] = []
+    write = store._write
+
+    async def counting_write(key, data, content_type):
+        writes.append(key)
+        await write(key, data, content_type)
+
+    monkeypatch.setattr(store, "_write", counting_write)
+
+    first = asyncio.run(store.put(DATA))
+    second = asyncio.run(store.put(DATA))
+
+    assert first == second
+    assert writes == [first]
+    # No temporary files left behind next to the blob
+    assert [p.name for p in (tmp_path / first[:2] / first[2:4]).iterdir()] == [first]
+
+
+def test_local_missing_and_invalid_keys(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    missing = blob_key(b"never stored")
+
+    assert asyncio.run(store.get(missing)) is None
+    assert not asyncio.run(store.exists(missing))
+    with pytest.raises(ValueError):
+        asyncio.run(store.get("../../etc/passwd"))
+
+
+@pytest.fixture
+def s3_store():
+    moto = pytest.importorskip("moto")
+    import boto3
+
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="media")
+        yield S3BlobStore(bucket="media", prefix="media/", region="us-east-1")
+
+
+def test_s3_round_trip_keeps_content_type(s3_store):
+    key = asyncio.run(s3_store.put(DATA, "image/png"))
+
+    assert asyncio.run(s3_store.get(key)) == DATA
+    head = s3_store._client.head_object(Bucket="media", Key=f"media/{key}")
+    assert head["ContentType"] == "image/png"
+
+
+def test_s3_put_is_idempotent_and_missing_key(s3_store, monkeypatch):
+    key = asyncio.run(s3_store.put(DATA))
+    monkeypatch.setattr(s3_store, "_write", pytest.fail)
+
+    assert asyncio.run(s3_store.put(DATA)) == key
+    missing = blob_key(b"never stored")
+    assert asyncio.run(s3_store.get(missing)) is None
+    assert not asyncio.run(s3_store.exists(missing))
+
+
+def test_media_route_serves_asset_type_with_private_caching(tmp_path, monkeypatch):
+    from contextlib import asynccontextmanager
+
+    from app.routers import media
+
+    store = LocalBlobStore(str(tmp_path))
+    key = asyncio.run(store.put(DATA, "image/png"))
+
+    class Result:
+        def scalar_one_or_none(self):
+            return "image/png"
+
+    class Session:
+        async def execute(self, statement):
+            return Result()
+
+    @asynccontextmanager
+    async def session():
+        yield Session()
+
+    monkeypatch.setattr(media, "get_blob_store", lambda: store)
+    monkeypatch.setattr(media, "async_session", session)
+
+    response = asyncio.run(media.get_media_blob(key))
+
+    assert response.body == DATA
+    assert response.media_type == "image/png"
+    assert response.headers["cache-control"].startswith("private")
@@ -0,0 +1,58 @@
+from app.cache import LRUCache
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_bounds_entries_and_skips_oversized_values():
+    cache = LRUCache(max_bytes=100)
+    cache.set("a", "x", size=60)
+    cache.set("b", "y", size=60)
+    cache.set("huge", "z", size=101)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "y"
+    assert cache.get("huge") is None
+    assert cache.stats()["bytes"] == 60
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(ttl=10)
+    cache.set("a", 1)
+
+    now[0] += 5
+    assert cache.get("a") == 1
+    now[0] += 6
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_pop_and_stats():
+    cache = LRUCache()
+    for key in ["u1", "u2"]:
+        cache.set(key, key, size=10)
+
+    cache.pop("u1")
+    cache.pop("missing")
+    assert cache.get("u2") == "u2"
+    assert cache.get("u1") is None
+    assert cache.stats() == {
+        "entries": 1,
+        "bytes": 10,
+        "max_bytes": cache.max_bytes,
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+        "evictions": 0,
+    }
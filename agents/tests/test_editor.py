@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.agents import editor
+from app.config import settings
+
+IMAGES = [
+    {"id": "wallet", "alt": "Brown leather wallet", "url": "https://shop.test/img/wallet.jpg"},
+    {"id": "team", "alt": "Our workshop team", "url": "https://shop.test/img/team.jpg"},
+]
+
+
+@pytest.fixture
+def fake_complete(monkeypatch):
+    """Replace the LLM: edits map draft -> refined text, image picks are recorded."""
+    edits: dict[str, str | Exception] = {}
+    image_prompts: list[str] = []
+
+    async def complete(llm, messages, stage, on_token=None):
+        prompt = messages[-1].content
+        if stage == "image_select":
+            image_prompts.append(prompt)
+            return "NONE"
+        draft = prompt.removeprefix("DRAFT TWEET:\n")
+        result = edits.get(draft, draft)
+        await asyncio.sleep(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(editor, "complete", complete)
+    monkeypatch.setattr(editor, "get_chat_model", lambda *args, **kwargs: None)
+    return edits, image_prompts
+
+
+def test_multiple_keeps_order_and_tolerates_partial_failure(fake_complete):
+    edits, _ = fake_complete
+    edits.update({"a": "A!", "b": RuntimeError("boom"), "c": "C!"})
+
+    result = asyncio.run(editor.run_editor("a", ["a", "b", "c"], [], multiple=True))
+
+    assert result["suggestions"] == ["A!", "b", "C!"]
+    assert result["final_content"] == "A!"
+    assert "kept 1 unrefined" in result["log"]
+
+
+def test_every_refinement_failing_raises(fake_complete):
+    edits, _ = fake_complete
+    edits.update({"a": RuntimeError("a"), "b": RuntimeError("b")})
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(editor.run_editor("a", ["a", "b"], [], multiple=True))
+
+
+def test_single_mode_chooses_image_for_edited_tweet(fake_complete, monkeypatch):
+    monkeypatch.setattr(settings, "image_select_mode", "local")
+    edits, _ = fake_complete
+    # The draft talks about the team; the edit turns it into a wallet post
+    edits["Meet the team"] = "Our new leather wallet is here"
+
+    result = asyncio.run(editor.run_editor("Meet the team", [], IMAGES))
+
+    assert result["final_content"] == "Our new leather wallet is here"
+    assert result["media_asset_id"] == "wallet"
+
+
+def test_hybrid_fallback_asks_llm_about_final_tweet(fake_complete, monkeypatch):
+    monkeypatch.setattr(settings, "image_select_mode", "hybrid")
+    edits, image_prompts = fake_complete
+    edits["Meet the team"] = "Happy holidays from all of us"
+
+    result = asyncio.run(editor.run_editor("Meet the team", [], IMAGES))
+
+    # No local winner for the edited text, so the LLM decides, and it sees the edit
+    assert result["media_asset_id"] is None
+    assert len(image_prompts) == 1
+    assert image_prompts[0].startswith("TWEET:\nHappy holidays from all of us")
+
+
+def test_local_match_skips_llm(fake_complete, monkeypatch):
+    monkeypatch.setattr(settings, "image_select_mode", "hybrid")
+    edits, image_prompts = fake_complete
+    edits["draft"] = "Meet the team behind every stitch in our workshop"
+
+    result = asyncio.run(editor.run_editor("draft", [], IMAGES))
+
+    assert result["media_asset_id"] == "team"
+    assert image_prompts == []
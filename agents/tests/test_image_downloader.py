@@ -0,0 +1,44 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from app.tools.image_downloader import _sniff_size, perceptual_hash
+from app.tools.image_harvester import phash_distance
+
+
+def _picture(size=(400, 300), shapes=((50, 50, 200, 250),)) -> Image.Image:
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    for box in shapes:
+        draw.ellipse(box, fill="black")
+    return img
+
+
+def test_perceptual_hash_survives_resize_and_reencode():
+    original = _picture()
+    buffer = io.BytesIO()
+    original.resize((800, 600)).save(buffer, format="JPEG", quality=60)
+    copy = Image.open(io.BytesIO(buffer.getvalue()))
+
+    assert phash_distance(perceptual_hash(original), perceptual_hash(copy)) <= 4
+
+
+def test_perceptual_hash_separates_different_images():
+    left = _picture(shapes=((20, 20, 150, 280),))
+    right = _picture(shapes=((250, 20, 380, 280),))
+
+    assert phash_distance(perceptual_hash(left), perceptual_hash(right)) > 10
+
+
+def test_perceptual_hash_fits_signed_bigint():
+    for img in (_picture(), Image.new("RGB", (300, 300), "black"), Image.linear_gradient("L")):
+        assert -(1 << 63) <= perceptual_hash(img) < 1 << 63
+
+
+def test_sniff_size_reads_header_only():
+    buffer = io.BytesIO()
+    Image.new("RGB", (4000, 3000)).save(buffer, format="JPEG")
+    data = buffer.getvalue()
+
+    assert _sniff_size(bytearray(data[:20])) is None
+    assert _sniff_size(bytearray(data[:4096])) == (4000, 3000)
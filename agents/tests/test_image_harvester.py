@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.tools import image_harvester
+from app.tools.post_index import PostIndex
+
+EXISTING = 0x0F0F_0F0F_0F0F_0F0F
+
+
+class FakeSession:
+    """Answers the already-stored URL lookup with nothing and records inserts."""
+
+    def __init__(self):
+        self.inserted: list[dict] = []
+
+    async def execute(self, statement, params=None):
+        if params is not None:
+            self.inserted.extend(params)
+
+        class Rows:
+            def all(self):
+                return []
+
+        return Rows()
+
+
+@pytest.fixture
+def harvest(monkeypatch):
+    """Run harvest_images over images whose hash is given in their URL (``.../<hex>``)."""
+    known = PostIndex(settings.image_phash_max_distance)
+    known.add("existing", EXISTING)
+    downloaded: list[str] = []
+
+    async def get_phash_index(session, user_id):
+        return known
+
+    async def download(url):
+        downloaded.append(url)
+        await asyncio.sleep(0)
+        return {
+            "data": b"img",
+            "mime_type": "image/jpeg",
+            "width": 800,
+            "height": 600,
+            "phash": int(url.rsplit("/", 1)[1], 16),
+        }
+
+    monkeypatch.setattr(image_harvester, "get_phash_index", get_phash_index)
+    monkeypatch.setattr(image_harvester, "download_and_validate_image", download)
+    monkeypatch.setattr(image_harvester, "get_blob_store", lambda: None)
+
+    def run(hashes: list[int], limit: int = image_harvester.MAX_IMAGES_PER_SOURCE):
+        session = FakeSession()
+        images = [{"url": f"https://shop.test/img/{h:x}", "alt": ""} for h in hashes]
+        count = asyncio.run(image_harvester.harvest_images(session, "u", images, limit=limit))
+        return count, [row["phash"] for row in session.inserted], known, downloaded
+
+    return run
+
+
+def test_skips_images_near_existing_or_earlier_ones(harvest):
+    new = 0x7777_0000_7777_0000
+    count, stored, known, _ = harvest([EXISTING ^ 0b11, new, new ^ 0b1, 0x1234_5678_9ABC_DEF0])
+
+    assert count == 2
+    assert stored == [new, 0x1234_5678_9ABC_DEF0]
+    # Uncommitted hashes stay out of the cached index
+    assert known.size == 1
+
+
+def test_stops_downloading_once_limit_is_reached(harvest, monkeypatch):
+    monkeypatch.setattr(settings, "image_download_concurrency", 1)
+    hashes = [0x0101_0101_0101_0101 * i for i in range(1, 11)]
+
+    count, stored, _, downloaded = harvest(hashes, limit=2)
+
+    assert stored == hashes[:2]
+    # At most the one download already admitted when the limit was reached
+    assert len(downloaded) <= 3
@@ -0,0 +1,33 @@
+from app.tools.image_matcher import image_terms, match_image
+
+IMAGES = [
+    {"id": "wallet", "alt": "Brown leather wallet", "url": "https://shop.test/img/products/leather-wallet-1200x800.jpg"},
+    {"id": "belt", "alt": "", "url": "https://shop.test/uploads/2024/05/black-belt.png"},
+    {"id": "team", "alt": "Our workshop team", "url": "https://shop.test/media/a1b2c3d4e5f6.jpg"},
+]
+
+
+def test_image_terms_drop_noise_and_opaque_path_parts():
+    terms = image_terms(IMAGES[0])
+
+    assert "wallet" in terms and "leather" in terms
+    assert not {"img", "jpg", "1200x800", "1"} & set(terms)
+    assert image_terms(IMAGES[2]) == image_terms({"alt": "Our workshop team"})
+
+
+def test_match_image_uses_url_words_without_alt():
+    assert match_image("New black belt in stock", IMAGES, margin=1.5) == ("belt", True)
+
+
+def test_match_image_clear_winner_by_alt_text():
+    assert match_image("Meet the team behind every stitch in our workshop", IMAGES, margin=1.5) == ("team", True)
+
+
+def test_match_image_ambiguous_or_unrelated():
+    image_id, clear = match_image("Leather wallet and leather belt", IMAGES + [
+        {"id": "wallet2", "alt": "Leather wallet", "url": "https://shop.test/p.jpg"},
+    ], margin=1.5)
+    assert image_id in {"wallet", "wallet2"} and not clear
+
+    assert match_image("Happy holidays everyone", IMAGES, margin=1.5) == (None, False)
+    assert match_image("wallet", [], margin=1.5) == (None, False)
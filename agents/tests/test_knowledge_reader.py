@@ -0,0 +1,32 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.models import KnowledgeSource
+from app.tools import knowledge_reader
+from app.tools.knowledge_reader import UserSources
+
+
+def _sources(updated_minute: int) -> UserSources:
+    source = KnowledgeSource(
+        id="s1",
+        url="https://shop.test/",
+        name="Shop",
+        updatedAt=datetime(2026, 1, 1, 0, updated_minute, tzinfo=timezone.utc),
+    )
+    # No content, so building the index needs no database reads
+    return UserSources("u1", [(source, False)])
+
+
+def test_new_source_version_replaces_cached_index(monkeypatch):
+    cache = knowledge_reader.LRUCache()
+    monkeypatch.setattr(knowledge_reader, "_index_cache", cache)
+
+    first = asyncio.run(knowledge_reader._get_index(None, _sources(0)))
+    assert asyncio.run(knowledge_reader._get_index(None, _sources(0))) is first
+
+    second = asyncio.run(knowledge_reader._get_index(None, _sources(5)))
+    assert second is not first
+    assert len(cache) == 1
+
+    knowledge_reader.invalidate_knowledge_cache("u1")
+    assert len(cache) == 0
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app import llm
+from app.config import settings
+from app.rate_governor import RateGovernor, current_lane, llm_lane
+
+MESSAGES = [HumanMessage(content="Write a tweet")]
+USAGE = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+
+
+def _rate_limited(headers: dict | None = None, code: str | None = None) -> openai.RateLimitError:
+    response = httpx.Response(
+        429,
+        headers=headers or {},
+        request=httpx.Request("POST", "https://api.openai.test/v1/chat/completions"),
+    )
+    body = {"code": code, "message": "Rate limit reached"} if code else None
+    return openai.RateLimitError("Rate limit reached", response=response, body=body)
+
+
+class FakeModel:
+    """Chat model stand-in: raises the queued errors first, then answers."""
+
+    model_name = "gpt-4o"
+    temperature = 0.5
+    max_tokens = 100
+
+    def __init__(self, errors: list[Exception] = ()):
+        self.errors = list(errors)
+        self.calls: list[str] = []
+
+    async def ainvoke(self, messages):
+        self.calls.append(current_lane())
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(content="Fresh tweet", usage_metadata=USAGE)
+
+
+@pytest.fixture
+def governor(monkeypatch):
+    governor = RateGovernor(rpm=10, tpm=10_000, batch_share=1.0)
+    monkeypatch.setattr(llm, "governor", governor)
+    return governor
+
+
+def _call(model: FakeModel):
+    return asyncio.run(llm._call_governed(model, MESSAGES, None))
+
+
+def test_rate_limit_retries_after_retry_after_with_jitter(governor, monkeypatch):
+    delays: list[float] = []
+    backoff = governor.backoff
+    monkeypatch.setattr(governor, "backoff", lambda *args: delays.append(backoff(*args)) or delays[-1])
+    model = FakeModel([_rate_limited({"retry-after-ms": "50"})])
+
+    started = time.monotonic()
+    text, usage = _call(model)
+
+    assert (text, usage) == ("Fresh tweet", USAGE)
+    assert len(model.calls) == 2
+    # Retry-After plus up to 0.105s of jitter, and the caller actually waited it out
+    assert 0.05 <= delays[0] <= 0.155
+    assert time.monotonic() - started >= delays[0]
+    assert governor.rate_limited_total == 1
+    # The rejected attempt gave its slot back; only the served call used one
+    assert governor._requests.level == pytest.approx(9, abs=0.1)
+
+
+def test_rate_limit_refunds_slot_and_tokens_when_giving_up(governor, monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    model = FakeModel([_rate_limited()])
+
+    with pytest.raises(openai.RateLimitError):
+        _call(model)
+
+    assert governor._requests.level == pytest.approx(10, abs=0.1)
+    assert governor._tokens.level == pytest.approx(10_000, abs=1)
+
+
+def test_exhausted_quota_is_not_retried(governor):
+    model = FakeModel([_rate_limited({"retry-after": "1"}, code=llm.QUOTA_EXHAUSTED)])
+
+    with pytest.raises(openai.RateLimitError):
+        _call(model)
+
+    assert len(model.calls) == 1
+    assert governor.rate_limited_total == 0
+
+
+def test_interactive_lane_is_served_before_batch(governor):
+    model = FakeModel()
+
+    async def run():
+        governor._requests.level = 0
+        with llm_lane("batch"):
+            batch = asyncio.create_task(llm._call_governed(model, MESSAGES, None))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(llm._call_governed(model, MESSAGES, None))
+        await asyncio.sleep(0)
+
+        # Capacity for one request: the later interactive call gets it
+        governor._requests.level = 1
+        governor._dispatch()
+        await interactive
+        assert model.calls == ["interactive"] and not batch.done()
+
+        governor._requests.level = 1
+        governor._dispatch()
+        await batch
+
+    asyncio.run(run())
+    assert model.calls == ["interactive", "batch"]
@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.agents import pipeline
+from app.config import settings
+from app.tools.post_index import PostIndex, simhash
+
+EARLIER = "Every wallet in our workshop is stitched by hand by one craftsperson"
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Stub the three stages; the editor returns whatever ``final`` holds."""
+    final = {"content": ""}
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    async def database_manager(session, user_id, **kwargs):
+        return {"knowledge_context": "Leather goods", "available_images": [], "log": "ok"}
+
+    async def post_index(session, user_id):
+        index = PostIndex(settings.dedup_max_distance)
+        index.add("earlier", simhash(EARLIER))
+        return index
+
+    async def author(**kwargs):
+        return {"draft_content": "draft", "suggestions": [], "log": "ok"}
+
+    async def editor(**kwargs):
+        return {"final_content": final["content"], "suggestions": [], "log": "ok"}
+
+    monkeypatch.setattr(settings, "dedup_enabled", True)
+    monkeypatch.setattr(pipeline, "async_session", session)
+    monkeypatch.setattr(pipeline, "run_database_manager", database_manager)
+    monkeypatch.setattr(pipeline, "get_post_index", post_index)
+    monkeypatch.setattr(pipeline, "run_author", author)
+    monkeypatch.setattr(pipeline, "run_editor", editor)
+    return final
+
+
+def test_generate_flags_near_duplicate_of_earlier_post(stages):
+    stages["content"] = "Every wallet in our workshop is stitched by hand by one craftsperson!"
+
+    response = asyncio.run(pipeline.run_pipeline("u"))
+
+    assert response.success and response.duplicate_of == "earlier"
+
+
+def test_generate_leaves_distinct_post_unflagged(stages):
+    stages["content"] = "Summer sale starts Friday with free shipping on every order"
+
+    response = asyncio.run(pipeline.run_pipeline("u"))
+
+    assert response.success and response.duplicate_of is None
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from app.agents.batch_pipeline import register_post
+from app.tools.post_index import PostIndex, simhash, simhash_distance
+
+POST = "Our hand-stitched leather wallets are back in stock, in brown and black. Free shipping this week!"
+
+
+def _flip(signature: int, bits: list[int]) -> int:
+    value = signature & ((1 << 64) - 1)
+    for bit in bits:
+        value ^= 1 << bit
+    return value - (1 << 64) if value >> 63 else value
+
+
+def test_simhash_near_copies_are_close_and_distinct_posts_far():
+    reworded = "Our hand-stitched leather wallets are back in stock, in black and brown. Free shipping this week!"
+    other = "Meet Ana, who has cut every belt in our workshop for twelve years."
+
+    assert simhash(POST) == simhash(POST + " https://shop.test/wallets")
+    assert simhash_distance(simhash(POST), simhash(reworded)) <= 3
+    assert simhash_distance(simhash(POST), simhash(other)) > 12
+    assert -(1 << 63) <= simhash(POST) < 1 << 63
+
+
+def test_simhash_without_terms_is_none():
+    assert simhash("https://shop.test/sale 🎉") is None
+    assert PostIndex(7).find_text("the and of") is None
+
+
+@pytest.mark.parametrize("max_distance", range(64))
+def test_bands_cover_all_bits_exactly(max_distance):
+    bands = PostIndex(max_distance)._bands
+
+    assert len(bands) == max_distance + 1
+    assert [start for start, _ in bands] == [sum(w for _, w in bands[:i]) for i in range(len(bands))]
+    assert sum(width for _, width in bands) == 64
+    assert all(width > 0 for _, width in bands)
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 7, 8, 13, 20])
+def test_find_returns_every_signature_within_max_distance(max_distance):
+    rng = random.Random(max_distance)
+    index = PostIndex(max_distance)
+    base = rng.getrandbits(64) - (1 << 63)
+    index.add("p1", base)
+
+    for _ in range(200):
+        bits = rng.sample(range(64), max_distance)
+        assert index.find(_flip(base, bits)) == "p1"
+    far = _flip(base, rng.sample(range(64), max_distance + 1))
+    assert index.find(far) is None
+
+
+def test_invalid_max_distance_is_rejected():
+    with pytest.raises(ValueError):
+        PostIndex(64)
+
+
+def test_register_post_keeps_siblings_out_of_shared_index():
+    shared = PostIndex(7)
+    shared.add("old", simhash("A completely different post about belts and workshop hours"))
+    batch = {"post_index": shared, "siblings": PostIndex(7)}
+
+    assert register_post(batch, "new1", POST)[1] is None
+    assert register_post(batch, "new2", POST + " Today only.")[1] == "new1"
+    assert shared.size == 1
+    assert batch["siblings"].size == 1
+    assert register_post(batch, "new3", "🎉🎉") == (None, None)
@@ -0,0 +1,58 @@
+import pytest
+
+from app import prompt_budget
+from app.prompt_budget import MIN_SECTION_TOKENS, estimate_tokens, pack_prompt, truncate_tokens
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Count with the deterministic estimate rather than a downloaded encoding
+    monkeypatch.setattr(prompt_budget, "_encoders", {})
+
+
+def test_estimate_counts_cjk_characters_individually():
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("\u5546\u54c1\u4ecb\u7ecd") == 4
+    assert estimate_tokens("") == 0
+
+
+def test_truncate_tokens_fits_budget_and_prefers_line_breaks():
+    text = "\n".join(f"line {i} with some words" for i in range(50))
+
+    cut = truncate_tokens(text, 40)
+    assert estimate_tokens(cut) <= 40
+    assert text.startswith(cut)
+    assert cut.endswith("words")
+    assert truncate_tokens("short", 40) == "short"
+    assert truncate_tokens(text, 0) == ""
+
+
+def test_pack_prompt_keeps_required_sections_and_trims_knowledge():
+    knowledge = "fact " * 2000
+    packed = pack_prompt(
+        [("knowledge", knowledge, 2), ("topic", "TOPIC: wallets", 0), ("repeated", "avoid this", 1)],
+        budget=500,
+        stage="test",
+    )
+
+    assert packed["truncated"] == ["knowledge"]
+    assert packed["dropped"] == []
+    assert list(packed["sections"]) == ["knowledge", "topic", "repeated"]
+    assert packed["text"].endswith("TOPIC: wallets\navoid this")
+    assert packed["tokens"] <= 500 + 2
+
+
+def test_pack_prompt_drops_sections_that_cannot_fit_usefully():
+    required = "x" * 4 * (500 - MIN_SECTION_TOKENS + 10)
+    packed = pack_prompt([("topic", required, 0), ("knowledge", "fact " * 500, 1)], budget=500, stage="test")
+
+    assert packed["dropped"] == ["knowledge"]
+    assert packed["text"] == required
+
+
+def test_pack_prompt_within_budget_is_unchanged():
+    sections = [("a", "first", 1), ("b", "", 1), ("c", "third", 0)]
+    packed = pack_prompt(sections, budget=100, stage="test")
+
+    assert packed["text"] == "first\nthird"
+    assert packed["truncated"] == packed["dropped"] == []
@@ -0,0 +1,45 @@
+import pytest
+
+from app.config import settings
+from app.rate_governor import RateGovernor, _Bucket
+
+
+def test_bucket_refills_linearly_up_to_capacity(monkeypatch):
+    monkeypatch.setattr("app.rate_governor.time.monotonic", lambda: 100.0)
+    bucket = _Bucket(60)
+    bucket.level = 0
+
+    bucket.refill(110.0)
+    assert bucket.level == pytest.approx(10)
+    bucket.refill(1000.0)
+    assert bucket.level == 60
+
+
+def test_bucket_seconds_until_accounts_for_floor():
+    bucket = _Bucket(120)
+    bucket.level = 10
+
+    assert bucket.seconds_until(5, 0) == 0
+    assert bucket.seconds_until(20, 0) == pytest.approx(5.0)
+    assert bucket.seconds_until(5, 20) == pytest.approx(7.5)
+    # Never asks for more than the whole bucket
+    assert bucket.seconds_until(1000, 0) == pytest.approx(55.0)
+
+
+def test_refund_returns_request_slot_and_tokens():
+    governor = RateGovernor(rpm=10, tpm=1000, batch_share=0.5)
+    governor._requests.level -= 1
+    governor._tokens.level -= 300
+
+    governor.refund(300)
+
+    assert governor._requests.level == 10
+    assert governor._tokens.level == 1000
+
+
+def test_backoff_honours_retry_after_and_cap():
+    governor = RateGovernor(rpm=10, tpm=1000, batch_share=0.5)
+
+    assert 2.0 <= governor.backoff(0, 2.0) <= 2.4
+    assert 0 <= governor.backoff(10, None) <= settings.llm_backoff_max_seconds
+    assert governor.backoff(0, 10_000) == settings.llm_backoff_max_seconds
@@ -0,0 +1,55 @@
+from app.tools.retrieval import PAGE_SEPARATOR, bm25_scores, chunk_text, index_chunks, select_chunks, tokenize
+
+
+def _chunks(source_id: str, text: str, max_chars: int = 80) -> list[dict]:
+    return [{**entry, "source_id": source_id} for entry in index_chunks(text, max_chars)]
+
+
+def test_chunk_text_respects_limit_and_sentences():
+    text = "First sentence here. Second one follows! Third is a question? " * 5
+    chunks = chunk_text(text, max_chars=60)
+
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    assert all(chunk.endswith((".", "!", "?")) for chunk in chunks)
+    assert " ".join(chunks) == " ".join(text.split())
+
+
+def test_chunk_text_keeps_pages_apart_and_cuts_long_sentences():
+    text = PAGE_SEPARATOR.join(["Short page.", "x" * 250])
+    chunks = chunk_text(text, max_chars=100)
+
+    assert chunks == ["Short page.", "x" * 100, "x" * 100, "x" * 50]
+
+
+def test_bm25_ranks_matching_chunk_first():
+    docs = ["leather wallets stitched by hand", "shipping and returns policy", "wallets ship worldwide"]
+    terms = [tokenize(doc) for doc in docs]
+    freqs = [{t: ts.count(t) for t in ts} for ts in terms]
+
+    scores = bm25_scores("hand stitched leather wallet", freqs, [len(ts) for ts in terms])
+
+    assert scores.argmax() == 0
+    assert scores[1] == 0
+    assert scores[2] > 0
+
+
+def test_bm25_without_query_terms_is_zero():
+    assert not bm25_scores("the and of", [{"wallet": 1}], [1]).any()
+    assert len(bm25_scores("wallet", [], [])) == 0
+
+
+def test_select_chunks_without_query_round_robins_sources():
+    chunks = _chunks("a", "Alpha one. Alpha two. Alpha three.", 12) + _chunks("b", "Beta one. Beta two.", 12)
+
+    selected = select_chunks(None, chunks, token_budget=1000, top_k=3)
+
+    assert [(c["source_id"], c["position"]) for c in selected] == [("a", 0), ("b", 0), ("a", 1), ("b", 1), ("a", 2)]
+
+
+def test_select_chunks_with_query_prefers_matches_within_budget():
+    chunks = _chunks("a", "Our wallets are leather. We ship on Mondays. Gift cards are available.", 30)
+
+    selected = select_chunks("ship", chunks, token_budget=1000, top_k=1)
+    assert [c["content"] for c in selected] == ["We ship on Mondays."]
+
+    assert select_chunks("ship", chunks, token_budget=1, top_k=3) == []
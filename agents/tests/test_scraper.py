@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.tools import scraper
+
+SITE = "https://shop.test"
+
+
+def _page(title: str, links: list[str]) -> str:
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return f"<html><head><title>{title}</title></head><body><main>About {title}. {anchors}</main></body></html>"
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """
+    A mock site: ``pages`` maps path -> (links, delay seconds, status).
+    Each request's path and start time are recorded in ``requests``.
+    """
+    pages: dict[str, tuple[list[str], float, int]] = {}
+    requests: list[tuple[str, float]] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        requests.append((path, time.monotonic()))
+        links, delay, status = pages.get(path, ([], 0, 404))
+        if delay:
+            await asyncio.sleep(delay)
+        return httpx.Response(status, text=_page(path, links), headers={"content-type": "text/html"})
+
+    monkeypatch.setattr(settings, "extract_executor", "inline")
+    monkeypatch.setattr(settings, "crawl_concurrency", 4)
+    monkeypatch.setattr(settings, "crawl_per_host_concurrency", 4)
+    monkeypatch.setattr(settings, "crawl_per_host_delay", 0)
+    monkeypatch.setattr(
+        scraper, "get_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    return pages, requests
+
+
+def _crawl(max_pages: int = 20) -> dict:
+    return asyncio.run(scraper.scrape_website(f"{SITE}/", max_pages=max_pages))
+
+
+def _paths(result: dict) -> list[str]:
+    return [page["url"].removeprefix(SITE) for page in result["pages"]]
+
+
+def test_results_follow_discovery_order(site):
+    pages, _ = site
+    pages["/"] = (["/a", "/b", "/c"], 0, 200)
+    # /a finishes last but was discovered first
+    pages["/a"] = (["/a1"], 0.05, 200)
+    pages["/b"] = ([], 0, 200)
+    pages["/c"] = ([], 0, 200)
+    pages["/a1"] = ([], 0, 200)
+
+    result = _crawl()
+
+    assert _paths(result) == ["/", "/a", "/b", "/c", "/a1"]
+    assert result["pages_scraped"] == 5
+
+
+def test_page_budget_defers_urls_and_retries_after_failures(site):
+    pages, requests = site
+    pages["/"] = (["/a", "/b", "/c", "/d"], 0, 200)
+    pages["/a"] = ([], 0.01, 500)
+    pages["/b"] = ([], 0.01, 200)
+    pages["/c"] = ([], 0, 200)
+    pages["/d"] = ([], 0, 200)
+
+    result = _crawl(max_pages=3)
+
+    assert result["pages_scraped"] == 3
+    assert "/a" not in _paths(result)
+    # The failed fetch freed budget for a deferred URL; nothing beyond the budget was fetched
+    fetched_ok = [path for path, _ in requests if pages[path][2] == 200]
+    assert len(fetched_ok) == 3
+
+
+def test_requests_to_one_host_are_spaced(site, monkeypatch):
+    monkeypatch.setattr(settings, "crawl_per_host_delay", 0.05)
+    pages, requests = site
+    pages["/"] = (["/a", "/b", "/c"], 0, 200)
+    for path in ("/a", "/b", "/c"):
+        pages[path] = ([], 0, 200)
+
+    _crawl()
+
+    starts = sorted(started for _, started in requests)
+    assert len(starts) == 4
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert min(gaps) >= 0.045
+
+
+def test_deadline_cancels_slow_pages(site, monkeypatch):
+    monkeypatch.setattr(settings, "crawl_deadline_seconds", 0.2)
+    pages, _ = site
+    pages["/"] = (["/slow", "/fast"], 0, 200)
+    pages["/slow"] = ([], 10, 200)
+    pages["/fast"] = ([], 0, 200)
+
+    started = time.monotonic()
+    result = _crawl()
+
+    assert time.monotonic() - started < 2
+    assert _paths(result) == ["/", "/fast"]
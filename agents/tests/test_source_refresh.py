@@ -0,0 +1,146 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.agents import source_refresh
+from app.agents.source_refresh import LOCK_NOT_AVAILABLE, _source_lock, refresh_single_flight
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    """Record every _refresh_exclusive call; each returns ``results[wait]`` after a short crawl."""
+    calls: list[bool] = []
+    results = {True: "refreshed", False: "refreshed"}
+
+    async def refresh_exclusive(source_id, wait):
+        calls.append(wait)
+        await asyncio.sleep(0.02)
+        return results[wait]
+
+    monkeypatch.setattr(source_refresh, "_refresh_exclusive", refresh_exclusive)
+    return calls, results
+
+
+def test_concurrent_callers_share_one_refresh(refreshes):
+    calls, _ = refreshes
+
+    async def run():
+        return await asyncio.gather(*(refresh_single_flight("s1") for _ in range(5)))
+
+    assert asyncio.run(run()) == ["refreshed"] * 5
+    assert calls == [True]
+    assert source_refresh._inflight == {}
+
+
+def test_non_waiting_caller_skips_inflight_refresh(refreshes):
+    calls, _ = refreshes
+
+    async def run():
+        first = asyncio.create_task(refresh_single_flight("s1"))
+        await asyncio.sleep(0)
+        skipped = await refresh_single_flight("s1", wait=False)
+        return skipped, await first
+
+    assert asyncio.run(run()) == (None, "refreshed")
+    assert calls == [True]
+
+
+def test_waiting_caller_retries_after_busy_non_waiting_refresh(refreshes):
+    calls, results = refreshes
+    # The non-waiting refresh found the lock busy elsewhere
+    results[False] = None
+
+    async def run():
+        background = asyncio.create_task(refresh_single_flight("s1", wait=False))
+        await asyncio.sleep(0)
+        waited = await refresh_single_flight("s1")
+        return await background, waited
+
+    assert asyncio.run(run()) == (None, "refreshed")
+    assert calls == [False, True]
+
+
+class FakeConnection:
+    def __init__(self, on_execute):
+        self.on_execute = on_execute
+        self.statements: list[str] = []
+        self.rollbacks = 0
+        self.invalidated = False
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return self.on_execute(str(statement))
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+    async def invalidate(self):
+        self.invalidated = True
+
+
+def _postgres(monkeypatch, on_execute) -> FakeConnection:
+    conn = FakeConnection(on_execute)
+
+    @asynccontextmanager
+    async def connect():
+        yield conn
+
+    monkeypatch.setattr(
+        source_refresh, "engine", SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), connect=connect)
+    )
+    return conn
+
+
+def _db_error(sqlstate: str) -> DBAPIError:
+    return DBAPIError("SELECT pg_advisory_lock(:key)", {}, SimpleNamespace(sqlstate=sqlstate))
+
+
+def _hold(source_id: str, wait: bool) -> bool:
+    async def run():
+        async with _source_lock(source_id, wait) as locked:
+            return locked
+
+    return asyncio.run(run())
+
+
+def test_lock_timeout_reports_busy(monkeypatch):
+    def on_execute(statement):
+        if "pg_advisory_lock" in statement:
+            raise _db_error(LOCK_NOT_AVAILABLE)
+
+    conn = _postgres(monkeypatch, on_execute)
+
+    assert _hold("s1", wait=True) is False
+    assert conn.rollbacks == 1
+    assert not any("unlock" in statement for statement in conn.statements)
+
+
+def test_other_lock_errors_are_raised(monkeypatch):
+    def on_execute(statement):
+        if "pg_advisory_lock" in statement:
+            raise _db_error("57014")  # query_canceled
+
+    _postgres(monkeypatch, on_execute)
+
+    with pytest.raises(DBAPIError):
+        _hold("s1", wait=True)
+
+
+@pytest.mark.parametrize("available", [True, False])
+def test_try_lock_without_waiting(monkeypatch, available):
+    def on_execute(statement):
+        if "pg_try_advisory_lock" in statement:
+            return SimpleNamespace(scalar=lambda: available)
+
+    conn = _postgres(monkeypatch, on_execute)
+
+    assert _hold("s1", wait=False) is available
+    assert not any("lock_timeout" in statement for statement in conn.statements)
+    # Only a lock that was taken is released
+    assert any("pg_advisory_unlock" in statement for statement in conn.statements) is available
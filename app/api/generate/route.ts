@@ -55,6 +55,7 @@ export async function POST(request: NextRequest) {
         return NextResponse.json({
           suggestions: result.suggestions,
           media_asset_id: result.media_asset_id,
+          duplicate_of: result.duplicate_of,
           pipeline_log: result.pipeline_log,
         });
       }
@@ -62,6 +63,7 @@ export async function POST(request: NextRequest) {
       return NextResponse.json({
         content: result.content,
         media_asset_id: result.media_asset_id,
+        duplicate_of: result.duplicate_of,
         pipeline_log: result.pipeline_log,
       });
     } catch (error) {
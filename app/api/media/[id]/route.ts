@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from "next/server";
 import { prisma } from "@/lib/db";
 import { requireAuth, unauthorizedResponse } from "@/lib/auth0";
+import { fetchMediaBlob } from "@/lib/agent-client";
 
 export async function GET(
   request: NextRequest,
@@ -23,7 +24,13 @@ export async function GET(
     return NextResponse.json({ error: "Media not found" }, { status: 404 });
   }
 
-  return new NextResponse(asset.data, {
+  const data =
+    asset.data ?? (asset.blobKey ? await fetchMediaBlob(asset.blobKey) : null);
+  if (!data) {
+    return NextResponse.json({ error: "Media not found" }, { status: 404 });
+  }
+
+  return new NextResponse(data, {
     headers: {
       "Content-Type": asset.mimeType,
       "Cache-Control": "public, max-age=86400",
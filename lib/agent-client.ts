@@ -6,6 +6,7 @@ interface GenerateResult {
   content?: string;
   suggestions?: string[];
   media_asset_id?: string;
+  duplicate_of?: string | null; // Earlier post the content nearly repeats
   pipeline_log?: Record<string, string>;
   error?: string;
 }
@@ -69,6 +70,21 @@ export async function batchGenerateWithAgents(params: {
   return res.json();
 }
 
+/**
+ * Fetch MediaAsset bytes that the agent service keeps in its blob store
+ * (assets with a `blobKey` and no inline `data`).
+ */
+export async function fetchMediaBlob(blobKey: string): Promise<Uint8Array | null> {
+  if (!AGENT_URL) return null;
+
+  const res = await fetch(`${AGENT_URL}/media/${encodeURIComponent(blobKey)}`, {
+    headers: { Authorization: `Bearer ${AGENT_SECRET || ""}` },
+  });
+  if (!res.ok) return null;
+
+  return new Uint8Array(await res.arrayBuffer());
+}
+
 export function isAgentServiceConfigured(): boolean {
   return !!AGENT_URL;
 }
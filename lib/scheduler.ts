@@ -16,6 +16,7 @@ import { decodeRecurringAiPrompt } from "./recurring-ai";
 import { submitImageTask, getVideoTask } from "./wavespeed";
 import { buildTrendPrompt, fetchTrendingTopics, trendRegionWoeid } from "./trending";
 import { getContentProfile } from "./content-profile";
+import { fetchMediaBlob } from "./agent-client";
 import { optimizeHashtags } from "./hashtag-optimizer";
 
 async function fetchBinary(
@@ -86,10 +87,13 @@ export async function processScheduledPosts() {
       const media = await prisma.mediaAsset.findUnique({
         where: { id: post.mediaAssetId },
       });
-      if (media?.data) {
+      const mediaData =
+        media?.data ??
+        (media?.blobKey ? await fetchMediaBlob(media.blobKey) : null);
+      if (media && mediaData) {
         result = await postTweetWithMedia(
           post.content,
-          Buffer.from(media.data),
+          Buffer.from(mediaData),
           media.mimeType,
           resolved.credentials,
         );
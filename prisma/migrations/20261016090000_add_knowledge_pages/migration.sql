@@ -0,0 +1,26 @@
+-- CreateTable: KnowledgePage
+-- Per-page crawl cache for knowledge sources. The agent service stores the
+-- ETag / Last-Modified validators and a body hash for every crawled page so
+-- refreshes can use conditional requests and skip re-parsing unchanged pages.
+
+CREATE TABLE "KnowledgePage" (
+  "id"           TEXT NOT NULL,
+  "url"          TEXT NOT NULL,
+  "title"        TEXT NOT NULL DEFAULT '',
+  "content"      TEXT NOT NULL DEFAULT '',
+  "images"       TEXT,
+  "links"        TEXT,
+  "etag"         TEXT,
+  "lastModified" TEXT,
+  "contentHash"  TEXT,
+  "fetchedAt"    TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "updatedAt"    TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "sourceId"     TEXT NOT NULL,
+  CONSTRAINT "KnowledgePage_pkey" PRIMARY KEY ("id")
+);
+
+CREATE UNIQUE INDEX "KnowledgePage_sourceId_url_key"
+  ON "KnowledgePage"("sourceId", "url");
+
+ALTER TABLE "KnowledgePage" ADD CONSTRAINT "KnowledgePage_sourceId_fkey"
+  FOREIGN KEY ("sourceId") REFERENCES "KnowledgeSource"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,9 @@
+-- AlterTable: MediaAsset
+-- Media bytes may now live in the agent service's content-addressed blob
+-- store. Such rows keep only the SHA-256 key in "blobKey" and leave "data"
+-- null; existing rows keep their inline bytes.
+
+ALTER TABLE "MediaAsset" ALTER COLUMN "data" DROP NOT NULL;
+ALTER TABLE "MediaAsset" ADD COLUMN "blobKey" TEXT;
+
+CREATE INDEX "MediaAsset_blobKey_idx" ON "MediaAsset"("blobKey");
@@ -0,0 +1,9 @@
+-- AlterTable: MediaAsset
+-- 64-bit perceptual hash (dHash) computed by the agent service at ingest.
+-- New images within a small Hamming distance of an existing asset for the
+-- same user are skipped, so the same photo served from different URLs is
+-- stored once.
+
+ALTER TABLE "MediaAsset" ADD COLUMN "phash" BIGINT;
+
+CREATE INDEX "MediaAsset_userId_phash_idx" ON "MediaAsset"("userId", "phash");
@@ -0,0 +1,28 @@
+-- CreateTable: KnowledgeRefreshJob
+-- Durable queue for the agent service's background refresh worker.
+-- /generate serves the current (possibly stale) knowledge content and
+-- enqueues one job per stale source; workers claim jobs with
+-- FOR UPDATE SKIP LOCKED.
+
+CREATE TABLE "KnowledgeRefreshJob" (
+  "id"         TEXT NOT NULL,
+  "status"     TEXT NOT NULL DEFAULT 'pending',
+  "attempts"   INTEGER NOT NULL DEFAULT 0,
+  "error"      TEXT,
+  "createdAt"  TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "startedAt"  TIMESTAMP(3),
+  "finishedAt" TIMESTAMP(3),
+  "updatedAt"  TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "sourceId"   TEXT NOT NULL,
+  "userId"     TEXT,
+  CONSTRAINT "KnowledgeRefreshJob_pkey" PRIMARY KEY ("id")
+);
+
+CREATE INDEX "KnowledgeRefreshJob_status_createdAt_idx"
+  ON "KnowledgeRefreshJob"("status", "createdAt");
+
+CREATE INDEX "KnowledgeRefreshJob_sourceId_status_idx"
+  ON "KnowledgeRefreshJob"("sourceId", "status");
+
+ALTER TABLE "KnowledgeRefreshJob" ADD CONSTRAINT "KnowledgeRefreshJob_sourceId_fkey"
+  FOREIGN KEY ("sourceId") REFERENCES "KnowledgeSource"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,22 @@
+-- CreateTable: KnowledgeChunk
+-- Retrieval index over knowledge source content. The agent service cuts each
+-- source into chunks at refresh time and stores per-chunk BM25 term counts so
+-- generation can pick the passages relevant to the prompt.
+
+CREATE TABLE "KnowledgeChunk" (
+  "id"          TEXT NOT NULL,
+  "position"    INTEGER NOT NULL,
+  "content"     TEXT NOT NULL,
+  "terms"       TEXT NOT NULL,
+  "length"      INTEGER NOT NULL,
+  "contentHash" TEXT NOT NULL,
+  "createdAt"   TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "sourceId"    TEXT NOT NULL,
+  CONSTRAINT "KnowledgeChunk_pkey" PRIMARY KEY ("id")
+);
+
+CREATE INDEX "KnowledgeChunk_sourceId_position_idx"
+  ON "KnowledgeChunk"("sourceId", "position");
+
+ALTER TABLE "KnowledgeChunk" ADD CONSTRAINT "KnowledgeChunk_sourceId_fkey"
+  FOREIGN KEY ("sourceId") REFERENCES "KnowledgeSource"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,44 @@
+-- CreateTable: BatchJob, BatchJobItem
+-- Asynchronous batch generation jobs for the agent service. POST /batch-jobs
+-- records a job with one item per post and returns immediately; workers
+-- claim jobs with FOR UPDATE SKIP LOCKED, write each Post together with its
+-- item, and resume jobs whose heartbeat (updatedAt) has gone stale.
+
+CREATE TABLE "BatchJob" (
+  "id"            TEXT NOT NULL,
+  "status"        TEXT NOT NULL DEFAULT 'pending',
+  "count"         INTEGER NOT NULL,
+  "scheduleTimes" TEXT,
+  "attempts"      INTEGER NOT NULL DEFAULT 0,
+  "error"         TEXT,
+  "createdAt"     TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "startedAt"     TIMESTAMP(3),
+  "finishedAt"    TIMESTAMP(3),
+  "updatedAt"     TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "userId"        TEXT NOT NULL,
+  CONSTRAINT "BatchJob_pkey" PRIMARY KEY ("id")
+);
+
+CREATE INDEX "BatchJob_status_createdAt_idx"
+  ON "BatchJob"("status", "createdAt");
+
+CREATE INDEX "BatchJob_userId_createdAt_idx"
+  ON "BatchJob"("userId", "createdAt");
+
+CREATE TABLE "BatchJobItem" (
+  "id"        TEXT NOT NULL,
+  "position"  INTEGER NOT NULL,
+  "status"    TEXT NOT NULL DEFAULT 'pending',
+  "content"   TEXT,
+  "postId"    TEXT,
+  "error"     TEXT,
+  "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "jobId"     TEXT NOT NULL,
+  CONSTRAINT "BatchJobItem_pkey" PRIMARY KEY ("id")
+);
+
+CREATE UNIQUE INDEX "BatchJobItem_jobId_position_key"
+  ON "BatchJobItem"("jobId", "position");
+
+ALTER TABLE "BatchJobItem" ADD CONSTRAINT "BatchJobItem_jobId_fkey"
+  FOREIGN KEY ("jobId") REFERENCES "BatchJob"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,8 @@
+-- AlterTable: Post
+-- 64-bit SimHash of the post text, computed by the agent service when it
+-- writes a post (and backfilled lazily for posts written elsewhere). The
+-- service keeps a per-user near-duplicate index over these signatures so
+-- drafts that repeat an earlier post are redrafted or rejected instead of
+-- pasting recent posts into every author prompt.
+
+ALTER TABLE "Post" ADD COLUMN "simhash" BIGINT;
@@ -0,0 +1,10 @@
+-- CreateIndex: KnowledgeSource, MediaAsset
+-- Every generation loads the user's active sources and their 20 newest
+-- active images. The only index on KnowledgeSource led with "url" and the
+-- image listing had to sort the user's assets, so both filter on "userId"
+-- first now. The image harvester's ("userId", "sourceUrl" IN ...) lookup
+-- is already served by the unique ("sourceUrl", "userId") index.
+
+CREATE INDEX "KnowledgeSource_userId_isActive_idx" ON "KnowledgeSource"("userId", "isActive");
+
+CREATE INDEX "MediaAsset_userId_isActive_createdAt_idx" ON "MediaAsset"("userId", "isActive", "createdAt");
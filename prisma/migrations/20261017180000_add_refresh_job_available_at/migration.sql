@@ -0,0 +1,6 @@
+-- AlterTable: KnowledgeRefreshJob
+-- Earliest time a job may be claimed. A failed refresh goes back to
+-- pending with an exponential backoff on its attempt count instead of
+-- being retried immediately; NULL means available now.
+
+ALTER TABLE "KnowledgeRefreshJob" ADD COLUMN "availableAt" TIMESTAMP(3);
@@ -0,0 +1,21 @@
+-- CreateTrigger: Post
+-- The agent service caches each user's near-duplicate index over
+-- Post."simhash". Posts edited outside the service (the web app's PATCH
+-- /api/posts/[id]) would otherwise keep the signature of their old text, so
+-- an update that changes "content" without setting a new "simhash" clears
+-- it and the service re-hashes the post on its next index load.
+
+CREATE FUNCTION "Post_clear_simhash"() RETURNS trigger AS $$
+BEGIN
+  IF NEW."simhash" IS NOT DISTINCT FROM OLD."simhash" THEN
+    NEW."simhash" := NULL;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER "Post_clear_simhash_on_edit"
+  BEFORE UPDATE OF "content" ON "Post"
+  FOR EACH ROW
+  WHEN (NEW."content" IS DISTINCT FROM OLD."content")
+  EXECUTE FUNCTION "Post_clear_simhash"();
@@ -0,0 +1,6 @@
+-- AlterTable: BatchJob
+-- Earliest time a job may be claimed. A job that could not run to the end
+-- goes back to pending with an exponential backoff on its attempt count
+-- instead of being retried immediately; NULL means available now.
+
+ALTER TABLE "BatchJob" ADD COLUMN "availableAt" TIMESTAMP(3);
@@ -0,0 +1,7 @@
+-- DropIndex: MediaAsset
+-- The agent service matches perceptual hashes by Hamming distance in a
+-- banded in-process index, which a b-tree over ("userId", "phash") cannot
+-- serve. Its version check (asset count and latest "createdAt" per user)
+-- uses the ("userId", "isActive", "createdAt") index.
+
+DROP INDEX "MediaAsset_userId_phash_idx";